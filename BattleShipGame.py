@@ -1,31 +1,33 @@
+import argparse
 import pygame
 import random
 import time
 import datetime
 import os
-import json
 
-# Initialize pygame
-pygame.init()
+import ai
+import assets
+import audio
+import engine
+import fonts
+import matchlog
+import placement
+import renderer
+import replay
+import savegame
 
 # Create the screen
 width = 800
 height = 600
-screen = pygame.display.set_mode((width, height))
-rows = 10
-cols = 10
+screen = None
+frames = None  # renderer.FrameLoop driving every screen
+layers = renderer.LayerCache()  # backgrounds and grids drawn once
+rows = engine.ROWS
+cols = engine.COLS
 cells_size = 33
+fleet = engine.FLEET  # (name, size) for every ship each side gets
 current_turn = "player"
 debug_mode = False # True for showing comp ships, False for playing the game normally
-target_stack = []  # Stores cells to check around a hit
-current_direction = None  # Direction of exploration after detecting a ship
-ship_orientation = None  # Orientation of the ship (horizontal or vertical)
-current_ship_cells = []  # Tracks cells of the current target ship
-movement_logs = []
-
-
-# Fonts
-font = pygame.font.SysFont('Arial', 50)
 
 # Colors
 WHITE = (255, 255, 255)
@@ -36,191 +38,178 @@ PURPLE = (128, 0, 128)
 RED = (255, 0, 0)
 YELLOW = (255, 255, 0)
 GREY = (128, 128, 128)# Update typing color
+SHOT_COLORS = {"hit": RED, "miss": PURPLE}  # Shot markers on the grids
+MAX_CELL_SIZE = 33  # Cell size of the standard 10x10 board
+SHIP_LABEL_MIN_CELL = 20  # Below this cell size only ships in the dock get a name label
+LOG_FLUSH_INTERVAL = 1.0  # Seconds the match log may hold shots before they reach the disk
+LOG_QUEUE_SIZE = 1024  # Shots queued for the log writer before LOG_WHEN_FULL kicks in
+LOG_WHEN_FULL = "coalesce"  # matchlog.WHEN_FULL: never stall a turn and never lose a shot
+MAX_NAME_LENGTH = 20  # Characters in a player name, which also names the save file and goes into the logs
+
+# Images and sounds, loaded by game_assets
+BACKGROUND_IMAGE = "background.jpeg"
+ICON_IMAGE = "ship.png"
+SOUND_HIT = "Hitdamage.wav"
+SOUND_DESTROYED = "Shipdestroyed.wav"
+SOUND_TURN_CHANGE = "Turnchange.wav"
+SOUND_WIN = "explosionwin.wav"
+
+# Sound cues: asset, priority (a more important cue cuts off a less important one
+# when every channel is busy) and seconds within which a repeat is skipped
+SOUND_CUES = {
+    "hit": audio.Cue(SOUND_HIT, 1, 0.1),
+    "sunk": audio.Cue(SOUND_DESTROYED, 2, 0.5),
+    "turn": audio.Cue(SOUND_TURN_CHANGE, 0, 0.1),
+    "win": audio.Cue(SOUND_WIN, 3, 1.0),
+}
+
+# The window, fonts and assets are only created by init_game() and the log file
+# by the first match, so importing this module does not open a window, the
+# mixer or a log file.
+game_assets = None  # assets.AssetManager for this session
+game_audio = audio.NullAudio()  # audio.AudioManager once init_game() finds a mixer
+log_filename = None
+match_log = None  # matchlog.MatchLog for this session
+game_replay = None  # replay.Recorder for the match being played
+
+
+def init_game(mute=False):
+    """Opens the window and starts loading the images and sounds in the background."""
+    global screen, frames, game_assets, game_audio
+
+    # Initialize pygame
+    pygame.init()
+    screen = pygame.display.set_mode((width, height))
+    frames = renderer.FrameLoop(screen)
+
+    # The first screen is shown while the loader thread decodes these, in this order
+    game_assets = assets.AssetManager()
+    game_assets.request(BACKGROUND_IMAGE, (width, height))
+    game_assets.request(ICON_IMAGE)
+    if mute:
+        pygame.mixer.quit()  # pygame.init() opened it; give the audio device back
+        game_audio = audio.NullAudio()
+    elif pygame.mixer.get_init():
+        for cue in SOUND_CUES.values():
+            game_assets.request(cue.sound)
+        game_audio = audio.AudioManager(SOUND_CUES, game_assets.get)
+
+    pygame.display.set_caption("Battleships")
+
+
+def background_image():
+    """The window-sized background, waiting for the loader thread if it isn't done yet."""
+    return game_assets.get(BACKGROUND_IMAGE, (width, height))
+
+
+def open_match_log():
+    """The session's match log, opened when the first match starts."""
+    global log_filename, match_log
+    if match_log is None:
+        log_filename = dated_filename("Game_Log", ".bslog")
+        match_log = matchlog.MatchLog(log_filename, flush_interval=LOG_FLUSH_INTERVAL,
+                                      max_queue=LOG_QUEUE_SIZE, when_full=LOG_WHEN_FULL)
+    return match_log
+
+def configure_board(new_rows=engine.ROWS, new_cols=engine.COLS, new_fleet=engine.FLEET):
+    """Sets the board size and fleet for the next games and sizes the cells to fit the window."""
+    global rows, cols, fleet, cells_size
+    engine.check_setup(new_rows, new_cols, new_fleet)
+    rows, cols, fleet = new_rows, new_cols, list(new_fleet)
+    # Both grids side by side with 50px margins and a 40px gap, below the 100px banner
+    cells_size = max(1, min(MAX_CELL_SIZE, (width - 140) // (2 * cols), (height - 120) // rows))
 
-# Title and icon
-pygame.display.set_caption("Battleships")
-icon = pygame.image.load('ship.png')  # Ensure this file exists
-pygame.display.set_icon(icon)
-background_image = pygame.image.load('background.jpeg')
-scaled_image = pygame.transform.scale(background_image, (width, height))
-title_font = pygame.font.SysFont('Comic Sans MS', 70)
-title_text = title_font.render("BattleShips", True, WHITE)
-title_rect = title_text.get_rect(center=(width // 2, 100))
-
-
-# File vars
-log_filename = datetime.datetime.now().strftime("Game_Log_%Y-%m-%d_%H-%M.txt")
-log_file = open(log_filename, "w")
-
-# Sound effects
-sound_hit = pygame.mixer.Sound("Hitdamage.wav")
-sound_destroyed = pygame.mixer.Sound("Shipdestroyed.wav")
-sound_turnchange = pygame.mixer.Sound("turnchange.wav")
-sound_win = pygame.mixer.Sound("explosionwin.wav")
 
                                     # Game functions
 # Game-youssef
-def start_game_singleplayer(player_ships, difficulty="easy"):
-    """Starts a single-player game."""
+def start_game_singleplayer(player_ships, difficulty="easy", player_name="Player", saved=None):
+    """Starts a single-player game, or carries on from a savegame.State; every turn is autosaved."""
+    global game_replay
     running = True
-    computer_ships = generate_computer_ships()
-    computer_grid_status = [[None for _ in range(cols)] for _ in range(rows)]
-    player_grid_status = [[None for _ in range(cols)] for _ in range(rows)]
-    player_turn = True  # Player starts first
+    if saved:
+        player_board, computer_board, computer_ai, rng = savegame.resume(saved)
+        seed = saved.seed
+        computer_ships = computer_board.ships
+        player_turn = saved.player_turn
+        if saved.replay and os.path.exists(saved.replay):
+            game_replay = replay.Recorder.resume(saved.replay, saved.replay_ms)
+    else:
+        seed = random.getrandbits(64)  # the computer's fleet and its AI draw from this, and the replay keeps it
+        rng = random.Random(seed)
+        computer_ships = generate_computer_ships(rng)
+        computer_board = engine.board_from_ships(computer_ships, rows, cols)
+        player_board = engine.board_from_ships([attach_cells(ship, 50, 100) for ship in player_ships], rows, cols)
+        player_turn = True  # Player starts first
+        computer_ai = ai.STRATEGIES[difficulty](rows, cols, fleet, rng=rng)
+        game_replay = replay.Recorder(dated_filename("Replay", ".bsreplay"),
+                                      rows, cols, seed, difficulty, player_board.ships, computer_ships)
+    open_match_log().start_match(player_name, difficulty, rows, cols)
+    autosave = savegame.Autosave(savegame.save_path(player_name))
+
+    player_view = board_view(left=True)
+    computer_view = board_view(left=False)
+    for ship in player_board.ships:
+        player_view.paint_ship(ship["cells"], GREY)
+    if debug_mode:  # Show the computer's ships too
+        for ship in computer_ships:
+            computer_view.paint_ship(ship["cells"], GREY)
+    for board, view in ((player_board, player_view), (computer_board, computer_view)):
+        for row, line in enumerate(board.status):  # Shots of a resumed game
+            for col, result in enumerate(line):
+                if result:
+                    view.stamp(row, col, SHOT_COLORS[result])
 
+    def draw():
+        draw_game_state(player_view, computer_view, player_turn)
+
+    frames.mark_all()
     while running:
+        frames.render(draw)
+        shots_before = computer_board.shots_fired + player_board.shots_fired
 
         if player_turn:
-            player_turn = handle_player_turn(computer_ships, computer_grid_status)
+            player_turn = handle_player_turn(computer_board, computer_view, player_view)
         else:
-            if difficulty == "hard":
-                player_turn = singleplayer_hardmode(player_grid_status, player_ships)
+            if difficulty == "easy":
+                player_turn = handle_computer_turn(player_board, computer_ai, player_view)
             else:
-                player_turn = handle_computer_turn(player_grid_status, player_ships)
+                player_turn = handle_ai_turn(player_board, computer_ai, player_view)
 
         # Check for game over
-        if all_ships_sunk(computer_ships):
+        if computer_board.all_ships_sunk():
+            autosave.discard()
+            match_log.end_match("Player")
             display_game_over("Player Wins!")
             running = False
-        elif all_ships_sunk(player_ships):
+        elif player_board.all_ships_sunk():
+            autosave.discard()
+            match_log.end_match("Computer")
             display_game_over("Computer Wins!")
             running = False
 
-        # Redraw game state
-        screen.blit(scaled_image, (0, 0))
-        draw_game_state(player_ships, computer_grid_status, player_grid_status, player_turn, computer_ships, debug_mode)
-        pygame.display.update()
-def singleplayer_hardmode(player_grid_status, player_ships):
-    global current_direction, current_ship_cells, target_stack
-
-
-    def find_adjacent_cells(row, col):
-        """Find valid adjacent cells to target."""
-        adjacent = []
-        for dr, dc in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-            nr, nc = row + dr, col + dc
-            if 0 <= nr < rows and 0 <= nc < cols and player_grid_status[nr][nc] is None:
-                adjacent.append((nr, nc))
-        return adjacent
-
-    def choose_target():
-        """Choose the next target logically."""
-        global current_direction, current_ship_cells, target_stack
-
-        if current_direction and current_ship_cells:
-            # Continue in the current direction
-            dr, dc = current_direction
-            last_row, last_col = current_ship_cells[-1]
-            next_row, next_col = last_row + dr, last_col + dc
-
-            if 0 <= next_row < rows and 0 <= next_col < cols and player_grid_status[next_row][next_col] is None:
-                return next_row, next_col
-
-            # If the direction is exhausted, reset it
-            current_direction = None
-
-        if target_stack:
-            return target_stack.pop()
-
-        # Random targeting with parity for efficiency
-        for parity in [(0, 0), (1, 1)]:
-            for row in range(rows):
-                for col in range(cols):
-                    if (row % 2, col % 2) == parity and player_grid_status[row][col] is None:
-                        return row, col
-
-        # Absolute fallback
-        for row in range(rows):
-            for col in range(cols):
-                if player_grid_status[row][col] is None:
-                    return row, col
-
-        raise RuntimeError("No valid targets available!")
-
-    # AI chooses a target
-    row, col = choose_target()
-    hit = handle_shooting_hardmode(row, col, player_ships, player_grid_status)
-
-    if hit:
-        current_ship_cells.append((row, col))
-
-        # Add adjacent cells to the stack only for the first hit
-        if len(current_ship_cells) == 1:
-            target_stack.extend(find_adjacent_cells(row, col))
-
-        # Determine direction if it's the second hit
-        if len(current_ship_cells) > 1 and not current_direction:
-            first_row, first_col = current_ship_cells[0]
-            dr, dc = row - first_row, col - first_col
-            current_direction = [dr, dc]
-    else:
-        # If no hit, reset the direction
-        current_direction = None
-
-    # Check if a ship was sunk
-    for ship in player_ships:
-        if ship["status"] == "alive" and ship["hits"] >= ship["size"]:
-            ship["status"] = "sunk"
-            sound_destroyed.play()
-
-            # Remove the sunk ship from tracking but don't clear target_stack
-            current_ship_cells.clear()
-            current_direction = None  # Reset direction only for the sunk ship
-            break
-
-    # Continue processing adjacent cells for potential other ships
-    if target_stack:
-        return True  # AI will continue targeting from the stack
-
-    return True  # End AI turn if no targets remain
-
-def handle_shooting_hardmode(row, col, ships, target_grid):
-    """Handles shooting logic specifically for hard mode."""
-    for ship in ships:
-        if ship["rect"].collidepoint(
-            50 + col * cells_size + cells_size // 2,
-            100 + row * cells_size + cells_size // 2
-        ):
-            target_grid[row][col] = "hit"
-            log_action("Computer", "Attack", (row, col), "Hit")
-            ship["hits"] += 1
-            sound_hit.play()
-            if ship["hits"] >= ship["size"]:
-                ship["status"] = "sunk"
-                sound_destroyed.play()
-            return True
-
-    target_grid[row][col] = "miss"
-    log_action("Computer", "Attack", (row, col), "Miss")
-    sound_turnchange.play()
-    return False
-def handle_shooting_singleplayer(row, col, ships, target_grid, grid_start_x, grid_start_y, shooter):
-    """Handles shooting logic specifically for singleplayer."""
-    for ship in ships:
-        if ship["rect"].collidepoint(
-            grid_start_x + col * cells_size + cells_size // 2,
-            grid_start_y + row * cells_size + cells_size // 2
-        ):
-            target_grid[row][col] = "hit"
-            log_action(shooter, "Attack", (row, col), "Hit")
-            ship["hits"] += 1
-            sound_hit.play()
-            if ship["hits"] >= ship["size"]:
-                ship["status"] = "sunk"
-                sound_destroyed.play()
-            return True
-
-    target_grid[row][col] = "miss"
-    log_action(shooter, "Attack", (row, col), "Miss")
-    sound_turnchange.play()
-    return False
+        # Only the cell that was shot and the turn message need redrawing
+        if computer_board.shots_fired + player_board.shots_fired != shots_before:
+            if game_replay is not None:
+                game_replay.flush()  # so the replay holds every shot the save counts
+            autosave.write(savegame.capture(player_name, difficulty, seed, player_board, computer_board,
+                                            player_turn, computer_ai, rng, fleet, game_replay))
+            frames.mark_dirty(message_rect())
+            for board, view in ((computer_board, computer_view), (player_board, player_view)):
+                if board.last_shot:
+                    frames.mark_dirty(view.cell_rect(*board.last_shot).clip(view.rect))
+def handle_ai_turn(player_board, computer_ai, player_view=None):
+    """Computer turn for the hard and expert difficulties, driven by an ai.py strategy."""
+    row, col = computer_ai.choose_target()
+    result, sunk_ship = handle_shooting(row, col, player_board, shooter="Computer", view=player_view)
+    computer_ai.observe(row, col, result, sunk_ship)
+    return True
 def show_thinking_message():
-    font = pygame.font.SysFont('Arial', 40)
-    thinking_message = font.render("Computer thinking...", True, WHITE)
-    screen.blit(scaled_image, (0, 0))  # Clear screen
+    thinking_message = fonts.render_text('Arial', 40, "Computer thinking...", WHITE)
+    screen.blit(background_image(), (0, 0))  # Clear screen
     screen.blit(thinking_message, (width // 2 - thinking_message.get_width() // 2, 10))
     pygame.display.update()
     time.sleep(2)  # Pause for 2 seconds
+    frames.mark_all()
 
 
 
@@ -228,38 +217,57 @@ def show_thinking_message():
 def singleplayer_setup():
     running = True
 
-    ships = [
-        {"name": "Submarine", "rect": pygame.Rect(600, 100, cells_size * 2, cells_size), "horizontal": True, "hits": 0,
-         "size": 2, "status": "alive"},
-        {"name": "Cruiser", "rect": pygame.Rect(600, 200, cells_size * 3, cells_size), "horizontal": True, "hits": 0,
-         "size": 3, "status": "alive"},
-        {"name": "Battleship", "rect": pygame.Rect(600, 300, cells_size * 4, cells_size), "horizontal": True, "hits": 0,
-         "size": 4, "status": "alive"},
-        {"name": "Destroyer", "rect": pygame.Rect(600, 400, cells_size * 4, cells_size), "horizontal": True, "hits": 0,
-         "size": 4, "status": "alive"},
-        {"name": "Air Carrier", "rect": pygame.Rect(600, 500, cells_size * 5, cells_size), "horizontal": True,
-         "hits": 0, "size": 5, "status": "alive"}
-    ]
+    ships = dock_ships()
 
     selected_ship = None
     all_ships_placed = False
-    start_button = None
+    start_button = pygame.Rect(width - 200, height - 100, 150, 50)
 
+    def build_background():
+        background = background_image().copy()
+        setup_text = fonts.render_text('Arial', 50, "Player : Pick Positions", WHITE)
+        setup_rect = setup_text.get_rect(center=(width // 2, 50))
+        background.blit(setup_text, setup_rect)
+        background.blit(grid_layer(50, 100, cells_size, rows, cols), (20, 70))
+        return background
+
+    def draw():
+        screen.blit(layers.get("setup", (cells_size, rows, cols, screen.get_size()), build_background), (0, 0))
+        for ship in ships:
+            pygame.draw.rect(screen, GREY, ship["rect"])
+            if cells_size >= SHIP_LABEL_MIN_CELL or grid_placement(ship) is None:
+                label = fonts.render_text('Arial', 20, ship["name"], WHITE)
+                screen.blit(label, (ship["rect"].x, ship["rect"].y - 20))
+        if all_ships_placed:
+            draw_button(f"Start", GREY, start_button)
+
+    frames.mark_all()
     while running:
-        for event in pygame.event.get():
+        frames.render(draw)
+        for event in frames.wait_events():
 
             if event.type == pygame.MOUSEBUTTONDOWN:
-                if all_ships_placed and start_button and start_button.collidepoint(event.pos):
+                if all_ships_placed and start_button.collidepoint(event.pos):
                     return ships  # Return the player's ship positions
                 for ship in ships:
                     if ship["rect"].collidepoint(event.pos):
                         ship["dragging"] = True
                         selected_ship = ship
+                        frames.mark_dirty(ship_area(ship))
+                        ship["rect"].center = event.pos
+                        frames.mark_dirty(ship_area(ship))
                         break
 
+            elif event.type == pygame.MOUSEMOTION:
+                if selected_ship and selected_ship["dragging"]:
+                    frames.mark_dirty(ship_area(selected_ship))
+                    selected_ship["rect"].center = event.pos
+                    frames.mark_dirty(ship_area(selected_ship))
+
             elif event.type == pygame.MOUSEBUTTONUP:
                 if selected_ship:
                     selected_ship["dragging"] = False
+                    frames.mark_dirty(ship_area(selected_ship))
                     # Snap to grid with boundary checks
                     snapped_x, snapped_y = snap_to_grid(
                         selected_ship["rect"].x,
@@ -275,37 +283,57 @@ def singleplayer_setup():
                     # Set snapped position
                     selected_ship["rect"].x, selected_ship["rect"].y = snapped_x, snapped_y
                     # Check for overlap and resolve it
-                    if any(ship != selected_ship and selected_ship["rect"].colliderect(ship["rect"]) for ship in ships):
-                        nearest_x, nearest_y = find_nearest_valid_position(selected_ship, ships)
-                        selected_ship["rect"].x, selected_ship["rect"].y = nearest_x, nearest_y
+                    settle_ship(selected_ship, ships)
+                    frames.mark_dirty(ship_area(selected_ship))
 
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_r and selected_ship:
+                    frames.mark_dirty(ship_area(selected_ship))
+                    on_grid = grid_placement(selected_ship) is not None
                     rotate_ship(selected_ship)
-        if selected_ship and selected_ship["dragging"]:
-            mouse_x, mouse_y = pygame.mouse.get_pos()
-            selected_ship["rect"].center = (mouse_x, mouse_y)
-        all_ships_placed = all(
-            50 <= ship["rect"].x < 50 + cols * cells_size and
-            100 <= ship["rect"].y < 100 + rows * cells_size
-            for ship in ships
-        )
-
-        screen.blit(scaled_image, (0, 0))
-        setup_font = pygame.font.SysFont('Arial', 50)
-        setup_text = setup_font.render(f"Player : Pick Positions", True, WHITE)
-        setup_rect = setup_text.get_rect(center=(width // 2, 50))
-        screen.blit(setup_text, setup_rect)
-        draw_grid_with_labels(50, 100, cells_size, rows, cols)
-        for ship in ships:
-            pygame.draw.rect(screen, GREY, ship["rect"])
-            font = pygame.font.SysFont('Arial', 20)
-            label = font.render(ship["name"], True, WHITE)
-            screen.blit(label, (ship["rect"].x, ship["rect"].y - 20))
-        if all_ships_placed:
-            start_button = pygame.Rect(width - 200, height - 100, 150, 50)
-            draw_button(f"Start", GREY, start_button)
-        pygame.display.update()
+                    # A ship turned on the grid may now run off it or into another ship
+                    if on_grid and not selected_ship["dragging"] and not settle_ship(selected_ship, ships):
+                        rotate_ship(selected_ship)  # no room for it the other way round
+                    frames.mark_dirty(ship_area(selected_ship))
+                elif event.key == pygame.K_a:  # Place the whole fleet at random
+                    place_at_random(ships)
+                    selected_ship = None
+                    frames.mark_all()
+
+        placed = fleet_placed(ships)
+        if placed != all_ships_placed:
+            all_ships_placed = placed
+            frames.mark_dirty(start_button)
+def dock_ships():
+    """Builds the player's ships lined up in the dock right of the setup grid.
+
+    Long fleets fill several columns; ships that do not fit in the dock at all
+    start on the grid at random, and can still be dragged from there.
+    """
+    spacing = max(cells_size + 25, min(100, (height - 100) // len(fleet)))
+    per_column = max(1, (height - 100) // spacing)
+    column_width = max(max(size for _, size in fleet) * cells_size, 150) + 10
+    ships = []
+    for i, (name, size) in enumerate(fleet):
+        column, slot = divmod(i, per_column)
+        ships.append({"name": name, "rect": pygame.Rect(600 + column * column_width, 100 + slot * spacing,
+                                                       cells_size * size, cells_size),
+                      "horizontal": True, "hits": 0, "size": size, "status": "alive"})
+    overflow = [ship for ship in ships if ship["rect"].right > width]
+    if overflow:
+        place_at_random(overflow)
+    return ships
+def place_at_random(ships):
+    """Moves the given ships onto the setup grid at random, without overlaps."""
+    layout = placement.sample_fleet(rows, cols, [ship["size"] for ship in ships])
+    for ship, spot in zip(ships, layout):
+        if ship["horizontal"] != spot.horizontal:
+            rotate_ship(ship)
+        ship["row"], ship["col"] = spot.row, spot.col
+        ship["rect"] = ship_rect(ship, 50, 100)
+def ship_area(ship):
+    """Screen region covered by a ship and the name label above it."""
+    return ship["rect"].union(pygame.Rect(ship["rect"].x, ship["rect"].y - 20, 150, 20))
 def rotate_ship(ship):
     # Rotate the ship between horizontal and vertical
     if ship["horizontal"]:
@@ -313,256 +341,218 @@ def rotate_ship(ship):
     else:
         ship["rect"].width, ship["rect"].height = ship["rect"].height, ship["rect"].width
     ship["horizontal"] = not ship["horizontal"]
-def generate_computer_ships():
-    ships = [
-        {"name": "Submarine", "size": 2},
-        {"name": "Cruiser", "size": 3},
-        {"name": "Battleship", "size": 4},
-        {"name": "Destroyer", "size": 4},
-        {"name": "Air Carrier", "size": 5},
-    ]
-    placed_ships = []
-    grid_start_x = width - cols * cells_size - 50
-    grid_start_y = 100
-    grid_width = cols * cells_size
-    grid_height = rows * cells_size
-
-    for ship in ships:
-        placed = False
-        while not placed:
-            orientation = random.choice(["horizontal", "vertical"])
-            if orientation == "horizontal":
-                start_col = random.randint(0, cols - ship["size"])
-                start_row = random.randint(0, rows - 1)
-                start_x = start_col * cells_size + grid_start_x
-                start_y = start_row * cells_size + grid_start_y
-                rect = pygame.Rect(start_x, start_y, ship["size"] * cells_size, cells_size)
-            else:
-                start_col = random.randint(0, cols - 1)
-                start_row = random.randint(0, rows - ship["size"])
-                start_x = start_col * cells_size + grid_start_x
-                start_y = start_row * cells_size + grid_start_y
-                rect = pygame.Rect(start_x, start_y, cells_size, ship["size"] * cells_size)
-
-            snapped_x, snapped_y = snap_to_grid(
-                rect.x, rect.y, grid_start_x, grid_start_y, cells_size, grid_width, grid_height, rect.width, rect.height
-            )
-            rect.x, rect.y = snapped_x, snapped_y
-
-            # Ensure no overlap
-            if not any(r["rect"].colliderect(rect) for r in placed_ships):
-                placed_ships.append({
-                    "name": ship["name"],
-                    "rect": rect,
-                    "horizontal": orientation == "horizontal",
-                    "hits": 0,
-                    "size": ship["size"],
-                    "status": "alive"  # Add the status field
-                })
-                placed = True
-    return placed_ships
+def generate_computer_ships(rng=random):
+    return engine.random_fleet(rows, cols, fleet, rng)
+def ship_rect(ship, grid_start_x, grid_start_y):
+    """Builds the on-screen rect for a ship placed on the grid at the given origin."""
+    length = ship["size"] * cells_size
+    return pygame.Rect(
+        grid_start_x + ship["col"] * cells_size,
+        grid_start_y + ship["row"] * cells_size,
+        length if ship["horizontal"] else cells_size,
+        cells_size if ship["horizontal"] else length,
+    )
+def attach_cells(ship, grid_start_x, grid_start_y):
+    """Fills in a dragged ship's grid position from its rect."""
+    ship["row"] = (ship["rect"].y - grid_start_y) // cells_size
+    ship["col"] = (ship["rect"].x - grid_start_x) // cells_size
+    ship["cells"] = engine.ship_cells(ship["row"], ship["col"], ship["size"], ship["horizontal"])
+    return ship
 
 
 # Turns-ammar
-def handle_player_turn(computer_ships, computer_grid_status):
-    for event in pygame.event.get():
+def handle_player_turn(computer_board, computer_view, player_view=None):
+    for event in frames.wait_events():
         if event.type == pygame.QUIT:
-            pygame.quit()
-            exit()
+            quit_game()
         elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-            mouse_x, mouse_y = event.pos
-            grid_start_x = width - cols * cells_size - 50
-            grid_start_y = 100
-
-            if grid_start_x <= mouse_x < grid_start_x + cols * cells_size and grid_start_y <= mouse_y < grid_start_y + rows * cells_size:
-                col = (mouse_x - grid_start_x) // cells_size
-                row = (mouse_y - grid_start_y) // cells_size
-
-                if computer_grid_status[row][col] is None:
-                    hit = False
-                    for ship in computer_ships:
-                        if ship["rect"].collidepoint(
-                                grid_start_x + col * cells_size + cells_size // 2,
-                                grid_start_y + row * cells_size + cells_size // 2
-                        ):
-                            computer_grid_status[row][col] = 'hit'
-                            log_action("Player", "Attack", (row, col), "Hit")
-                            hit = True
-                            break
-                    if not hit:
-                        computer_grid_status[row][col] = 'miss'
-                        log_action("Player", "Attack", (row, col), "Miss")
-
-                    color = RED if computer_grid_status[row][col] == 'hit' else PURPLE
-                    pygame.draw.rect(screen, color, (
-                        grid_start_x + col * cells_size, grid_start_y + row * cells_size, cells_size, cells_size
-                    ))
-                    return False  # Switch to computer's turn
+            cell = computer_view.cell_at(event.pos)
+            if cell and computer_board.is_untouched(*cell):
+                handle_shooting(*cell, computer_board, shooter="Player", view=computer_view)
+                return False  # Switch to computer's turn
+        else:
+            # Mouse wheel zooms a board, dragging with the right or middle button pans it
+            for view in (computer_view, player_view):
+                if view and view.handle_event(event):
+                    frames.mark_dirty(view.area())
     return True  # Stay on player's turn
-def handle_computer_turn(player_grid_status, player_ships):
+def handle_computer_turn(player_board, computer_ai, player_view=None):
     show_thinking_message()
-    while True:
-        row = random.randint(0, rows - 1)
-        col = random.randint(0, cols - 1)
-        if player_grid_status[row][col] is None:  # If untouched
-            handle_shooting(row, col, player_ships, player_grid_status, 50, 100,shooter = "computer")  # Pass player_ships
-            break
-
-    return True  # Switch back to player's turn
+    return handle_ai_turn(player_board, computer_ai, player_view)  # Switch back to player's turn
 
 
 # The shooting and the hitting
-def handle_shooting(row, col, ships, target_grid, grid_start_x, grid_start_y, shooter): #maro
-    # Check if the shot hits a ship
-    for ship in ships:
-        if ship["rect"].collidepoint(
-                grid_start_x + col * cells_size + cells_size // 2,
-                grid_start_y + row * cells_size + cells_size // 2
-        ):
-            target_grid[row][col] = "hit"
-            log_action("Player", "Attack", (row, col), "Hit")
-            ship["hits"] += 1
-            sound_hit.play()
-            if ship["hits"] >= ship["size"]:  # Check if the ship is sunk
-                ship["status"] = "sunk"
-                print(f"{ship['name']} is sunk!")  # Debug message
-                sound_destroyed.play()
-            return True  # Hit
-
-    # If no ship is hit, mark as miss
-    target_grid[row][col] = "miss"
-    log_action(f"{shooter}", "Attack", (row, col), "Miss")
-    sound_turnchange.play()
-    return False #miss
+def handle_shooting(row, col, board, shooter, view=None): #maro
+    """Resolves a shot on the board, stamps it on the board's view, then logs it and plays its sounds."""
+    result, sunk_ship = board.fire(row, col)
+    if view is not None:
+        view.stamp(row, col, SHOT_COLORS[result])
+    announce_shot(shooter, row, col, result, sunk_ship)
+    return result, sunk_ship
+def announce_shot(shooter, row, col, result, sunk_ship=None):
+    log_action(shooter, row, col, result, sunk_ship)
+    if result == "hit":
+        game_audio.play("hit")
+        if sunk_ship:  # Check if the ship is sunk
+            print(f"{sunk_ship['name']} is sunk!")  # Debug message
+            game_audio.play("sunk")
+    else:
+        game_audio.play("turn")
 def all_ships_sunk(ships):
     return all(ship["status"] == "sunk" for ship in ships)
 
 
 # Files-maro
-def input_username_screen():
-
+def input_username_screen(started=None):
+    """Asks for the player's name; with `started` (a perf_counter() time) it prints how soon its first frame showed."""
     input_running = True
     username = ""
 
-    instruction_text = font.render("Enter Username:", True, GREEN)
+    # pygame's own font: a system font would make the first frame wait for the system font list to be scanned
+    instruction_text = fonts.render_text(None, 50, "Enter Username:", GREEN)
+    username_area = pygame.Rect(0, height // 2 - 140, width, 80)
 
+    def draw():
+        # This is the first screen, so it doesn't wait for the background: it is black until the image is loaded
+        image = game_assets.peek(BACKGROUND_IMAGE, (width, height))
+        if image:
+            screen.blit(image, (0, 0))
+        else:
+            screen.fill(BLACK)
+        instruction_rect = instruction_text.get_rect(center=(width // 2, height // 2 - 200))
+        screen.blit(instruction_text, instruction_rect)
+
+        # Draw typed username
+        username_surface = fonts.render_text(None, 50, username, BLACK)
+        username_rect = username_surface.get_rect(center=(width // 2, height // 2-100))
+        screen.blit(username_surface, username_rect)
+
+    frames.mark_all()
+    frames.render(draw)
+    if started is not None:
+        print(f"First frame after {(time.perf_counter() - started) * 1000:.0f} ms")
     while input_running:
-        for event in pygame.event.get():
+        frames.render(draw)
+        for event in frames.wait_events():
             if event.type == pygame.QUIT:
-                pygame.quit()
-                exit()
+                quit_game()
+            elif event.type == assets.LOADED:
+                if event.name == ICON_IMAGE:
+                    pygame.display.set_icon(game_assets.get(ICON_IMAGE))
+                elif event.name == BACKGROUND_IMAGE:
+                    frames.mark_all()
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_RETURN:  # Finish input on Enter
                     if username.strip():
                         input_running = False
                 elif event.key == pygame.K_BACKSPACE:  # Remove last character
                     username = username[:-1]
-                else:
+                elif len(username) < MAX_NAME_LENGTH:
                     username += event.unicode  # Add typed character
-
-        screen.blit(scaled_image, (0, 0))
-        instruction_rect = instruction_text.get_rect(center=(width // 2, height // 2 - 200))
-        screen.blit(instruction_text, instruction_rect)
-
-        # Draw typed username
-        username_surface = font.render(username, True, BLACK)
-        username_rect = username_surface.get_rect(center=(width // 2, height // 2-100))
-        screen.blit(username_surface, username_rect)
-
-        pygame.display.update()
+                frames.mark_dirty(username_area)
 
     return username
 def save_game(player_name, game_state):
-
-    with open(f"{player_name}.txt", "w") as file:
-        json.dump(game_state, file)
+    """Saves a savegame.State under the player's name."""
+    savegame.save(savegame.save_path(player_name), game_state)
 def load_game(player_name):
-
-    file_name = f"{player_name}.txt"
-    if os.path.exists(file_name):
-        with open(file_name, "r") as file:
-            return json.load(file)
-    return None
-def log_action(actor, action, position, result=None):
-    log_entry = {
-        "actor": actor,
-        "action": action,
-        "position": position,
-        "result": result
-    }
-    movement_logs.append(log_entry)
-
-    # Format log entry for writing
-    log_text = f"{actor} performed {action} at position {position}"
-    if result:
-        log_text += f" with result: {result}"
-    log_text += "\n"
-
-    log_file.write(log_text)
-    log_file.flush()  # Ensure it's written immediately
-    print(log_text, end="")
+    """The player's saved match as a savegame.State, or None if there is none or it can't be played on."""
+    try:
+        saved = savegame.load(savegame.save_path(player_name))
+        if saved:
+            savegame.resume(saved)  # an AI state or fleet that doesn't fit fails here rather than mid-menu
+        return saved
+    except (ValueError, KeyError, TypeError) as error:
+        print(f"Ignoring the saved game: {error}")
+        return None
+def log_action(actor, row, col, result, sunk_ship=None):
+    """Appends an attack to the binary match log, where writing happens off the game thread, and to the replay."""
+    match_log.write(actor, row, col, result, sunk_ship["name"] if sunk_ship else None)
+    if game_replay is not None:
+        game_replay.shot(actor, row, col)
+def dated_filename(prefix, suffix):
+    """A new file name stamped with the current second, e.g. Game_Log_2024-12-20_16-17-44.bslog; _2, _3... if taken."""
+    stem = datetime.datetime.now().strftime(f"{prefix}_%Y-%m-%d_%H-%M-%S")
+    name, number = stem + suffix, 1
+    while os.path.exists(name):
+        number += 1
+        name = f"{stem}_{number}{suffix}"
+    return name
 def finalize_logs():
-    log_file.write("\n--- Full Movement Logs ---\n")
-    for log in movement_logs:
-        log_file.write(f"{log}\n")
-    log_file.close()
-    print(f"Logs saved to {log_filename}")
+    """Closes the replay, waits for the log writer to drain the queue and closes the log; later calls do nothing."""
+    global game_replay
+    if game_replay is not None:
+        game_replay.close()
+        print(f"Replay saved to {game_replay.path} (python replay_viewer.py {game_replay.path} plays it)")
+        game_replay = None
+    if match_log is None or match_log.closed:
+        return
+    match_log.close()
+    print(f"Logs saved to {log_filename} (python matchlog.py {log_filename} converts it to text)")
+def quit_game():
+    """Drains the match log, then closes the window and exits."""
+    finalize_logs()
+    pygame.quit()
+    exit()
 
 # Grid functions-hassan
-def draw_grid_status(grid_status, grid_start_x, grid_start_y):
-    for row in range(rows):
-        for col in range(cols):
-            cell_status = grid_status[row][col]
-            if cell_status == 'hit':
-                color = RED  # Orange for hit
-            elif cell_status == 'miss':
-                color = PURPLE  # Purple for miss
-            else:
-                continue
-            pygame.draw.rect(screen, color, (
-                grid_start_x + col * cells_size, grid_start_y + row * cells_size, cells_size, cells_size
-            ))
-def draw_game_state(player_ships, computer_grid_status, player_grid_status, player_turn, computer_ships=None,
-                    debug_mode=False):
-    draw_grid_with_labels(50, 100, cells_size, rows, cols)  # Player grid
-    draw_grid_with_labels(width - cols * cells_size - 50, 100, cells_size, rows, cols)  # Computer grid
-
-    # Draw player ships
-    for ship in player_ships:
-        pygame.draw.rect(screen, GREY, ship["rect"])
-
-    # Draw computer ships if debug mode is enabled
-    if debug_mode and computer_ships:
-        for ship in computer_ships:
-            pygame.draw.rect(screen, GREY, ship["rect"])
-
-    # Draw grid statuses
-    draw_grid_status(computer_grid_status, width - cols * cells_size - 50, 100)  # Computer grid
-    draw_grid_status(player_grid_status, 50, 100)  # Player grid
+def message_rect():
+    """Banner at the top of the screen that holds the turn message."""
+    return pygame.Rect(0, 0, width, 60)
+def board_view(left):
+    """A zoomable view of one board on the battle screen, against the left or the right edge."""
+    box = pygame.Rect(0, 100, (width - 140) // 2, height - 120)
+    view = renderer.BoardView(rows, cols, box, renderer.zoom_levels(rows, cols, box.width, box.height, MAX_CELL_SIZE))
+    view.rect.x = 50 if left else width - 50 - view.rect.width
+    return view
+def draw_game_state(player_view, computer_view, player_turn):
+    screen.blit(background_image(), (0, 0))
+
+    # Grids with the ships and the hits and misses stamped by handle_shooting; only the cells in view are drawn
+    player_view.draw(screen)
+    computer_view.draw(screen)
 
     # Draw message at the top of the screen
     message = "Player 1: Shoot one of the grid blocks!" if player_turn else "Computer's turn!"
-    font = pygame.font.SysFont('Arial', 40)
-    message_surface = font.render(message, True, WHITE)
+    message_surface = fonts.render_text('Arial', 40, message, WHITE)
     screen.blit(message_surface, (width // 2 - message_surface.get_width() // 2, 10))
-def draw_grid_with_labels(x_start, y_start, cell_size, rows, cols):
-    # Draw the grid
-    for row in range(rows):
-        for col in range(cols):
-            x = x_start + col * cell_size
-            y = y_start + row * cell_size
-            pygame.draw.rect(screen, WHITE, pygame.Rect(x, y, cell_size, cell_size), 1)
-
-    # Draw row labels (A-J)
-    font = pygame.font.SysFont('Arial', 30)
-    for i in range(rows):
-        label = font.render(chr(65 + i), True, WHITE)  # A=65 in ASCII
-        screen.blit(label, (x_start - 30, y_start + i * cell_size + 10))
-
-    # Draw column labels (1-10)
-    for j in range(cols):
-        label = font.render(str(j + 1), True, WHITE)
-        screen.blit(label, (x_start + j * cell_size + 15, y_start - 30))
+def grid_layer(x_start, y_start, cell_size, rows, cols):
+    """Transparent surface with a grid and its labels, drawn once per size; blit it at (x_start - 30, y_start - 30)."""
+    def build():
+        layer = pygame.Surface((cols * cell_size + 60, rows * cell_size + 60), pygame.SRCALPHA)
+
+        # Draw the grid; on big boards with tiny cells only every few lines are drawn
+        line_step = renderer.nice_step(-(-6 // cell_size))
+        if line_step == 1:
+            for row in range(rows):
+                for col in range(cols):
+                    x = 30 + col * cell_size
+                    y = 30 + row * cell_size
+                    pygame.draw.rect(layer, WHITE, pygame.Rect(x, y, cell_size, cell_size), 1)
+        else:
+            for row in range(0, rows + 1, line_step):
+                pygame.draw.line(layer, WHITE, (30, 30 + row * cell_size), (30 + cols * cell_size, 30 + row * cell_size))
+            for col in range(0, cols + 1, line_step):
+                pygame.draw.line(layer, WHITE, (30 + col * cell_size, 30), (30 + col * cell_size, 30 + rows * cell_size))
+            pygame.draw.rect(layer, WHITE, pygame.Rect(30, 30, cols * cell_size + 1, rows * cell_size + 1), 1)
+
+        # Label every row and column, or every few once the cells get smaller than the text
+        label_size = min(30, max(10, cell_size))
+        row_labels = [fonts.render_text('Arial', label_size, engine.row_label(i), WHITE) for i in range(rows)]
+        col_labels = [fonts.render_text('Arial', label_size, str(j + 1), WHITE) for j in range(cols)]
+        row_step = renderer.nice_step(-(-max(label.get_height() for label in row_labels) // cell_size))
+        col_step = renderer.nice_step(-(-(max(label.get_width() for label in col_labels) + 4) // cell_size))
+
+        # Draw row labels (A, B, ... Z, AA, ...)
+        for i in range(0, rows, row_step):
+            layer.blit(row_labels[i], row_labels[i].get_rect(midleft=(0, 30 + (i + 0.5) * cell_size)))
+
+        # Draw column labels (1, 2, ... or 5, 10, ...)
+        for j in range(col_step - 1, cols, col_step):
+            layer.blit(col_labels[j], col_labels[j].get_rect(center=(30 + (j + 0.5) * cell_size, 15)))
+        return layer
+
+    return layers.get(("grid", x_start, y_start), (cell_size, rows, cols), build)
 def snap_to_grid(x, y, grid_start_x, grid_start_y, cell_size, grid_width, grid_height, ship_width, ship_height):
     # Snap the ship to the nearest valid grid cell
     snapped_x = round((x - grid_start_x) / cell_size) * cell_size + grid_start_x
@@ -579,37 +569,58 @@ def snap_to_grid(x, y, grid_start_x, grid_start_y, cell_size, grid_width, grid_h
         snapped_y = grid_start_y
 
     return snapped_x, snapped_y
+def grid_placement(ship, grid_start_x=50, grid_start_y=100):
+    """Looks up the placement a ship's rect covers on the grid, or None if it is off the grid."""
+    col, col_offset = divmod(ship["rect"].x - grid_start_x, cells_size)
+    row, row_offset = divmod(ship["rect"].y - grid_start_y, cells_size)
+    if col_offset or row_offset:
+        return None
+    return placement.placement_index(rows, cols, ship["size"]).at(row, col, ship["horizontal"])
+def fleet_mask(ships, skip=None):
+    """Bitmask of the cells taken by every ship already on the player grid, except `skip`."""
+    mask = 0
+    for ship in ships:
+        spot = grid_placement(ship) if ship is not skip else None
+        if spot:
+            mask |= spot.mask
+    return mask
+def fleet_placed(ships):
+    """True if every ship sits on the player grid without overlapping another."""
+    taken = 0
+    for ship in ships:
+        spot = grid_placement(ship)
+        if spot is None or spot.mask & taken:
+            return False
+        taken |= spot.mask
+    return True
+def settle_ship(ship, ships):
+    """Moves a ship that is off the grid or on another ship to the nearest free spot; False if there is none."""
+    spot = grid_placement(ship)
+    if spot is None or spot.mask & fleet_mask(ships, skip=ship):
+        nearest = find_nearest_valid_position(ship, ships)
+        if nearest is None:
+            return False
+        ship["rect"].x, ship["rect"].y = nearest
+    return True
 def find_nearest_valid_position(selected_ship, ships):
-    valid_positions = []
-
-    for row in range(rows):
-        for col in range(cols):
-            grid_x = 50 + col * cells_size
-            grid_y = 100 + row * cells_size
-
-            # Ensure the ship fits within the grid boundaries
-            if grid_x + selected_ship["rect"].width <= 50 + cols * cells_size and \
-                    grid_y + selected_ship["rect"].height <= 100 + rows * cells_size:
-
-                # Create a temp rect for collision checking
-                temp_rect = pygame.Rect(grid_x, grid_y, selected_ship["rect"].width, selected_ship["rect"].height)
-
-                # Ensure no overlap with other ships
-                if not any(temp_rect.colliderect(ship["rect"]) for ship in ships if ship != selected_ship):
-                    valid_positions.append((grid_x, grid_y))
-
-    # Find the closest valid posi]tion
+    taken = fleet_mask(ships, skip=selected_ship)
+    candidates = placement.placement_index(rows, cols, selected_ship["size"]).oriented(selected_ship["horizontal"])
+    valid_positions = [(50 + spot.col * cells_size, 100 + spot.row * cells_size)
+                       for spot in candidates if not spot.mask & taken]
+    if not valid_positions:
+        return None
+
+    # Find the closest valid position
     current_center = selected_ship["rect"].center
     nearest_position = min(valid_positions,
-                           key=lambda pos: (pos[0] - current_center[0]) * 2 + (pos[1] - current_center[1]) * 2)
+                           key=lambda pos: (pos[0] - current_center[0]) ** 2 + (pos[1] - current_center[1]) ** 2)
     return nearest_position
 
 
 # Menu functions
 def draw_button(text, color, rect):
     pygame.draw.rect(screen, color, rect)
-    font = pygame.font.SysFont("Arial", 40)
-    text_surface = font.render(text, True, (0, 0, 0))
+    text_surface = fonts.render_text("Arial", 40, text, (0, 0, 0))
     screen.blit(text_surface, (rect.x + 10, rect.y + 10))
 def show_pause_menu(player_name, game_state):
     paused = True
@@ -626,45 +637,50 @@ def show_pause_menu(player_name, game_state):
                 if event.key == pygame.K_s:  # Save and exit
                     save_game(player_name, game_state)
                     print("Game saved. Exiting...")
-                    pygame.quit()
-                    exit()
+                    quit_game()
                 elif event.key == pygame.K_w:  # Save without exiting
                     save_game(player_name, game_state)
                     paused = False
                 elif event.key == pygame.K_q:  # Quit without saving
                     print("Exiting without saving...")
-                    pygame.quit()
-                    exit()
+                    quit_game()
                 elif event.key == pygame.K_ESCAPE:  # Resume
                     paused = False
 
         screen.fill(BLACK)
         y_pos = 200
         for option in options:
-            text = font.render(option, True, WHITE)
+            text = fonts.render_text('Arial', 50, option, WHITE)
             screen.blit(text, (width // 2 - text.get_width() // 2, y_pos))
             y_pos += 50
 
         pygame.display.update()
 def main_menu():
     menu_running = True
-    while menu_running:
+
+    # Define buttons
+    start_button = pygame.Rect(width // 2 - 80, 200, 150, 50)
+    credits_button = pygame.Rect(width // 2 - 80, 300, 150, 50)
+    quit_button = pygame.Rect(width // 2 - 80, 400, 150, 50)
+    title_text = fonts.render_text('Comic Sans MS', 70, "BattleShips", WHITE)
+    title_rect = title_text.get_rect(center=(width // 2, 100))
+
+    def draw():
         # Draw the background and title
-        screen.blit(scaled_image, (0, 0))
+        screen.blit(background_image(), (0, 0))
         screen.blit(title_text, title_rect)
 
-        # Define buttons
-        start_button = pygame.Rect(width // 2 - 80, 200, 150, 50)
-        credits_button = pygame.Rect(width // 2 - 80, 300, 150, 50)
-        quit_button = pygame.Rect(width // 2 - 80, 400, 150, 50)
-
         # Draw buttons
         draw_button("Start", WHITE, start_button)
         draw_button("Credits", WHITE, credits_button)
         draw_button("Quit", WHITE, quit_button)
 
+    frames.mark_all()
+    while menu_running:
+        frames.render(draw)
+
         # Handle events
-        for event in pygame.event.get():
+        for event in frames.wait_events():
             if event.type == pygame.QUIT:
                 menu_running = False
                 return 'quit'
@@ -673,29 +689,25 @@ def main_menu():
                     difficulty = select_difficulty()
                     if difficulty:
                         return 'start', difficulty
+                    frames.mark_all()  # Back from the difficulty screen
                 elif credits_button.collidepoint(event.pos):
                     return 'credits'
                 elif quit_button.collidepoint(event.pos):
                     return 'quit'
-
-        pygame.display.update()
 def show_pause_menu():
     paused = True
-    font = pygame.font.SysFont('Arial', 30)
-    resume_text = font.render("Game Paused - Press ESC to Resume or Q to Quit", True, WHITE)
+    resume_text = fonts.render_text('Arial', 30, "Game Paused - Press ESC to Resume or Q to Quit", WHITE)
     resume_rect = resume_text.get_rect(center=(width // 2, height // 2))
 
     while paused:
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
-                pygame.quit()
-                exit()
+                quit_game()
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:  # Resume on ESC
                     paused = False
                 elif event.key == pygame.K_q:  # Quit on Q
-                    pygame.quit()
-                    exit()
+                    quit_game()
 
         # Display the pause menu
         screen.fill(BLACK)
@@ -705,10 +717,6 @@ def credit_menu():
     # Flag to keep the credits menu running
     credits_running = True
 
-    # Font setup
-    title_font = pygame.font.SysFont('Arial', 50)
-    name_font = pygame.font.SysFont('Arial', 30)
-
     # Credits data
     credits = [
         {"name": "Youssef ", "role": "Project Manager & Game modes"},
@@ -718,20 +726,12 @@ def credit_menu():
         {"name": "Ammar", "role": "Audio & Sound Manager"},
     ]
 
-    while credits_running:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                exit()
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_ESCAPE:  # Go back to the main menu on ESC
-                    credits_running = False
-
+    def draw():
         # Draw the background
-        screen.blit(scaled_image, (0, 0))
+        screen.blit(background_image(), (0, 0))
 
         # Draw title
-        title_text = title_font.render("Credits", True, WHITE)
+        title_text = fonts.render_text('Arial', 50, "Credits", WHITE)
         title_rect = title_text.get_rect(center=(width // 2, 100))
         screen.blit(title_text, title_rect)
 
@@ -739,8 +739,8 @@ def credit_menu():
         start_y = 200  # Starting y-coordinate for names
         spacing = 60  # Spacing between each name and role
         for credit in credits:
-            name_text = name_font.render(f"{credit['name']}", True, BLACK)
-            role_text = name_font.render(f"{credit['role']}", True, (191, 64, 191))
+            name_text = fonts.render_text('Arial', 30, credit['name'], BLACK)
+            role_text = fonts.render_text('Arial', 30, credit['role'], (191, 64, 191))
 
             name_rect = name_text.get_rect(center=(width // 2, start_y))
             role_rect = role_text.get_rect(center=(width // 2, start_y + 30))
@@ -751,84 +751,116 @@ def credit_menu():
             start_y += spacing
 
         # Instruction to go back
-        back_text = name_font.render("Press ESC to return to the Main Menu", True,BLACK)
+        back_text = fonts.render_text('Arial', 30, "Press ESC to return to the Main Menu", BLACK)
         back_rect = back_text.get_rect(center=(width // 2, height - 50))
         screen.blit(back_text, back_rect)
 
-        pygame.display.update()
+    frames.mark_all()
+    while credits_running:
+        frames.render(draw)
+        for event in frames.wait_events():
+            if event.type == pygame.QUIT:
+                quit_game()
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:  # Go back to the main menu on ESC
+                    credits_running = False
 def display_game_over(message):
-    font = pygame.font.SysFont('Arial', 80)
-    text = font.render(message, True, RED)
-    screen.blit(scaled_image, (0, 0))
+    text = fonts.render_text('Arial', 80, message, RED)
+    screen.blit(background_image(), (0, 0))
     screen.blit(text, text.get_rect(center=(width // 2, height // 2)))
     pygame.display.update()
-    sound_win.play()
+    game_audio.play("win")
     finalize_logs()
     time.sleep(3)
     pygame.quit()
     exit()
 def select_difficulty():
     selecting_difficulty = True
-    while selecting_difficulty:
+
+    # Define buttons
+    easy_button = pygame.Rect(width // 2 - 80, 180, 150, 50)
+    hard_button = pygame.Rect(width // 2 - 80, 260, 150, 50)
+    expert_button = pygame.Rect(width // 2 - 80, 340, 150, 50)
+    back_button = pygame.Rect(width // 2 - 80, 420, 150, 50)
+
+    def draw():
         # Draw the background and title
-        screen.blit(scaled_image, (0, 0))
-        title_font = pygame.font.SysFont('Arial', 50)
-        title_text = title_font.render("Select Difficulty", True, WHITE)
+        screen.blit(background_image(), (0, 0))
+        title_text = fonts.render_text('Arial', 50, "Select Difficulty", WHITE)
         title_rect = title_text.get_rect(center=(width // 2, 100))
         screen.blit(title_text, title_rect)
 
-        # Define buttons
-        easy_button = pygame.Rect(width // 2 - 80, 200, 150, 50)
-        hard_button = pygame.Rect(width // 2 - 80, 300, 150, 50)
-        back_button = pygame.Rect(width // 2 - 80, 400, 150, 50)
-
         # Draw buttons
         draw_button("Easy", WHITE, easy_button)
         draw_button("Hard", WHITE, hard_button)
+        draw_button("Expert", WHITE, expert_button)
         draw_button("Back", WHITE, back_button)
 
+    frames.mark_all()
+    while selecting_difficulty:
+        frames.render(draw)
+
         # Handle events
-        for event in pygame.event.get():
+        for event in frames.wait_events():
             if event.type == pygame.QUIT:
-                pygame.quit()
-                exit()
+                quit_game()
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 if easy_button.collidepoint(event.pos):
                     return "easy"
                 elif hard_button.collidepoint(event.pos):
                     return "hard"
+                elif expert_button.collidepoint(event.pos):
+                    return "expert"
                 elif back_button.collidepoint(event.pos):
                     return None  # Go back to the main menu
 
-        pygame.display.update()
-
 
 # Main flow
-clock = pygame.time.Clock()
-running = True
-
-# Input username at the start
-player_name = input_username_screen()
-
-# Load saved game or initialize a new one
-game_state = load_game(player_name)
-if game_state:
-    choice = input("A saved game was found. Do you want to continue (yes/no)? ").strip().lower()
-    if choice != "yes":
-        game_state = {"player_grid": [[" " for _ in range(cols)] for _ in range(rows)],
-                      "computer_grid": [[" " for _ in range(cols)] for _ in range(rows)],
-                      "turn": "player"}
-
-while running:
-    clock.tick(60)
-    menu_result = main_menu()
-    if menu_result and menu_result[0] == 'start':
-        player_ships = singleplayer_setup()
-        difficulty = menu_result[1]
-        start_game_singleplayer(player_ships, difficulty=difficulty)
-    elif menu_result == 'quit':
-        running = False
-    elif menu_result == 'credits':
-        credit_menu()
-
-pygame.quit()
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Battleships against the computer.")
+    parser.add_argument("--board", default=f"{engine.ROWS}x{engine.COLS}",
+                        help=f"board size as ROWSxCOLS, up to {engine.MAX_BOARD}x{engine.MAX_BOARD}")
+    parser.add_argument("--fleet", help='ships as [NAME:]SIZE[xCOUNT], comma-separated, e.g. "5,4x2,3x3,2x4"')
+    parser.add_argument("--mute", action="store_true", help="play no sounds and leave the mixer alone")
+    parser.add_argument("--startup-time", action="store_true", help="print how long the first frame took to show")
+    args = parser.parse_args(argv)
+    started = time.perf_counter()
+    try:
+        configure_board(*engine.parse_board(args.board),
+                        engine.parse_fleet(args.fleet) if args.fleet else engine.FLEET)
+    except ValueError as error:
+        parser.error(str(error))
+
+    init_game(args.mute)
+    clock = pygame.time.Clock()
+    running = True
+
+    # Input username at the start
+    player_name = input_username_screen(started if args.startup_time else None)
+
+    # Carry on with the autosaved match, if there is one
+    saved = load_game(player_name)
+    if saved:
+        choice = input("A saved game was found. Do you want to continue (yes/no)? ").strip().lower()
+        if choice == "yes":
+            configure_board(saved.rows, saved.cols, saved.fleet)
+            start_game_singleplayer(None, saved.difficulty, player_name, saved=saved)
+
+    while running:
+        clock.tick(60)
+        menu_result = main_menu()
+        if menu_result and menu_result[0] == 'start':
+            player_ships = singleplayer_setup()
+            difficulty = menu_result[1]
+            start_game_singleplayer(player_ships, difficulty=difficulty, player_name=player_name)
+        elif menu_result == 'quit':
+            running = False
+        elif menu_result == 'credits':
+            credit_menu()
+
+    finalize_logs()
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,505 @@
+"""Computer opponents that only see the shots they have fired.
+
+An AI is asked for a target with choose_target() and told the outcome with
+observe(row, col, result, sunk_ship), where result and sunk_ship are what
+engine.Board.fire returned. save_state() returns what the AI has learned as
+plain JSON-ready data, and load_state() puts it back into a fresh AI built
+for the same board and fleet; masks are stored as hex strings.
+"""
+import atexit
+import multiprocessing
+import random
+import time
+
+import numpy as np
+
+import engine
+import heatmap
+from bitboard import cell_bit, mask_cells, mask_indices
+from placement import placement_index, sample_placement
+
+
+class RandomAI:
+    """Easy difficulty: fires at a random untouched cell."""
+
+    def __init__(self, rows=engine.ROWS, cols=engine.COLS, fleet=engine.FLEET, rng=random):
+        self.rows = rows
+        self.cols = cols
+        self.rng = rng
+        self.shot = set()
+
+    def choose_target(self):
+        if len(self.shot) >= self.rows * self.cols:
+            raise RuntimeError("No valid targets available!")
+        while True:
+            row = self.rng.randint(0, self.rows - 1)
+            col = self.rng.randint(0, self.cols - 1)
+            if (row, col) not in self.shot:  # If untouched
+                return row, col
+
+    def observe(self, row, col, result, sunk_ship=None):
+        self.shot.add((row, col))
+
+    def save_state(self):
+        return {"shot": format(sum(cell_bit(row, col, self.cols) for row, col in self.shot), "x")}
+
+    def load_state(self, state):
+        self.shot = set(mask_cells(int(state["shot"], 16), self.cols))
+
+
+class HuntTargetAI:
+    """Hard difficulty: hunts parity cells, then follows a hit along its line."""
+
+    def __init__(self, rows=engine.ROWS, cols=engine.COLS, fleet=engine.FLEET, rng=random):
+        self.rows = rows
+        self.cols = cols
+        self.rng = rng
+        self.status = [[None for _ in range(cols)] for _ in range(rows)]
+        self.sunk_cells = []
+        self.afloat_sizes = [size for _, size in fleet]
+        self.target_stack = []  # Stores cells to check around a hit
+        self.current_direction = None  # Direction of exploration after detecting a ship
+        self.current_ship_cells = []  # Tracks cells of the current target ship
+
+    def find_adjacent_cells(self, row, col):
+        """Find valid adjacent cells to target."""
+        adjacent = []
+        for dr, dc in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
+            nr, nc = row + dr, col + dc
+            if 0 <= nr < self.rows and 0 <= nc < self.cols and self.status[nr][nc] is None:
+                adjacent.append((nr, nc))
+        return adjacent
+
+    def choose_target(self):
+        """Choose the next target logically."""
+        if self.current_direction and self.current_ship_cells:
+            # Continue in the current direction
+            dr, dc = self.current_direction
+            last_row, last_col = self.current_ship_cells[-1]
+            next_row, next_col = last_row + dr, last_col + dc
+
+            if 0 <= next_row < self.rows and 0 <= next_col < self.cols and self.status[next_row][next_col] is None:
+                return next_row, next_col
+
+            # If the direction is exhausted, reset it
+            self.current_direction = None
+
+        while self.target_stack:
+            row, col = self.target_stack.pop()
+            if self.status[row][col] is None:
+                return row, col
+
+        # Parity targeting, densest cell first
+        misses, hits, sunk = heatmap.status_grids(self.status, self.sunk_cells)
+        heat = heatmap.placement_heatmap(misses, hits, sunk, self.afloat_sizes)
+        untouched = ~(misses | hits)
+        target = heatmap.best_cell(heat, untouched & heatmap.parity_mask(self.rows, self.cols))
+
+        # Absolute fallback
+        if target is None:
+            target = heatmap.best_cell(heat, untouched)
+        if target is None:
+            raise RuntimeError("No valid targets available!")
+        return target
+
+    def observe(self, row, col, result, sunk_ship=None):
+        self.status[row][col] = result
+        if result == "hit":
+            self.current_ship_cells.append((row, col))
+
+            # Add adjacent cells to the stack only for the first hit
+            if len(self.current_ship_cells) == 1:
+                self.target_stack.extend(self.find_adjacent_cells(row, col))
+
+            # Determine direction if it's the second hit
+            if len(self.current_ship_cells) > 1 and not self.current_direction:
+                first_row, first_col = self.current_ship_cells[0]
+                self.current_direction = [row - first_row, col - first_col]
+        else:
+            # If no hit, reset the direction
+            self.current_direction = None
+
+        if sunk_ship:
+            # Stop tracking the sunk ship but don't clear target_stack
+            self.current_ship_cells.clear()
+            self.current_direction = None
+            self.sunk_cells.extend(sunk_ship["cells"])
+            self.afloat_sizes.remove(sunk_ship["size"])
+
+    def save_state(self):
+        masks = {"hit": 0, "miss": 0}
+        for row, line in enumerate(self.status):
+            for col, result in enumerate(line):
+                if result:
+                    masks[result] |= cell_bit(row, col, self.cols)
+        return {"hits": format(masks["hit"], "x"), "misses": format(masks["miss"], "x"),
+                "sunk_cells": self.sunk_cells, "afloat_sizes": self.afloat_sizes,
+                "target_stack": self.target_stack, "current_direction": self.current_direction,
+                "current_ship_cells": self.current_ship_cells}
+
+    def load_state(self, state):
+        self.status = [[None for _ in range(self.cols)] for _ in range(self.rows)]
+        for key, result in (("hits", "hit"), ("misses", "miss")):
+            for row, col in mask_cells(int(state[key], 16), self.cols):
+                self.status[row][col] = result
+        self.sunk_cells = [tuple(cell) for cell in state["sunk_cells"]]
+        self.afloat_sizes = list(state["afloat_sizes"])
+        self.target_stack = [tuple(cell) for cell in state["target_stack"]]
+        self.current_direction = state["current_direction"]
+        self.current_ship_cells = [tuple(cell) for cell in state["current_ship_cells"]]
+
+
+class DensityAI:
+    """Expert difficulty: fires where the most legal ship placements overlap.
+
+    For every ship still afloat it keeps the placements that avoid all misses
+    and sunk ships, along with a per-cell count of how many of them cover each
+    cell. A miss only touches the placements through that cell, so updating
+    after a shot costs a few hundred integer operations rather than a board
+    rescan. The counts and the untouched cells are NumPy arrays, so picking
+    the densest untouched cell is one vectorized pass over the board.
+    """
+
+    # How much more a placement through an unsunk hit counts while hunting it down
+    HIT_WEIGHT = 50
+
+    def __init__(self, rows=engine.ROWS, cols=engine.COLS, fleet=engine.FLEET, rng=random):
+        self.rows = rows
+        self.cols = cols
+        self.rng = rng
+        self.afloat = {}  # ship size -> how many of that size are still afloat
+        for _, size in fleet:
+            self.afloat[size] = self.afloat.get(size, 0) + 1
+
+        self.legal = {}  # ship size -> {mask: cell indices} still possible
+        self.by_cell = {}  # ship size -> cell index -> placements through that cell
+        self.counts = np.zeros(rows * cols, dtype=np.int64)
+        for size, number in self.afloat.items():
+            index = placement_index(rows, cols, size)
+            self.legal[size] = {spot.mask: spot.indices for spot in index.all}
+            self.by_cell[size] = index.by_cell
+            self.counts += number * self._coverage(self.legal[size])
+
+        self.hit_mask = 0
+        self.miss_mask = 0
+        self.sunk_mask = 0
+        self.untouched = np.ones(rows * cols, dtype=bool)
+
+    def _coverage(self, legal):
+        """How many of the given placements cover each cell, as an array over the board."""
+        covered = [index for indices in legal.values() for index in indices]
+        return np.bincount(covered, minlength=self.rows * self.cols)
+
+    def _block(self, index):
+        """Drops every placement through a cell that can no longer hold an unsunk ship."""
+        dropped = []  # a cell index once per afloat ship of each dropped placement through it
+        for size, covering in self.by_cell.items():
+            legal = self.legal[size]
+            number = self.afloat[size]
+            for spot in covering[index]:
+                indices = legal.pop(spot.mask, None)
+                if indices is not None:
+                    dropped.extend(indices * number)
+        if dropped:
+            np.subtract.at(self.counts, dropped, 1)
+
+    def observe(self, row, col, result, sunk_ship=None):
+        index = row * self.cols + col
+        self.untouched[index] = False
+        if result == "miss":
+            self.miss_mask |= 1 << index
+            self._block(index)
+            return
+
+        self.hit_mask |= 1 << index
+        if sunk_ship:
+            size = sunk_ship["size"]
+            self.counts -= self._coverage(self.legal[size])
+            self.afloat[size] -= 1
+            for sunk_row, sunk_col in sunk_ship["cells"]:
+                sunk_index = sunk_row * self.cols + sunk_col
+                self.sunk_mask |= 1 << sunk_index
+                self._block(sunk_index)
+
+    def save_state(self):
+        return {"hits": format(self.hit_mask, "x"), "misses": format(self.miss_mask, "x"),
+                "sunk": format(self.sunk_mask, "x"), "afloat": sorted(self.afloat.items())}
+
+    def load_state(self, state):
+        """Rebuilds the legal placements and counts from the masks rather than storing them."""
+        self.hit_mask = int(state["hits"], 16)
+        self.miss_mask = int(state["misses"], 16)
+        self.sunk_mask = int(state["sunk"], 16)
+        self.afloat = {size: number for size, number in state["afloat"]}
+        blocked = self.miss_mask | self.sunk_mask
+        self.counts = np.zeros(self.rows * self.cols, dtype=np.int64)
+        for size, number in self.afloat.items():
+            index = placement_index(self.rows, self.cols, size)
+            self.legal[size] = {spot.mask: spot.indices for spot in index.all if not spot.mask & blocked}
+            self.by_cell[size] = index.by_cell
+            self.counts += number * self._coverage(self.legal[size])
+        self.untouched = np.ones(self.rows * self.cols, dtype=bool)
+        self.untouched[list(mask_indices(self.hit_mask | self.miss_mask))] = False
+
+    def _target_scores(self, open_hits):
+        """Scores cells next to unsunk hits by the placements that explain those hits."""
+        scores = {}
+        seen = set()
+        for hit in mask_indices(open_hits):
+            for size, covering in self.by_cell.items():
+                number = self.afloat[size]
+                if not number:
+                    continue
+                legal = self.legal[size]
+                for spot in covering[hit]:
+                    mask = spot.mask
+                    if mask in seen or mask not in legal:
+                        continue
+                    seen.add(mask)
+                    weight = number * self.HIT_WEIGHT * bin(mask & open_hits).count("1")
+                    for index in legal[mask]:
+                        if not (self.hit_mask >> index) & 1:
+                            scores[index] = scores.get(index, 0) + weight
+        return scores
+
+    def choose_target(self):
+        """Returns the untouched (row, col) with the highest placement density."""
+        open_hits = self.hit_mask & ~self.sunk_mask
+        scores = self._target_scores(open_hits) if open_hits else {}
+        if scores:
+            best = max(scores.values())
+            index = self.rng.choice([index for index, score in scores.items() if score == best])
+            return divmod(index, self.cols)
+
+        if not self.untouched.any():
+            raise RuntimeError("No valid targets available!")
+        scores = np.where(self.untouched, self.counts, -1)
+        index = self.rng.choice(np.flatnonzero(scores == scores.max()).tolist())
+        return divmod(index, self.cols)
+
+
+def draw_layout(rows, cols, sizes, hit_mask, miss_mask, sunk, rng=random):
+    """Draws one fleet layout consistent with what has been observed, or None.
+
+    sizes are the ships still afloat and sunk is a list of (size, mask) for
+    the ships already sunk. Unsunk hits are covered first, each by a random
+    afloat ship through that cell that does not sit entirely on hits (it
+    would have been reported sunk); the other ships then go anywhere legal.
+    Returns a list of (size, mask), sunk ships included.
+    """
+    layout = list(sunk)
+    occupied = miss_mask
+    for _, mask in sunk:
+        occupied |= mask
+    uncovered = hit_mask & ~occupied
+    remaining = list(sizes)
+
+    while uncovered:
+        hit = rng.choice(list(mask_indices(uncovered)))
+        candidates = [(size, spot.mask)
+                      for size in sorted(set(remaining))
+                      for spot in placement_index(rows, cols, size).by_cell[hit]
+                      if not spot.mask & occupied and spot.mask & ~hit_mask]
+        if not candidates:
+            return None
+        size, mask = rng.choice(candidates)
+        remaining.remove(size)
+        layout.append((size, mask))
+        occupied |= mask
+        uncovered &= ~mask
+
+    for size in remaining:
+        spot = sample_placement(rows, cols, size, occupied, rng)
+        if spot is None:
+            return None
+        layout.append((size, spot.mask))
+        occupied |= spot.mask
+    return layout
+
+
+def draw_layouts(rows, cols, sizes, hit_mask, miss_mask, sunk, count, rng=random, time_budget=0):
+    """Draws layouts until there are `count` of them or time_budget seconds (if set) have passed."""
+    deadline = time.perf_counter() + time_budget if time_budget else None
+    layouts = []
+    attempts = 0
+    while len(layouts) < count:
+        layout = draw_layout(rows, cols, sizes, hit_mask, miss_mask, sunk, rng)
+        if layout is not None:
+            layouts.append(layout)
+        attempts += 1
+        if deadline and attempts % 16 == 0 and time.perf_counter() > deadline:
+            break
+    return layouts
+
+
+def _draw_layouts(job):
+    """Process pool worker: draw_layouts() from its own seed."""
+    *arguments, seed, time_budget = job
+    return draw_layouts(*arguments, rng=random.Random(seed), time_budget=time_budget)
+
+
+# One process pool shared by every MonteCarloAI with workers, shut down at exit
+_pool = None
+_pool_workers = 0
+
+
+def _worker_pool(workers):
+    global _pool, _pool_workers
+    if _pool is not None and _pool_workers != workers:
+        shutdown_pool()
+    if _pool is None:
+        _pool = multiprocessing.Pool(workers)
+        _pool_workers = workers
+    return _pool
+
+
+def shutdown_pool():
+    """Stops the sampling worker processes, if any were started."""
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        _pool.join()
+        _pool = None
+
+
+atexit.register(shutdown_pool)
+
+
+class MonteCarloAI:
+    """Samples whole enemy fleets that fit every hit, miss and sink, then fires
+    where the most samples put a ship.
+
+    Samples that still agree with a new observation are kept for the next
+    turn, so each move only tops the pool back up. The pool size and the time
+    spent per move are capped by `samples` and `time_budget`; with `workers`
+    set, new samples are drawn on a process pool shared by every instance,
+    each worker keeping to the same time budget.
+    """
+
+    def __init__(self, rows=engine.ROWS, cols=engine.COLS, fleet=engine.FLEET, rng=random,
+                 samples=300, time_budget=0.05, workers=0):
+        self.rows = rows
+        self.cols = cols
+        self.rng = rng
+        self.samples = samples
+        self.time_budget = time_budget
+        self.workers = workers
+        self.afloat_sizes = [size for _, size in fleet]
+        self.hit_mask = 0
+        self.miss_mask = 0
+        self.sunk = []  # (size, mask) of every sunk ship
+        self.layouts = []  # (union mask, layout) of the kept samples
+        self.counts = [0] * (rows * cols)  # how many kept samples put a ship on each cell
+
+    def observe(self, row, col, result, sunk_ship=None):
+        bit = 1 << (row * self.cols + col)
+        if result == "miss":
+            self.miss_mask |= bit
+            self._keep(lambda union, layout: not union & bit)
+            return
+
+        self.hit_mask |= bit
+        if sunk_ship:
+            size = sunk_ship["size"]
+            mask = 0
+            for sunk_row, sunk_col in sunk_ship["cells"]:
+                mask |= 1 << (sunk_row * self.cols + sunk_col)
+            self.sunk.append((size, mask))
+            self.afloat_sizes.remove(size)
+            self._keep(lambda union, layout: (size, mask) in layout and self._afloat_unhit(layout))
+        else:
+            self._keep(lambda union, layout: union & bit and self._afloat_unhit(layout))
+
+    def _afloat_unhit(self, layout):
+        """False if a ship the layout has afloat is hit on every cell, as it would have been sunk."""
+        return all(mask & ~self.hit_mask or (size, mask) in self.sunk for size, mask in layout)
+
+    def save_state(self):
+        return {"hits": format(self.hit_mask, "x"), "misses": format(self.miss_mask, "x"),
+                "sunk": [[size, format(mask, "x")] for size, mask in self.sunk], "afloat_sizes": self.afloat_sizes,
+                "layouts": [[[size, format(mask, "x")] for size, mask in layout] for _, layout in self.layouts],
+                "counts": self.counts}
+
+    def load_state(self, state):
+        self.hit_mask = int(state["hits"], 16)
+        self.miss_mask = int(state["misses"], 16)
+        self.sunk = [(size, int(mask, 16)) for size, mask in state["sunk"]]
+        self.afloat_sizes = list(state["afloat_sizes"])
+        self.layouts = []
+        for saved in state["layouts"]:
+            layout = [(size, int(mask, 16)) for size, mask in saved]
+            union = 0
+            for _, mask in layout:
+                union |= mask
+            self.layouts.append((union, layout))
+        self.counts = list(state["counts"])
+
+    def _keep(self, agrees):
+        """Drops the samples that contradict the latest observation."""
+        kept = []
+        for union, layout in self.layouts:
+            if agrees(union, layout):
+                kept.append((union, layout))
+            else:
+                for index in mask_indices(union):
+                    self.counts[index] -= 1
+        self.layouts = kept
+
+    def _add(self, layout):
+        union = 0
+        for _, mask in layout:
+            union |= mask
+        self.layouts.append((union, layout))
+        for index in mask_indices(union):
+            self.counts[index] += 1
+
+    def _top_up(self):
+        """Draws new samples until the pool is full or the time budget runs out."""
+        missing = self.samples - len(self.layouts)
+        if missing <= 0:
+            return
+        observed = (self.rows, self.cols, self.afloat_sizes, self.hit_mask, self.miss_mask, self.sunk)
+        if self.workers:
+            share = -(-missing // self.workers)
+            jobs = [(*observed, share, self.rng.getrandbits(64), self.time_budget) for _ in range(self.workers)]
+            batches = _worker_pool(self.workers).imap_unordered(_draw_layouts, jobs)
+        else:
+            batches = [draw_layouts(*observed, missing, self.rng, self.time_budget)]
+        for layouts in batches:
+            for layout in layouts[:self.samples - len(self.layouts)]:
+                self._add(layout)
+
+    def choose_target(self):
+        """Returns the untouched (row, col) that the most sampled fleets cover."""
+        self._top_up()
+        shot_mask = self.hit_mask | self.miss_mask
+        if self.layouts:
+            scores = {index: count for index, count in enumerate(self.counts) if not (shot_mask >> index) & 1}
+        else:
+            # No consistent fleet found in time: fall back to placement density
+            sunk = np.zeros(self.rows * self.cols, dtype=bool)
+            for _, mask in self.sunk:
+                sunk |= self._grid(mask)
+            heat = heatmap.placement_heatmap(self._grid(self.miss_mask), self._grid(self.hit_mask),
+                                             sunk.reshape(self.rows, self.cols), self.afloat_sizes)
+            scores = {index: int(score) for index, score in enumerate(heat.ravel()) if not (shot_mask >> index) & 1}
+        if not scores:
+            raise RuntimeError("No valid targets available!")
+
+        best = max(scores.values())
+        index = self.rng.choice([index for index, score in scores.items() if score == best])
+        return divmod(index, self.cols)
+
+    def _grid(self, mask):
+        grid = np.zeros(self.rows * self.cols, dtype=bool)
+        grid[list(mask_indices(mask))] = True
+        return grid.reshape(self.rows, self.cols)
+
+
+# Difficulty name -> AI class
+STRATEGIES = {
+    "easy": RandomAI,
+    "hard": HuntTargetAI,
+    "expert": DensityAI,
+    "montecarlo": MonteCarloAI,
+}
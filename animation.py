@@ -0,0 +1,58 @@
+"""Baked sprites and sprite strips for the animated scenery of the menus.
+
+Scenery that never changes shape is drawn once with bake() onto a transparent
+surface and blitted from then on, so its geometry (rotations, spoke angles)
+is computed once instead of every frame. Periodic motion such as waves and
+wing beats is a SpriteStrip: one baked frame per step of the cycle, built the
+first time it is needed and shared by every object playing it, so each object
+only keeps its position and its frame index.
+
+Drawing functions take (surface, x, y) and draw relative to (x, y); `bounds`
+is the Rect they cover relative to that point, and a baked surface is blitted
+at (x + bounds.x, y + bounds.y). Baking moves the drawing by whole pixels, so
+it rasterises exactly as drawing straight onto the screen would.
+"""
+import pygame
+
+
+def bake(bounds, draw):
+    """Draws draw(surface, x, y) once onto a transparent surface the size of bounds."""
+    bounds = pygame.Rect(bounds)
+    surface = pygame.Surface(bounds.size, pygame.SRCALPHA)
+    draw(surface, -bounds.x, -bounds.y)
+    if pygame.display.get_surface() is not None:
+        surface = surface.convert_alpha()
+    return surface
+
+
+class Sprite:
+    """A drawing baked once, blitted wherever it is needed."""
+
+    def __init__(self, bounds, draw):
+        self.offset = pygame.Rect(bounds).topleft
+        self.surface = bake(bounds, draw)
+
+    def rect(self, x, y):
+        """The area blit() covers at (x, y)."""
+        return pygame.Rect((x + self.offset[0], y + self.offset[1]), self.surface.get_size())
+
+    def blit(self, surface, x, y):
+        surface.blit(self.surface, (x + self.offset[0], y + self.offset[1]))
+
+
+class SpriteStrip:
+    """The frames of a looping animation; frame i is draw(surface, x, y, i), baked once."""
+
+    def __init__(self, count, bounds, draw):
+        self.offset = pygame.Rect(bounds).topleft
+        self.frames = [bake(bounds, lambda surface, x, y, i=i: draw(surface, x, y, i)) for i in range(count)]
+
+    def __len__(self):
+        return len(self.frames)
+
+    def rect(self, x, y):
+        """The area blit() covers at (x, y), whatever the frame."""
+        return pygame.Rect((x + self.offset[0], y + self.offset[1]), self.frames[0].get_size())
+
+    def blit(self, surface, x, y, frame):
+        surface.blit(self.frames[frame % len(self.frames)], (x + self.offset[0], y + self.offset[1]))
@@ -0,0 +1,286 @@
+"""SQLite archive of finished and abandoned matches, built from match logs.
+
+    python archive.py ingest Game_Log_*.bslog Game_Log_*.txt
+    python archive.py query --difficulty hard --min-computer-shots 80
+    python archive.py stats --by difficulty
+
+Each match becomes one row of the `matches` table, indexed by player, date,
+difficulty with either side's shot count, and outcome, so queries like the one
+above never scan the table. Ingest streams every log once, record by record,
+optionally in several processes (--workers), and inserts in large
+transactions; logs that were ingested before and have not grown since are
+skipped, so it can be rerun over the whole log folder.
+
+Binary logs name the player, the difficulty and the winner (see matchlog.py).
+Old text logs only hold the shots, so their matches have no player or
+difficulty and count as abandoned unless a side landed FLEET_CELLS hits.
+"""
+import argparse
+import datetime
+import multiprocessing
+import os
+import re
+import sqlite3
+import sys
+
+import engine
+import matchlog
+
+DEFAULT_DB = "matches.sqlite"
+
+# Hits that sink a standard fleet, for telling who won an old text log
+FLEET_CELLS = sum(size for _, size in engine.FLEET)
+
+# Matches inserted per transaction during ingest
+BATCH = 10000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS matches (
+    id INTEGER PRIMARY KEY,
+    log TEXT NOT NULL,
+    number INTEGER NOT NULL,       -- position of the match in its log
+    started REAL NOT NULL,         -- seconds since the epoch
+    player TEXT,
+    difficulty TEXT,
+    outcome TEXT NOT NULL,         -- 'win' or 'loss' for the player, or 'abandoned'
+    player_shots INTEGER NOT NULL,
+    player_hits INTEGER NOT NULL,
+    computer_shots INTEGER NOT NULL,
+    computer_hits INTEGER NOT NULL,
+    rows INTEGER,
+    cols INTEGER,
+    duration REAL NOT NULL,        -- seconds from the first to the last record
+    UNIQUE (log, number)
+);
+CREATE INDEX IF NOT EXISTS matches_player ON matches (player, started);
+CREATE INDEX IF NOT EXISTS matches_started ON matches (started);
+CREATE INDEX IF NOT EXISTS matches_difficulty_computer_shots ON matches (difficulty, computer_shots);
+CREATE INDEX IF NOT EXISTS matches_difficulty_player_shots ON matches (difficulty, player_shots);
+CREATE INDEX IF NOT EXISTS matches_outcome ON matches (outcome, difficulty);
+CREATE TABLE IF NOT EXISTS logs (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL          -- bytes ingested, to skip logs that have not changed
+);
+"""
+
+COLUMNS = ("log", "number", "started", "player", "difficulty", "outcome", "player_shots", "player_hits",
+           "computer_shots", "computer_hits", "rows", "cols", "duration")
+
+_TEXT_LINE = re.compile(r"(\w+) performed (\w+) at position \((\d+), (\d+)\) with result: (\w+)")
+_TEXT_DATE = re.compile(r"(\d{4}-\d{2}-\d{2}_\d{2}-\d{2}(?:-\d{2})?)")
+
+
+def connect(path=DEFAULT_DB):
+    db = sqlite3.connect(path)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    db.executescript(SCHEMA)
+    return db
+
+
+def text_records(path):
+    """Yields matchlog.Records for the attacks in an old text log, dated by the file name."""
+    date = _TEXT_DATE.search(os.path.basename(path))
+    if date:
+        stamp = date.group(1)
+        started = datetime.datetime.strptime(stamp, "%Y-%m-%d_%H-%M-%S" if stamp.count("-") == 4
+                                             else "%Y-%m-%d_%H-%M").timestamp()
+    else:
+        started = os.path.getmtime(path)
+    with open(path) as lines:
+        for line in lines:
+            if line.startswith("--- Full Movement Logs"):
+                return
+            match = _TEXT_LINE.match(line)
+            if match:
+                actor, action, row, col, result = match.groups()
+                yield matchlog.Record(started, actor, action, int(row), int(col), result.lower(), None)
+
+
+def matches(records, log):
+    """Groups a log's records into one row (a dict of COLUMNS) per match.
+
+    A Start record opens a match and an End record closes it; attacks before
+    any Start, as in logs written before matches were marked, form a match
+    of their own.
+    """
+    number = 0
+    match = None
+
+    def opened(record, player=None, difficulty=None, rows=None, cols=None):
+        return {"log": log, "number": number, "started": record.timestamp, "player": player,
+                "difficulty": difficulty, "outcome": "abandoned", "player_shots": 0, "player_hits": 0,
+                "computer_shots": 0, "computer_hits": 0, "rows": rows, "cols": cols,
+                "last": record.timestamp}
+
+    def closed(match):
+        if match["player"] is None and match["outcome"] == "abandoned":
+            if match["player_hits"] >= FLEET_CELLS:
+                match["outcome"] = "win"
+            elif match["computer_hits"] >= FLEET_CELLS:
+                match["outcome"] = "loss"
+        match["duration"] = match.pop("last") - match["started"]
+        return match
+
+    for record in records:
+        if record.action == "Start":
+            if match is not None:
+                yield closed(match)
+                number += 1
+            match = opened(record, record.actor, record.sunk, record.row, record.col)
+        elif record.action == "End":
+            if match is not None:
+                match["outcome"] = "win" if record.actor == "Player" else "loss"
+                match["last"] = record.timestamp
+                yield closed(match)
+                number += 1
+                match = None
+        else:
+            if match is None:
+                match = opened(record)
+            side = "player" if record.actor == "Player" else "computer"
+            match[side + "_shots"] += 1
+            match[side + "_hits"] += record.result == "hit"
+            match["last"] = record.timestamp
+    if match is not None:
+        yield closed(match)
+
+
+def log_records(path):
+    if path.endswith(".txt"):
+        yield from text_records(path)
+        return
+    with open(path, "rb") as stream:
+        yield from matchlog.iter_records(stream)
+
+
+def read_matches(job):
+    """Parses one log into its match rows; runs in the worker processes."""
+    path, size = job
+    return path, size, list(matches(log_records(path), path))
+
+
+def ingest(db, paths, batch=BATCH, workers=1):
+    """Adds every match in the given logs; returns (logs read, matches added).
+
+    With workers > 1 the logs are parsed in that many processes while this
+    one does all the inserting, in log order either way.
+    """
+    insert = (f"INSERT OR REPLACE INTO matches ({', '.join(COLUMNS)}) "
+              f"VALUES ({', '.join(':' + column for column in COLUMNS)})")
+    known = dict(db.execute("SELECT path, size FROM logs"))
+    jobs = []
+    for path in paths:
+        path = os.path.abspath(path)
+        size = os.path.getsize(path)
+        if known.get(path) != size:
+            jobs.append((path, size))
+
+    pending = []
+    logs_read = added = 0
+    if workers <= 1:
+        parsed = map(read_matches, jobs)
+    else:
+        pool = multiprocessing.Pool(workers)
+        parsed = pool.imap(read_matches, jobs, chunksize=16)
+    for path, size, rows in parsed:
+        pending.extend(rows)
+        db.execute("INSERT OR REPLACE INTO logs (path, size) VALUES (?, ?)", (path, size))
+        logs_read += 1
+        if len(pending) >= batch:
+            with db:
+                db.executemany(insert, pending)
+            added += len(pending)
+            pending.clear()
+    with db:
+        db.executemany(insert, pending)
+    if workers > 1:
+        pool.close()
+        pool.join()
+    return logs_read, added + len(pending)
+
+
+def where(args):
+    """SQL conditions and parameters for the filters shared by query and stats."""
+    conditions, params = [], []
+    for column, value in (("player", args.player), ("difficulty", args.difficulty), ("outcome", args.outcome)):
+        if value is not None:
+            conditions.append(f"{column} = ?")
+            params.append(value)
+    for column, bound, op in (("player_shots", args.min_player_shots, ">="),
+                              ("player_shots", args.max_player_shots, "<="),
+                              ("computer_shots", args.min_computer_shots, ">="),
+                              ("computer_shots", args.max_computer_shots, "<=")):
+        if bound is not None:
+            conditions.append(f"{column} {op} ?")
+            params.append(bound)
+    if args.since:
+        conditions.append("started >= ?")
+        params.append(datetime.datetime.fromisoformat(args.since).timestamp())
+    if args.until:
+        conditions.append("started < ?")
+        params.append(datetime.datetime.fromisoformat(args.until).timestamp())
+    return (" WHERE " + " AND ".join(conditions) if conditions else ""), params
+
+
+def query(db, args):
+    """Matches passing the filters, newest first."""
+    clause, params = where(args)
+    sql = f"SELECT {', '.join(COLUMNS)} FROM matches{clause} ORDER BY started DESC"
+    if args.limit:
+        sql += f" LIMIT {int(args.limit)}"
+    return db.execute(sql, params)
+
+
+def stats(db, args):
+    """Games, wins and shot averages per value of args.by, over the filtered matches."""
+    clause, params = where(args)
+    return db.execute(f"SELECT {args.by}, COUNT(*), SUM(outcome = 'win'), SUM(outcome = 'loss'), "
+                      f"ROUND(AVG(player_shots), 1), ROUND(AVG(computer_shots), 1), MAX(computer_shots) "
+                      f"FROM matches{clause} GROUP BY {args.by} ORDER BY COUNT(*) DESC", params)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Archives match logs in SQLite and queries them.")
+    parser.add_argument("--db", default=DEFAULT_DB, help=f"archive file (default: {DEFAULT_DB})")
+    commands = parser.add_subparsers(dest="command", required=True)
+    ingest_parser = commands.add_parser("ingest", help="add .bslog and .txt match logs to the archive")
+    ingest_parser.add_argument("logs", nargs="+")
+    ingest_parser.add_argument("--workers", type=int, default=1, help="processes to parse logs in")
+    for name in ("query", "stats"):
+        command = commands.add_parser(name)
+        command.add_argument("--player")
+        command.add_argument("--difficulty", choices=("easy", "hard", "expert", "montecarlo"))
+        command.add_argument("--outcome", choices=("win", "loss", "abandoned"))
+        command.add_argument("--min-player-shots", type=int)
+        command.add_argument("--max-player-shots", type=int)
+        command.add_argument("--min-computer-shots", type=int)
+        command.add_argument("--max-computer-shots", type=int)
+        command.add_argument("--since", help="ISO date, e.g. 2024-12-01")
+        command.add_argument("--until", help="ISO date, exclusive")
+        if name == "query":
+            command.add_argument("--limit", type=int)
+        else:
+            command.add_argument("--by", default="difficulty", choices=("difficulty", "player", "outcome"))
+    args = parser.parse_args(argv)
+
+    db = connect(args.db)
+    if args.command == "ingest":
+        logs_read, added = ingest(db, args.logs, workers=args.workers)
+        print(f"Ingested {added} matches from {logs_read} logs into {args.db}")
+    elif args.command == "query":
+        print("\t".join(COLUMNS))
+        for row in query(db, args):
+            row = list(row)
+            row[2] = datetime.datetime.fromtimestamp(row[2]).isoformat(sep=" ", timespec="seconds")
+            sys.stdout.write("\t".join("" if value is None else str(value) for value in row) + "\n")
+    else:
+        print("\t".join((args.by, "games", "wins", "losses", "avg player shots", "avg computer shots",
+                         "max computer shots")))
+        for row in stats(db, args):
+            print("\t".join("" if value is None else str(value) for value in row))
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
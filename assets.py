@@ -0,0 +1,158 @@
+"""Images and sounds loaded on a background thread and cached on disk.
+
+Assets are named by file, plus the size to scale to for images. request()
+queues them for a loader thread, so the first screen can be shown before
+anything is decoded: peek() hands an asset out only if it is ready and get()
+waits for it. Each finished asset posts a LOADED event with its name, which
+wakes screens blocked in FrameLoop.wait_events() so they can redraw with it.
+
+Decoded (and scaled) images and sounds converted to the mixer's format are
+kept in CACHE_DIR as raw pixels and samples. A cache file is named after the
+SHA-1 of the source file and the target size or mixer format, so the next
+start skips the JPEG/PNG/WAV decoding and the scaling, and editing a source
+file or changing the window size simply misses the cache. Surfaces are
+converted to the window's pixel format on the main thread, the first time
+they are handed out.
+"""
+import hashlib
+import os
+import queue
+import struct
+import threading
+
+import pygame
+
+CACHE_DIR = ".asset_cache"
+SOUND_TYPES = (".wav", ".ogg", ".mp3")
+
+# Posted once per finished asset, with `name` and `size` attributes
+LOADED = pygame.event.custom_type()
+
+_IMAGE_HEADER = struct.Struct("<HH4s")  # width, height, pixel format ("RGB" or "RGBA")
+
+
+class AssetManager:
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.jobs = queue.Queue()
+        self.requested = set()
+        self.assets = {}  # (name, size) -> Surface or Sound
+        self.errors = {}  # (name, size) -> exception raised while loading it
+        self.unconverted = set()  # images not yet in the window's pixel format
+        self.done = threading.Condition()
+        self.loader = threading.Thread(target=self._load_all, name="assets", daemon=True)
+        self.loader.start()
+
+    def request(self, name, size=None):
+        """Queues an asset for the loader thread, unless it already was; size scales an image."""
+        key = (name, tuple(size) if size else None)
+        if key not in self.requested:
+            self.requested.add(key)
+            self.jobs.put(key)
+        return key
+
+    def peek(self, name, size=None):
+        """The asset if it has been loaded, else None; requests it if nobody has."""
+        key = self.request(name, size)
+        with self.done:
+            if key in self.errors:
+                raise self.errors[key]
+            if key not in self.assets:
+                return None
+            return self._handed_out(key)
+
+    def get(self, name, size=None):
+        """The asset, waiting for the loader thread to finish it if need be."""
+        key = self.request(name, size)
+        with self.done:
+            self.done.wait_for(lambda: key in self.assets or key in self.errors)
+            if key in self.errors:
+                raise self.errors[key]
+            return self._handed_out(key)
+
+    def _handed_out(self, key):
+        # Called with the lock held
+        if key in self.unconverted:
+            self.unconverted.discard(key)
+            image = self.assets[key]
+            self.assets[key] = image.convert_alpha() if image.get_flags() & pygame.SRCALPHA else image.convert()
+        return self.assets[key]
+
+    def _load_all(self):
+        while True:
+            key = self.jobs.get()
+            name, size = key
+            try:
+                if os.path.splitext(name)[1].lower() in SOUND_TYPES:
+                    asset = self._load_sound(name)
+                else:
+                    asset = self._load_image(name, size)
+            except Exception as error:
+                with self.done:
+                    self.errors[key] = error
+                    self.done.notify_all()
+            else:
+                with self.done:
+                    self.assets[key] = asset
+                    if isinstance(asset, pygame.Surface):
+                        self.unconverted.add(key)
+                    self.done.notify_all()
+            try:
+                pygame.event.post(pygame.event.Event(LOADED, name=name, size=size))
+            except pygame.error:
+                pass  # the window was closed meanwhile
+
+    def _cache_path(self, name, data, variant):
+        digest = hashlib.sha1(data).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"{os.path.basename(name)}-{digest}-{variant}.raw")
+
+    def _load_image(self, name, size):
+        with open(name, "rb") as file:
+            data = file.read()
+        path = self._cache_path(name, data, "{}x{}".format(*size) if size else "full")
+        cached = _read(path)
+        if cached is not None:
+            width, height, pixel_format = _IMAGE_HEADER.unpack_from(cached)
+            return pygame.image.fromstring(cached[_IMAGE_HEADER.size:], (width, height),
+                                           pixel_format.rstrip(b"\0").decode())
+        image = pygame.image.load(name)
+        if size:
+            image = pygame.transform.scale(image, size)
+        pixel_format = "RGBA" if image.get_flags() & pygame.SRCALPHA else "RGB"
+        _write(path, _IMAGE_HEADER.pack(*image.get_size(), pixel_format.encode())
+               + pygame.image.tostring(image, pixel_format))
+        return image
+
+    def _load_sound(self, name):
+        with open(name, "rb") as file:
+            data = file.read()
+        if not pygame.mixer.get_init():
+            raise pygame.error("mixer not initialized")
+        frequency, sample_format, channels = pygame.mixer.get_init()
+        path = self._cache_path(name, data, f"{frequency}-{sample_format}-{channels}")
+        cached = _read(path)
+        if cached is not None:
+            return pygame.mixer.Sound(buffer=cached)
+        sound = pygame.mixer.Sound(name)
+        _write(path, sound.get_raw())
+        return sound
+
+
+def _read(path):
+    try:
+        with open(path, "rb") as file:
+            return file.read()
+    except OSError:
+        return None
+
+
+def _write(path, data):
+    """Writes a cache file whole or not at all; a cache that can't be written is just skipped."""
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f"{path}.{threading.get_ident()}.tmp"
+        with open(temporary, "wb") as file:
+            file.write(data)
+        os.replace(temporary, path)
+    except OSError:
+        pass
@@ -0,0 +1,91 @@
+"""Sound cues played on a few reserved mixer channels.
+
+The game asks for a cue by name ("hit", "sunk", ...) instead of calling
+Sound.play(), which grabs any free channel, so sounds pile up on the mixer
+when shots come fast. AudioManager reserves `channels` mixer channels for the
+cues and plays each cue on a free one. When they are all busy, a cue cuts off
+the least important one playing if that one's priority is no higher, and is
+skipped otherwise. A cue asked for again within its window of when it last
+started is skipped too, so a burst of shots, or two calls for the same sink,
+sound once.
+
+A cue whose sound fails to load (a missing or broken file) is reported once
+and skipped from then on, as if there were no audio.
+
+NullAudio has the same interface and plays nothing. It is what the game uses
+until init_game() finds a working mixer, so headless runs never touch it.
+"""
+import time
+from collections import namedtuple
+
+import pygame
+
+CHANNELS = 4
+
+# sound: asset name; priority: higher cuts off lower; window: seconds in which a repeat is skipped
+Cue = namedtuple("Cue", "sound priority window")
+
+
+class AudioManager:
+    def __init__(self, cues, load, channels=CHANNELS, clock=time.monotonic):
+        """cues maps cue names to Cues; load(asset name) returns its pygame Sound."""
+        self.cues = cues
+        self.load = load
+        self.clock = clock
+        if pygame.mixer.get_num_channels() < channels:
+            pygame.mixer.set_num_channels(channels)
+        pygame.mixer.set_reserved(channels)  # Sound.play() elsewhere never takes these
+        self.channels = [pygame.mixer.Channel(index) for index in range(channels)]
+        # Priority of the cue last started on each channel; anything else found playing there may be cut off
+        self.priorities = [float("-inf")] * channels
+        self.started = {}  # cue name -> clock() when it last started
+        self.broken = set()  # sounds that failed to load
+        self.skipped = 0
+
+    def play(self, name):
+        """Plays a cue unless it has just played or only more important cues are playing; True if it plays."""
+        cue = self.cues[name]
+        if cue.sound in self.broken:
+            self.skipped += 1
+            return False
+        now = self.clock()
+        last = self.started.get(name)
+        if last is not None and now - last < cue.window:
+            self.skipped += 1
+            return False
+        index = self._channel_for(cue.priority)
+        if index is None:
+            self.skipped += 1
+            return False
+        try:
+            sound = self.load(cue.sound)
+        except (OSError, pygame.error) as error:
+            print(f"Not playing {cue.sound}: {error}")
+            self.broken.add(cue.sound)
+            self.skipped += 1
+            return False
+        self.channels[index].play(sound)
+        self.priorities[index] = cue.priority
+        self.started[name] = now
+        return True
+
+    def _channel_for(self, priority):
+        """A free channel, else the one playing the least important cue if it may be cut off, else None."""
+        lowest = None
+        for index, channel in enumerate(self.channels):
+            if not channel.get_busy():
+                return index
+            if lowest is None or self.priorities[index] < self.priorities[lowest]:
+                lowest = index
+        if self.priorities[lowest] <= priority:
+            return lowest
+        return None
+
+
+class NullAudio:
+    """Plays nothing, for headless runs and machines without sound."""
+
+    skipped = 0
+
+    def play(self, name):
+        return False
@@ -0,0 +1,200 @@
+"""battleships-sim: plays computer strategies against each other, headless.
+
+    python battleships_sim.py hard expert --games 5000 --seed 7 --workers 8
+    python battleships_sim.py hard expert --board 100x100 --ships "5x6,4x10,3x12,2x12"
+
+Each game gives both strategies the same fleet to sink (random, or the fixed
+layout) and counts the shots each needs. With one shot per turn, the strategy
+that needs fewer shots wins; ties go to whoever moved first, which alternates
+between games. Only engine.py and ai.py are used, so no window or audio
+device is ever opened.
+"""
+import argparse
+import multiprocessing
+import random
+import time
+from collections import Counter
+
+import ai
+import engine
+
+# A fixed layout for --fleet fixed: (row, col, horizontal) per ship in engine.FLEET order
+FIXED_LAYOUT = [
+    (0, 0, True),
+    (2, 3, True),
+    (4, 1, False),
+    (5, 6, True),
+    (9, 2, True),
+]
+
+
+def make_fleet(fleet_mode, rng, rows=engine.ROWS, cols=engine.COLS, fleet=engine.FLEET):
+    if fleet_mode == "fixed":
+        return [engine.make_ship(name, size, row, col, horizontal)
+                for (name, size), (row, col, horizontal) in zip(engine.FLEET, FIXED_LAYOUT)]
+    return engine.random_fleet(rows, cols, fleet, rng)
+
+
+def make_player(strategy, rng, rows=engine.ROWS, cols=engine.COLS, fleet=engine.FLEET):
+    """Builds a strategy's AI; Monte Carlo draws a fixed number of samples instead of stopping on the clock."""
+    if ai.STRATEGIES[strategy] is ai.MonteCarloAI:
+        return ai.MonteCarloAI(rows, cols, fleet, rng=rng, time_budget=0)
+    return ai.STRATEGIES[strategy](rows, cols, fleet, rng=rng)
+
+
+def shots_to_sink(strategy, ships, rng, rows=engine.ROWS, cols=engine.COLS, fleet=engine.FLEET):
+    """Lets one strategy fire at a fleet until it is sunk and returns the shot count."""
+    board = engine.board_from_ships([dict(ship) for ship in ships], rows, cols)
+    player = make_player(strategy, rng, rows, cols, fleet)
+    while not board.all_ships_sunk():
+        row, col = player.choose_target()
+        result, sunk_ship = board.fire(row, col)
+        player.observe(row, col, result, sunk_ship)
+    return board.shots_fired
+
+
+def game_rng(seed, game, stream):
+    """An RNG for one part of a game ("fleet", "a" or "b"), derived only from the run seed and the game number.
+
+    The fleet and each strategy draw from their own stream, so one strategy's
+    choices never change the fleet or the other strategy's game.
+    """
+    return random.Random(f"{seed}:{game}:{stream}")
+
+
+def play_game(strategy_a, strategy_b, fleet_mode, seed, game, rows=engine.ROWS, cols=engine.COLS,
+              fleet=engine.FLEET):
+    """Plays game number `game` and returns (shots_a, shots_b, winner)."""
+    ships = make_fleet(fleet_mode, game_rng(seed, game, "fleet"), rows, cols, fleet)
+    shots_a = shots_to_sink(strategy_a, ships, game_rng(seed, game, "a"), rows, cols, fleet)
+    shots_b = shots_to_sink(strategy_b, ships, game_rng(seed, game, "b"), rows, cols, fleet)
+    a_moves_first = game % 2 == 0
+    if shots_a < shots_b or (shots_a == shots_b and a_moves_first):
+        return shots_a, shots_b, "a"
+    return shots_a, shots_b, "b"
+
+
+def run_chunk(job):
+    """Plays one contiguous range of games and returns (histograms, wins).
+
+    Every game draws from its own seed, so a chunk's results do not depend on
+    which worker runs it or in what order.
+    """
+    strategy_a, strategy_b, fleet_mode, seed, start, stop, rows, cols, fleet = job
+    histograms = {"a": Counter(), "b": Counter()}
+    wins = Counter()
+    for game in range(start, stop):
+        shots_a, shots_b, winner = play_game(strategy_a, strategy_b, fleet_mode, seed, game, rows, cols, fleet)
+        histograms["a"][shots_a] += 1
+        histograms["b"][shots_b] += 1
+        wins[winner] += 1
+    return histograms, wins
+
+
+def run(strategy_a, strategy_b, games, seed=0, fleet_mode="random", workers=1, chunk_size=100,
+        rows=engine.ROWS, cols=engine.COLS, fleet=engine.FLEET):
+    """Plays every game, spread over a process pool, and merges the results.
+
+    Chunks stream back as they finish and are summed into one histogram per
+    strategy of the shots it took to sink the fleet, so the totals are
+    identical for any worker count.
+    """
+    jobs = [(strategy_a, strategy_b, fleet_mode, seed, start, min(start + chunk_size, games), rows, cols, fleet)
+            for start in range(0, games, chunk_size)]
+    histograms = {"a": Counter(), "b": Counter()}
+    wins = Counter()
+
+    def merge(results):
+        for chunk_histograms, chunk_wins in results:
+            histograms["a"].update(chunk_histograms["a"])
+            histograms["b"].update(chunk_histograms["b"])
+            wins.update(chunk_wins)
+
+    if workers <= 1:
+        merge(map(run_chunk, jobs))
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            merge(pool.imap_unordered(run_chunk, jobs))
+    return histograms, wins
+
+
+def nth_shortest(histogram, rank):
+    """The rank-th smallest value (1-based) of a {value: count} histogram."""
+    seen = 0
+    for value in sorted(histogram):
+        seen += histogram[value]
+        if seen >= rank:
+            return value
+    raise ValueError("Rank is larger than the histogram")
+
+
+def percentile(histogram, percent):
+    """Nearest-rank percentile of a {value: count} histogram."""
+    total = sum(histogram.values())
+    return nth_shortest(histogram, min(total, max(1, round(percent / 100 * total))))
+
+
+def summarize(name, histogram, wins):
+    games = sum(histogram.values())
+    if not games:
+        return f"{name:>12}: no games played"
+    mean = sum(value * count for value, count in histogram.items()) / games
+    median = (nth_shortest(histogram, (games + 1) // 2) + nth_shortest(histogram, games // 2 + 1)) / 2
+    return (f"{name:>12}: wins {wins}/{games} ({100 * wins / games:.1f}%)  "
+            f"shots mean {mean:.2f}  median {median:g}  "
+            f"p90 {percentile(histogram, 90)}  p99 {percentile(histogram, 99)}  "
+            f"min {min(histogram)}  max {max(histogram)}")
+
+
+def format_histogram(name, histogram):
+    lines = [f"{name} shots-to-sink-the-fleet histogram (every game, won or lost):"]
+    for value in sorted(histogram):
+        lines.append(f"  {value:>4} {histogram[value]}")
+    return "\n".join(lines)
+
+
+def positive_int(text):
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, not {value}")
+    return value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="battleships-sim", description=__doc__.splitlines()[0])
+    parser.add_argument("strategy_a", choices=sorted(ai.STRATEGIES))
+    parser.add_argument("strategy_b", choices=sorted(ai.STRATEGIES))
+    parser.add_argument("--games", type=positive_int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--fleet", choices=["random", "fixed"], default="random")
+    parser.add_argument("--board", default=f"{engine.ROWS}x{engine.COLS}",
+                        help=f"board size as ROWSxCOLS, up to {engine.MAX_BOARD}x{engine.MAX_BOARD}")
+    parser.add_argument("--ships", help='fleet as [NAME:]SIZE[xCOUNT], comma-separated, e.g. "5,4x2,3x3,2x4"')
+    parser.add_argument("--workers", type=positive_int, default=1, help="processes to spread the games over")
+    parser.add_argument("--chunk-size", type=positive_int, default=100, help="games handed to a worker at a time")
+    parser.add_argument("--histogram", action="store_true", help="print the full shots-to-sink histograms")
+    args = parser.parse_args(argv)
+    try:
+        rows, cols = engine.parse_board(args.board)
+        fleet = engine.parse_fleet(args.ships) if args.ships else engine.FLEET
+        engine.check_setup(rows, cols, fleet)
+    except ValueError as error:
+        parser.error(str(error))
+    if args.fleet == "fixed" and ((rows, cols) != (engine.ROWS, engine.COLS) or fleet != engine.FLEET):
+        parser.error("--fleet fixed only works with the standard board and ships")
+
+    started = time.perf_counter()
+    histograms, wins = run(args.strategy_a, args.strategy_b, args.games, args.seed, args.fleet,
+                           args.workers, args.chunk_size, rows, cols, fleet)
+    elapsed = time.perf_counter() - started
+
+    print(summarize(f"A {args.strategy_a}", histograms["a"], wins["a"]))
+    print(summarize(f"B {args.strategy_b}", histograms["b"], wins["b"]))
+    if args.histogram:
+        print(format_histogram(f"A {args.strategy_a}", histograms["a"]))
+        print(format_histogram(f"B {args.strategy_b}", histograms["b"]))
+    print(f"{args.games} games in {elapsed:.2f}s ({args.games / elapsed:.1f} games/s, {args.workers} workers)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Integer bitmask boards for fast shot resolution.
+
+Cell (row, col) is bit row * cols + col, so a 10x10 board fits in a 100-bit
+Python int. Each ship, the hits and the misses are one mask each: a shot is a
+single AND, a sink is one mask comparison and "all ships sunk" is another.
+No screen geometry is involved anywhere.
+"""
+
+
+def cell_index(row, col, cols):
+    return row * cols + col
+
+
+def cell_bit(row, col, cols):
+    return 1 << (row * cols + col)
+
+
+def ship_mask(row, col, size, horizontal, cols):
+    """Returns the mask covered by a ship of this size starting at (row, col)."""
+    step = 1 if horizontal else cols
+    mask = 0
+    index = row * cols + col
+    for _ in range(size):
+        mask |= 1 << index
+        index += step
+    return mask
+
+
+def mask_indices(mask):
+    """Yields the index of every set bit, lowest first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def mask_cells(mask, cols):
+    """Yields (row, col) for every set bit of the mask."""
+    for index in mask_indices(mask):
+        yield divmod(index, cols)
+
+
+class BitBoard:
+    """Ships, hits and misses of one board, each kept as a bitmask."""
+
+    __slots__ = ("rows", "cols", "ship_masks", "owner", "occupied", "hit_mask", "miss_mask", "sunk_mask")
+
+    def __init__(self, rows, cols):
+        self.rows = rows
+        self.cols = cols
+        self.ship_masks = []
+        self.owner = {}  # cell index -> position in ship_masks
+        self.occupied = 0
+        self.hit_mask = 0
+        self.miss_mask = 0
+        self.sunk_mask = 0  # union of the masks of sunk ships
+
+    @property
+    def shot_mask(self):
+        return self.hit_mask | self.miss_mask
+
+    def fits(self, mask):
+        return not self.occupied & mask
+
+    def add_ship(self, mask):
+        """Adds a ship mask and returns its position in ship_masks."""
+        if self.occupied & mask:
+            raise ValueError("Ship overlaps another ship")
+        number = len(self.ship_masks)
+        self.ship_masks.append(mask)
+        self.occupied |= mask
+        for index in mask_indices(mask):
+            self.owner[index] = number
+        return number
+
+    def fire(self, index):
+        """Resolves a shot at a cell index and returns (hit, sunk_ship_number).
+
+        sunk_ship_number is the position in ship_masks of the ship sunk by
+        this shot, or None.
+        """
+        bit = 1 << index
+        if (self.hit_mask | self.miss_mask) & bit:
+            raise ValueError(f"Cell {index} has already been shot")
+        if not self.occupied & bit:
+            self.miss_mask |= bit
+            return False, None
+
+        self.hit_mask |= bit
+        number = self.owner[index]
+        mask = self.ship_masks[number]
+        if self.hit_mask & mask == mask:
+            self.sunk_mask |= mask
+            return True, number
+        return True, None
+
+    def is_sunk(self, number):
+        mask = self.ship_masks[number]
+        return self.hit_mask & mask == mask
+
+    def all_ships_sunk(self):
+        return self.hit_mask & self.occupied == self.occupied
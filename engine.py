@@ -0,0 +1,214 @@
+"""Headless Battleships rules: boards, fleets, shot resolution and win detection.
+
+Nothing in here imports pygame, so whole games can be played on machines
+without a display or an audio device. The pygame front end in
+BattleShipGame.py keeps its ship dicts (with their "rect") and hands them to a
+Board, which only cares about grid cells.
+"""
+import random
+
+from bitboard import BitBoard, mask_cells
+from placement import placement_index, sample_fleet
+
+ROWS = 10
+COLS = 10
+
+# (name, size) for every ship in a standard fleet
+FLEET = [
+    ("Submarine", 2),
+    ("Cruiser", 3),
+    ("Battleship", 4),
+    ("Destroyer", 4),
+    ("Air Carrier", 5),
+]
+
+# Largest board a game can be played on, in either direction
+MAX_BOARD = 100
+
+# Names given to ships in a fleet spec that only states their size
+SHIP_NAMES = {2: "Submarine", 3: "Cruiser", 4: "Battleship", 5: "Air Carrier"}
+
+
+def row_label(row):
+    """Spreadsheet-style label for a row: A to Z, then AA, AB and so on."""
+    label = ""
+    row += 1
+    while row:
+        row, letter = divmod(row - 1, 26)
+        label = chr(65 + letter) + label
+    return label
+
+
+def parse_board(spec):
+    """Parses a board size such as "10x10" into (rows, cols)."""
+    try:
+        rows, cols = (int(part) for part in spec.lower().split("x"))
+    except ValueError:
+        raise ValueError(f"Board size {spec!r} is not ROWSxCOLS") from None
+    return rows, cols
+
+
+def parse_fleet(spec):
+    """Parses a fleet spec into a list of (name, size).
+
+    Entries are comma-separated, each a size with an optional name and an
+    optional count: "Flagship:6,5,4x3,2x4" is a Flagship of 6, an Air Carrier,
+    three Battleships and four Submarines. Repeated names are numbered.
+    """
+    fleet = []
+    for entry in spec.split(","):
+        name, _, size = entry.strip().rpartition(":")
+        size, _, count = size.lower().partition("x")
+        try:
+            size, count = int(size), int(count or 1)
+        except ValueError:
+            raise ValueError(f"Fleet entry {entry.strip()!r} is not [NAME:]SIZE[xCOUNT]") from None
+        if size < 1 or count < 1:
+            raise ValueError(f"Fleet entry {entry.strip()!r} needs a positive size and count")
+        fleet.extend([(name.strip() or SHIP_NAMES.get(size, f"Ship {size}"), size)] * count)
+
+    totals = {}
+    for name, _ in fleet:
+        totals[name] = totals.get(name, 0) + 1
+    seen = {}
+    named = []
+    for name, size in fleet:
+        seen[name] = seen.get(name, 0) + 1
+        named.append((f"{name} {seen[name]}" if totals[name] > 1 else name, size))
+    return named
+
+
+def check_setup(rows, cols, fleet):
+    """Raises ValueError if the fleet cannot be played on a rows x cols board."""
+    if not (1 <= rows <= MAX_BOARD and 1 <= cols <= MAX_BOARD):
+        raise ValueError(f"Boards go from 1x1 to {MAX_BOARD}x{MAX_BOARD}, not {rows}x{cols}")
+    if not fleet:
+        raise ValueError("The fleet needs at least one ship")
+    for name, size in fleet:
+        if size > max(rows, cols):
+            raise ValueError(f"{name} ({size}) does not fit on a {rows}x{cols} board")
+    if sum(size for _, size in fleet) > rows * cols:
+        raise ValueError(f"The fleet covers more cells than a {rows}x{cols} board has")
+
+
+def ship_cells(row, col, size, horizontal):
+    """Returns the (row, col) cells covered by a ship starting at (row, col)."""
+    if horizontal:
+        return [(row, col + i) for i in range(size)]
+    return [(row + i, col) for i in range(size)]
+
+
+def make_ship(name, size, row, col, horizontal):
+    """Creates a ship dict in the same shape the front end uses, minus the rect."""
+    return {
+        "name": name,
+        "size": size,
+        "row": row,
+        "col": col,
+        "horizontal": horizontal,
+        "cells": ship_cells(row, col, size, horizontal),
+        "hits": 0,
+        "status": "alive",
+    }
+
+
+class Board:
+    """One player's waters: where the ships are and what has been shot at.
+
+    Shot resolution runs on a BitBoard; the ship dicts and the status grid are
+    kept in step for the front end and the AIs.
+    """
+
+    def __init__(self, rows=ROWS, cols=COLS):
+        self.rows = rows
+        self.cols = cols
+        self.ships = []
+        self.status = [[None for _ in range(cols)] for _ in range(rows)]  # None, "hit" or "miss"
+        self.bits = BitBoard(rows, cols)
+        self.shots_fired = 0
+        self.last_shot = None
+
+    @property
+    def ships_afloat(self):
+        return sum(1 for ship in self.ships if ship["status"] == "alive")
+
+    def in_bounds(self, row, col):
+        return 0 <= row < self.rows and 0 <= col < self.cols
+
+    def can_place(self, size, row, col, horizontal):
+        """True if a ship of this size fits at (row, col) without overlapping another."""
+        spot = placement_index(self.rows, self.cols, size).at(row, col, horizontal)
+        return spot is not None and self.bits.fits(spot.mask)
+
+    def place_ship(self, ship):
+        """Adds a ship dict to the board, filling in its "cells" if missing."""
+        ship.setdefault("cells", ship_cells(ship["row"], ship["col"], ship["size"], ship["horizontal"]))
+        if not self.can_place(ship["size"], ship["row"], ship["col"], ship["horizontal"]):
+            raise ValueError(f"{ship['name']} cannot be placed at {(ship['row'], ship['col'])}")
+        spot = placement_index(self.rows, self.cols, ship["size"]).at(ship["row"], ship["col"], ship["horizontal"])
+        self.bits.add_ship(spot.mask)
+        self.ships.append(ship)
+        return ship
+
+    def is_untouched(self, row, col):
+        return self.status[row][col] is None
+
+    def fire(self, row, col):
+        """Resolves a shot at (row, col) and returns (result, sunk_ship).
+
+        result is "hit" or "miss"; sunk_ship is the ship dict sunk by this
+        shot, or None.
+        """
+        if not self.in_bounds(row, col):
+            raise ValueError(f"Shot at {(row, col)} is off the board")
+        if self.status[row][col] is not None:
+            raise ValueError(f"Cell {(row, col)} has already been shot")
+
+        self.shots_fired += 1
+        self.last_shot = (row, col)
+        hit, sunk_number = self.bits.fire(row * self.cols + col)
+        if not hit:
+            self.status[row][col] = "miss"
+            return "miss", None
+
+        self.status[row][col] = "hit"
+        ship = self.ships[self.bits.owner[row * self.cols + col]]
+        ship["hits"] += 1
+        if sunk_number is not None:
+            ship["status"] = "sunk"
+            return "hit", ship
+        return "hit", None
+
+    def all_ships_sunk(self):
+        return self.bits.all_ships_sunk()
+
+    def restore_shots(self, hit_mask, miss_mask):
+        """Puts back the shots of a saved game, given as BitBoard hit and miss masks."""
+        bits = self.bits
+        bits.hit_mask, bits.miss_mask, bits.sunk_mask = hit_mask, miss_mask, 0
+        self.status = [[None for _ in range(self.cols)] for _ in range(self.rows)]
+        for mask, result in ((hit_mask, "hit"), (miss_mask, "miss")):
+            for row, col in mask_cells(mask, self.cols):
+                self.status[row][col] = result
+        for ship, mask in zip(self.ships, bits.ship_masks):
+            ship["hits"] = bin(hit_mask & mask).count("1")
+            ship["status"] = "sunk" if hit_mask & mask == mask else "alive"
+            if ship["status"] == "sunk":
+                bits.sunk_mask |= mask
+        self.shots_fired = bin(hit_mask | miss_mask).count("1")
+        self.last_shot = None
+
+
+def random_fleet(rows=ROWS, cols=COLS, fleet=FLEET, rng=random):
+    """Places every ship of the fleet at random, without overlaps."""
+    layout = sample_fleet(rows, cols, [size for _, size in fleet], rng)
+    return [make_ship(name, size, spot.row, spot.col, spot.horizontal)
+            for (name, size), spot in zip(fleet, layout)]
+
+
+def board_from_ships(ships, rows=ROWS, cols=COLS):
+    """Builds a fresh Board holding the given ship dicts."""
+    board = Board(rows, cols)
+    for ship in ships:
+        board.place_ship(ship)
+    return board
@@ -0,0 +1,60 @@
+"""Font registry and rendered-text cache shared by every screen.
+
+pygame.font.SysFont searches the system font list on every call, and most
+captions on screen never change, so fonts are loaded once per (name, size)
+and rendered text surfaces are kept in an LRU cache keyed by
+(font, size, text, colour). A name of None means pygame's default font.
+"""
+from collections import OrderedDict
+
+import pygame
+
+_fonts = {}
+
+
+def get_font(name, size):
+    """Returns the font for (name, size), loading it only the first time."""
+    key = (name, size)
+    font = _fonts.get(key)
+    if font is None:
+        font = pygame.font.SysFont(name, size) if name else pygame.font.Font(None, size)
+        _fonts[key] = font
+    return font
+
+
+class TextCache:
+    """LRU cache of rendered text surfaces, bounded by entry count and by pixel memory."""
+
+    def __init__(self, max_entries=512, max_bytes=8 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key -> (surface, size in bytes)
+        self.bytes_used = 0
+
+    def render(self, name, size, text, color, antialias=True):
+        key = (name, size, text, tuple(color), antialias)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            return entry[0]
+
+        surface = get_font(name, size).render(text, antialias, color)
+        surface_bytes = surface.get_width() * surface.get_height() * surface.get_bytesize()
+        self.entries[key] = (surface, surface_bytes)
+        self.bytes_used += surface_bytes
+        while self.entries and (len(self.entries) > self.max_entries or self.bytes_used > self.max_bytes):
+            _, (_, evicted_bytes) = self.entries.popitem(last=False)
+            self.bytes_used -= evicted_bytes
+        return surface
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes_used = 0
+
+
+text_cache = TextCache()
+
+
+def render_text(name, size, text, color, antialias=True):
+    """Renders text with the shared cache; the surface must not be modified."""
+    return text_cache.render(name, size, text, color, antialias)
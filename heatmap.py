@@ -0,0 +1,77 @@
+"""NumPy placement-count kernel shared by the computer opponents.
+
+placement_heatmap() counts, for every cell, how many legal placements of the
+ships still afloat cover it. It works on boolean grids of shape (rows, cols)
+or on a whole batch of boards at once with shape (boards, rows, cols): every
+step is a sliding-window sum along the last two axes.
+"""
+from collections import Counter
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def _window_sum(grid, size, axis):
+    """Sums every run of `size` cells along an axis (a 1-D convolution with ones)."""
+    return sliding_window_view(grid, size, axis=axis).sum(axis=-1)
+
+
+def _spread(starts, size, axis):
+    """Turns per-start placement weights into per-cell coverage along an axis."""
+    pad = [(0, 0)] * starts.ndim
+    pad[axis] = (size - 1, size - 1)
+    return _window_sum(np.pad(starts, pad), size, axis)
+
+
+def placement_heatmap(misses, hits, sunk, sizes, hit_weight=50):
+    """Returns the per-cell placement density for the ships of the given sizes.
+
+    misses, hits and sunk are boolean arrays of the same shape, either
+    (rows, cols) or (boards, rows, cols). A placement is legal if it avoids
+    every miss and every sunk cell; placements running through unsunk hits
+    count hit_weight times more for each hit they explain. Cells that have
+    already been shot score zero.
+    """
+    misses = np.asarray(misses, dtype=bool)
+    hits = np.asarray(hits, dtype=bool)
+    sunk = np.asarray(sunk, dtype=bool)
+    free = ~(misses | sunk)
+    open_hits = (hits & ~sunk).astype(np.int64)
+    free_count = free.astype(np.int64)
+    heat = np.zeros(free.shape, dtype=np.int64)
+
+    for size, number in Counter(sizes).items():
+        for axis in (-1, -2):
+            if free.shape[axis] < size or (size == 1 and axis == -2):
+                continue
+            fits = _window_sum(free_count, size, axis) == size
+            weight = 1 + hit_weight * _window_sum(open_hits, size, axis)
+            heat += number * _spread(np.where(fits, weight, 0), size, axis)
+
+    heat[misses | hits] = 0
+    return heat
+
+
+def status_grids(status, sunk_cells=()):
+    """Boolean (misses, hits, sunk) grids from a status grid and the sunk ship cells."""
+    status = np.array(status, dtype=object)
+    misses = status == "miss"
+    hits = status == "hit"
+    sunk = np.zeros(status.shape, dtype=bool)
+    for row, col in sunk_cells:
+        sunk[row, col] = True
+    return misses, hits, sunk
+
+
+def parity_mask(rows, cols):
+    """Checkerboard of the cells with an even row + col."""
+    row_index, col_index = np.indices((rows, cols))
+    return (row_index + col_index) % 2 == 0
+
+
+def best_cell(heat, allowed):
+    """Returns the allowed (row, col) with the highest density, or None."""
+    if not allowed.any():
+        return None
+    scores = np.where(allowed, heat, -1)
+    return tuple(int(i) for i in np.unravel_index(np.argmax(scores), scores.shape))
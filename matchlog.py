@@ -0,0 +1,229 @@
+"""Append-only binary match log.
+
+A log file starts with MAGIC and holds one length-prefixed record per event:
+
+    uint16 length of the rest of the record
+    float64 timestamp (seconds since the epoch)
+    uint8 action (ACTIONS), uint16 row, uint16 col, uint8 result (RESULTS)
+    uint8 actor length, actor (UTF-8)
+    sunk ship name (UTF-8, the rest of the record; empty if nothing sank)
+
+Names longer than MAX_NAME_BYTES in UTF-8 are cut short at a whole character.
+
+"Start" and "End" records bracket a match. A Start record holds the player's
+name as its actor, the board size as its row and col and the difficulty in
+place of the sunk ship; an End record holds the winner as its actor. Neither
+has a result. archive.py indexes logs by these.
+
+Everything is little-endian. MatchLog puts records on a bounded queue that a
+writer thread drains, writing in batches and flushing at most every
+flush_interval seconds, so the game loop never waits on the disk. to_text()
+turns a log back into the text format the game used to write, and running
+this module converts a file:
+
+    python matchlog.py Game_Log_2024-01-01_12-00-00.bslog > Game_Log.txt
+"""
+import argparse
+import queue
+import struct
+import sys
+import threading
+import time
+from collections import namedtuple
+
+MAGIC = b"BSLOG\x01"
+
+ACTIONS = ("Attack", "Start", "End")
+RESULTS = ("miss", "hit")
+
+# What MatchLog.write does when the queue is full: wait for room, lose the
+# record, or hold records back and queue them together once there is room
+WHEN_FULL = ("block", "drop", "coalesce")
+
+MAX_NAME_BYTES = 255
+
+_LENGTH = struct.Struct("<H")
+_FIXED = struct.Struct("<dBHHBB")  # timestamp, action, row, col, result, actor length
+
+Record = namedtuple("Record", "timestamp actor action row col result sunk")
+
+
+def _name_bytes(name):
+    data = name.encode()
+    if len(data) > MAX_NAME_BYTES:
+        data = data[:MAX_NAME_BYTES].decode(errors="ignore").encode()
+    return data
+
+
+def encode_record(actor, row, col, result, sunk=None, timestamp=None, action="Attack"):
+    """Packs one event, length prefix included; result is None for anything but an Attack."""
+    actor_bytes = _name_bytes(actor)
+    sunk_bytes = _name_bytes(sunk) if sunk else b""
+    body = _FIXED.pack(time.time() if timestamp is None else timestamp, ACTIONS.index(action),
+                       row, col, RESULTS.index(result) if result else 0, len(actor_bytes)) + actor_bytes + sunk_bytes
+    return _LENGTH.pack(len(body)) + body
+
+
+def decode_record(body):
+    """Unpacks a record without its length prefix."""
+    timestamp, action, row, col, result, actor_length = _FIXED.unpack_from(body)
+    actor_end = _FIXED.size + actor_length
+    sunk = body[actor_end:].decode() or None
+    action = ACTIONS[action]
+    return Record(timestamp, body[_FIXED.size:actor_end].decode(), action, row, col,
+                  RESULTS[result] if action == "Attack" else None, sunk)
+
+
+def iter_records(stream, chunk_size=64 * 1024):
+    """Yields every Record in an open binary log, reading it in chunks and stopping at a truncated tail."""
+    if stream.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Not a match log")
+    data = b""
+    while True:
+        chunk = stream.read(chunk_size)
+        data += chunk
+        offset = 0
+        while offset + _LENGTH.size <= len(data):
+            (length,) = _LENGTH.unpack_from(data, offset)
+            end = offset + _LENGTH.size + length
+            if end > len(data):
+                break
+            yield decode_record(data[offset + _LENGTH.size:end])
+            offset = end
+        data = data[offset:]
+        if not chunk:
+            return  # anything left over was cut off in the middle of a write
+
+
+def read_log(path):
+    with open(path, "rb") as stream:
+        return list(iter_records(stream))
+
+
+def entries(records):
+    """The attacks as the dicts log_action used to keep."""
+    return [{"actor": record.actor, "action": record.action, "position": (record.row, record.col),
+             "result": record.result.capitalize()} for record in records if record.action == "Attack"]
+
+
+def to_text(records):
+    """Renders records in the text log format: one line per attack, then the full movement logs."""
+    records = [record for record in records if record.action == "Attack"]
+    lines = [f"{record.actor} performed {record.action} at position {(record.row, record.col)}"
+             f" with result: {record.result.capitalize()}\n" for record in records]
+    lines.append("\n--- Full Movement Logs ---\n")
+    lines.extend(f"{entry}\n" for entry in entries(records))
+    return "".join(lines)
+
+
+class MatchLog:
+    """Writer for one match log file, fed through a bounded queue.
+
+    write() only encodes the record and queues it; a writer thread gathers
+    queued records into batches, writes them once batch_bytes have built up
+    or flush_interval seconds have passed, and flushes the file. When the
+    queue is full, when_full picks the backpressure: "block" waits, "drop"
+    counts the record in `dropped` and loses it, and "coalesce" keeps records
+    on the game side and queues them as one item when room frees up. Held
+    back records are capped at max_pending bytes; once a record would go past
+    that, "coalesce" waits for room as "block" does. close() drains
+    everything and is safe to call more than once.
+    """
+
+    def __init__(self, path, flush_interval=0.5, max_queue=4096, when_full="block", batch_bytes=64 * 1024,
+                 max_pending=1024 * 1024):
+        if when_full not in WHEN_FULL:
+            raise ValueError(f"when_full must be one of {WHEN_FULL}, not {when_full!r}")
+        self.path = path
+        self.flush_interval = flush_interval
+        self.when_full = when_full
+        self.batch_bytes = batch_bytes
+        self.queue = queue.Queue(max_queue)
+        self.max_pending = max_pending
+        self.pending = bytearray()  # records held back by "coalesce", at most max_pending bytes
+        self.records = 0
+        self.dropped = 0
+        self.closed = False
+        self.file = open(path, "xb")  # never overwrite another session's log
+        self.file.write(MAGIC)
+        self.writer = threading.Thread(target=self._drain, name="matchlog", daemon=True)
+        self.writer.start()
+
+    def write(self, actor, row, col, result, sunk=None, action="Attack"):
+        self._queue(encode_record(actor, row, col, result, sunk, action=action))
+
+    def start_match(self, player, difficulty, rows, cols):
+        self._queue(encode_record(player, rows, cols, None, difficulty, action="Start"))
+
+    def end_match(self, winner):
+        self._queue(encode_record(winner, 0, 0, None, action="End"))
+
+    def _queue(self, record):
+        self.records += 1
+        if self.when_full == "block":
+            self.queue.put(record)
+            return
+        if self.pending:
+            record = bytes(self.pending + record)
+        try:
+            self.queue.put_nowait(record)
+            self.pending.clear()
+        except queue.Full:
+            if self.when_full == "drop":
+                self.dropped += 1
+            elif len(record) > self.max_pending:
+                self.queue.put(record)
+                self.pending.clear()
+            else:
+                self.pending[:] = record
+
+    def _drain(self):
+        batch = bytearray()
+        last_flush = time.monotonic()
+        done = False
+        while not done:
+            timeout = max(0.0, last_flush + self.flush_interval - time.monotonic())
+            try:
+                item = self.queue.get(timeout=timeout)
+                if item is None:
+                    done = True
+                else:
+                    batch += item
+            except queue.Empty:
+                pass
+            if batch and (done or len(batch) >= self.batch_bytes
+                          or time.monotonic() - last_flush >= self.flush_interval):
+                self.file.write(batch)
+                self.file.flush()
+                batch.clear()
+            if time.monotonic() - last_flush >= self.flush_interval:
+                last_flush = time.monotonic()
+
+    def close(self):
+        """Queues whatever is held back, waits for the writer to write it all, and closes the file."""
+        if self.closed:
+            return
+        self.closed = True
+        if self.pending:
+            self.queue.put(bytes(self.pending))
+            self.pending.clear()
+        self.queue.put(None)
+        self.writer.join()
+        self.file.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Converts a binary match log to the text log format.")
+    parser.add_argument("log")
+    parser.add_argument("-o", "--output", help="text file to write (default: standard output)")
+    args = parser.parse_args(argv)
+    text = to_text(read_log(args.log))
+    if args.output:
+        with open(args.output, "w") as output:
+            output.write(text)
+    else:
+        sys.stdout.write(text)
+
+
+if __name__ == "__main__":
+    main()
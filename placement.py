@@ -0,0 +1,119 @@
+"""Random fleet placement from precomputed placement masks.
+
+Every in-bounds placement of a ship length is built once per board size as a
+bitboard mask and cached in a PlacementIndex, together with a reverse index
+from each cell to the placements covering it. Validating, snapping and
+counting placements become lookups, and placing a ship draws uniformly from
+the placements that do not overlap the ships already down instead of retrying
+random spots with no bound on the number of attempts.
+"""
+import random
+from collections import namedtuple
+from functools import lru_cache
+
+from bitboard import mask_indices, ship_mask
+
+# Blind draws from the full placement list before filtering it; an accepted
+# draw is still uniform over the legal placements.
+QUICK_TRIES = 8
+# Fleets restarted from scratch before giving up on a board that is too crowded
+MAX_RESTARTS = 100
+
+
+# One way to put a ship on the board; indices are the cell indices it covers
+Placement = namedtuple("Placement", "mask row col horizontal indices")
+
+
+class PlacementIndex:
+    """Every placement of one ship length on one board size.
+
+    Placements can be looked up by orientation, by starting cell, or through
+    the reverse index from a cell to every placement that covers it.
+    """
+
+    def __init__(self, rows, cols, size):
+        self.rows = rows
+        self.cols = cols
+        self.size = size
+        self.horizontal = tuple(self._build(row, col, True)
+                                for row in range(rows) for col in range(cols - size + 1))
+        if size > 1:
+            self.vertical = tuple(self._build(row, col, False)
+                                  for row in range(rows - size + 1) for col in range(cols))
+        else:
+            self.vertical = ()  # a one-cell ship has no second orientation
+        self.all = self.horizontal + self.vertical
+        self.by_start = {(p.row, p.col, p.horizontal): p for p in self.all}
+        covering = [[] for _ in range(rows * cols)]
+        for p in self.all:
+            for index in p.indices:
+                covering[index].append(p)
+        self.by_cell = tuple(tuple(found) for found in covering)
+
+    def _build(self, row, col, horizontal):
+        mask = ship_mask(row, col, self.size, horizontal, self.cols)
+        return Placement(mask, row, col, horizontal, tuple(mask_indices(mask)))
+
+    def oriented(self, horizontal):
+        return self.horizontal if horizontal or self.size == 1 else self.vertical
+
+    def at(self, row, col, horizontal):
+        """The placement starting at (row, col), or None if it leaves the board."""
+        if self.size == 1:
+            horizontal = True
+        return self.by_start.get((row, col, horizontal))
+
+    def covering(self, row, col):
+        """Every placement that covers (row, col)."""
+        return self.by_cell[row * self.cols + col]
+
+
+@lru_cache(maxsize=None)
+def placement_index(rows, cols, size):
+    """The shared PlacementIndex for this board size and ship length."""
+    return PlacementIndex(rows, cols, size)
+
+
+def placements(rows, cols, size):
+    """Every in-bounds placement of a ship of this size."""
+    return placement_index(rows, cols, size).all
+
+
+def sample_placement(rows, cols, size, occupied=0, rng=random):
+    """Draws one placement uniformly from those that avoid the occupied mask, or None."""
+    candidates = placements(rows, cols, size)
+    if not candidates:
+        return None
+    for _ in range(QUICK_TRIES):
+        candidate = rng.choice(candidates)
+        if not candidate.mask & occupied:
+            return candidate
+    legal = [candidate for candidate in candidates if not candidate.mask & occupied]
+    return rng.choice(legal) if legal else None
+
+
+def sample_fleet(rows, cols, sizes, rng=random, occupied=0):
+    """Places ships of the given sizes one after another and returns their placements.
+
+    Each ship is uniform over the spots left by the ships before it. If a
+    ship has nowhere to go the fleet is started again.
+    """
+    for _ in range(MAX_RESTARTS):
+        fleet_mask = occupied
+        fleet = []
+        for size in sizes:
+            chosen = sample_placement(rows, cols, size, fleet_mask, rng)
+            if chosen is None:
+                break
+            fleet.append(chosen)
+            fleet_mask |= chosen.mask
+        else:
+            return fleet
+    raise ValueError(f"Could not fit ships {list(sizes)} on a {rows}x{cols} board")
+
+
+def sample_fleets(count, rows, cols, sizes, rng=random, occupied=0):
+    """Yields `count` independent fleets, each a list of placements as in sample_fleet."""
+    sizes = list(sizes)
+    for _ in range(count):
+        yield sample_fleet(rows, cols, sizes, rng, occupied)
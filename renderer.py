@@ -0,0 +1,349 @@
+"""Event-driven frame loop that only pushes changed screen regions, a cache
+for the static layers the screens are drawn on, and a zoomable board view.
+
+Screens block in wait_events() until the player does something instead of
+spinning, mark the regions their change touched with mark_dirty(), and call
+render() with a function that draws the whole scene. The scene is clipped to
+each dirty region, so only those pixels are redrawn, and only those regions
+are handed to pygame.display.update().
+"""
+from collections import OrderedDict
+
+import pygame
+
+import fonts
+from engine import row_label
+
+
+class FrameLoop:
+    def __init__(self, screen):
+        self.screen = screen
+        self.dirty = []
+        self.full_redraw = True
+
+    def wait_events(self, timeout=0):
+        """Sleeps until at least one event arrives (or timeout ms pass) and returns all pending events."""
+        first = pygame.event.wait(timeout) if timeout else pygame.event.wait()
+        events = [] if first.type == pygame.NOEVENT else [first]
+        events.extend(pygame.event.get())
+        return events
+
+    def mark_dirty(self, *rects):
+        for rect in rects:
+            self.dirty.append(pygame.Rect(rect))
+
+    def mark_all(self):
+        self.full_redraw = True
+
+    def render(self, draw):
+        """Redraws what changed since the last render and pushes it to the display."""
+        if self.full_redraw:
+            draw()
+            pygame.display.update()
+        elif self.dirty:
+            regions = self.dirty
+            screen_rect = self.screen.get_rect()
+            for region in regions:
+                self.screen.set_clip(region.clip(screen_rect))
+                draw()
+            self.screen.set_clip(None)
+            pygame.display.update(regions)
+        self.full_redraw = False
+        self.dirty = []
+
+
+class LayerCache:
+    """Static surfaces drawn once and reused until their key changes.
+
+    A layer is looked up by name; the key holds whatever the drawing depends
+    on, such as the cell size and the window size, and the layer is rebuilt
+    only when that key differs from the cached one.
+    """
+
+    def __init__(self):
+        self.layers = {}  # name -> (key, surface)
+
+    def get(self, name, key, build):
+        cached = self.layers.get(name)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        surface = build()
+        self.layers[name] = (key, surface)
+        return surface
+
+    def clear(self):
+        self.layers.clear()
+
+
+def nice_step(minimum):
+    """Smallest of 1, 2, 5, 10, 20, 50, ... that is at least `minimum`."""
+    step = 1
+    while step < minimum:
+        step = step * 5 // 2 if str(step).startswith("2") else step * 2
+    return step
+
+
+def zoom_levels(rows, cols, width, height, largest=33):
+    """Cell sizes a board view can zoom through, from the one that fits the viewport up to `largest`."""
+    fit = max(1, min(largest, width // cols, height // rows))
+    levels = [fit]
+    while levels[-1] * 2 < largest * 3 // 4:
+        levels.append(levels[-1] * 2)
+    if levels[-1] < largest:
+        levels.append(largest)
+    return levels
+
+
+class BoardView:
+    """Pannable, zoomable view of one board that only draws what is on screen.
+
+    The board is cut into tiles of about TILE_PIXELS pixels, each rendered the
+    first time it scrolls into view at a zoom level and kept in an LRU cache.
+    Ships are painted into the tiles when they are built and shot markers are
+    stamped into every cached tile that holds the cell, so a frame is a blit
+    of the few tiles that cover the viewport plus the labels of the rows and
+    columns in sight, however large the board is.
+    """
+
+    TILE_PIXELS = 256
+    LABEL_MARGIN = 30  # room left and above the viewport for the labels
+    MIN_LINE_GAP = 6  # pixels between drawn grid lines once the cells get tiny
+
+    def __init__(self, rows, cols, rect, levels, line_color=(255, 255, 255), cell_color=None,
+                 label_font='Arial', label_color=(255, 255, 255), label_size=30, max_bytes=64 * 1024 * 1024):
+        self.rows = rows
+        self.cols = cols
+        self.levels = list(levels)
+        self.level = 0
+        # The viewport never grows past the whole board at the closest zoom
+        self.rect = pygame.Rect(rect.x, rect.y, min(rect.width, cols * self.levels[-1]),
+                                min(rect.height, rows * self.levels[-1]))
+        self.scroll_x = 0  # board pixel at the viewport's left edge, at the current zoom
+        self.scroll_y = 0
+        self.line_color = line_color
+        self.cell_color = cell_color
+        self.label_font = label_font
+        self.label_color = label_color
+        self.label_size = label_size
+        self.ships = {}  # (row, col) -> colour painted under the markers
+        self.marks = {}  # (row, col) -> (colour, shape)
+        self.tiles = OrderedDict()  # (cell size, tile row, tile col) -> surface
+        self.max_bytes = max_bytes
+        self.bytes_used = 0
+
+    @property
+    def cell_size(self):
+        return self.levels[self.level]
+
+    def tile_cells(self, cell_size):
+        return max(1, self.TILE_PIXELS // cell_size)
+
+    def area(self):
+        """Screen region the view draws into, labels included."""
+        return pygame.Rect(self.rect.x - self.LABEL_MARGIN, self.rect.y - self.LABEL_MARGIN,
+                           self.rect.width + self.LABEL_MARGIN, self.rect.height + self.LABEL_MARGIN)
+
+    def cell_rect(self, row, col):
+        """The cell's rectangle on screen; it may lie outside the viewport."""
+        size = self.cell_size
+        return pygame.Rect(self.rect.x - self.scroll_x + col * size, self.rect.y - self.scroll_y + row * size,
+                           size, size)
+
+    def cell_at(self, pos):
+        """The (row, col) under a screen position, or None if it is outside the viewport."""
+        if not self.rect.collidepoint(pos):
+            return None
+        col = (pos[0] - self.rect.x + self.scroll_x) // self.cell_size
+        row = (pos[1] - self.rect.y + self.scroll_y) // self.cell_size
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            return row, col
+        return None
+
+    def visible_fraction(self):
+        """(x, y, width, height) of the board in view, each as a fraction of the whole board."""
+        board_width = self.cols * self.cell_size
+        board_height = self.rows * self.cell_size
+        return (self.scroll_x / board_width, self.scroll_y / board_height,
+                min(1, self.rect.width / board_width), min(1, self.rect.height / board_height))
+
+    def _clamp(self):
+        self.scroll_x = max(0, min(self.scroll_x, self.cols * self.cell_size - self.rect.width))
+        self.scroll_y = max(0, min(self.scroll_y, self.rows * self.cell_size - self.rect.height))
+
+    def pan(self, dx, dy):
+        self.scroll_x += dx
+        self.scroll_y += dy
+        self._clamp()
+
+    def center_on(self, fraction_x, fraction_y):
+        """Scrolls so the given point of the board, as fractions of its size, is in the middle."""
+        self.scroll_x = int(fraction_x * self.cols * self.cell_size) - self.rect.width // 2
+        self.scroll_y = int(fraction_y * self.rows * self.cell_size) - self.rect.height // 2
+        self._clamp()
+
+    def zoom(self, steps, anchor=None):
+        """Moves `steps` zoom levels in (or out if negative), keeping the point under `anchor` still."""
+        level = max(0, min(len(self.levels) - 1, self.level + steps))
+        if level == self.level:
+            return False
+        ax, ay = anchor if anchor and self.rect.collidepoint(anchor) else self.rect.center
+        ax -= self.rect.x
+        ay -= self.rect.y
+        scale = self.levels[level] / self.cell_size
+        self.level = level
+        self.scroll_x = int((self.scroll_x + ax) * scale) - ax
+        self.scroll_y = int((self.scroll_y + ay) * scale) - ay
+        self._clamp()
+        return True
+
+    def handle_event(self, event):
+        """Zooms on the mouse wheel and pans on a right or middle button drag; True if the view moved."""
+        if event.type == pygame.MOUSEWHEEL:
+            pos = pygame.mouse.get_pos()
+            return self.rect.collidepoint(pos) and self.zoom(event.y, pos)
+        if event.type == pygame.MOUSEMOTION and (event.buttons[1] or event.buttons[2]):
+            if self.rect.collidepoint(event.pos):
+                before = (self.scroll_x, self.scroll_y)
+                self.pan(-event.rel[0], -event.rel[1])
+                return (self.scroll_x, self.scroll_y) != before
+        return False
+
+    def paint_ship(self, cells, color):
+        for cell in cells:
+            self.ships[cell] = color
+            self._restamp(*cell)
+
+    def stamp(self, row, col, color, shape="square"):
+        """Marks a shot cell; shape is "square" (fills the cell), "dot" or "ring"."""
+        self.marks[(row, col)] = (color, shape)
+        self._restamp(row, col)
+
+    def clear(self):
+        """Forgets every painted ship and shot mark, and the tiles they were drawn on."""
+        self.ships.clear()
+        self.marks.clear()
+        self.tiles.clear()
+        self.bytes_used = 0
+
+    def _restamp(self, row, col):
+        # Draw the cell again in every cached tile that holds it, at each zoom level
+        for size in self.levels:
+            per_tile = self.tile_cells(size)
+            tile = self.tiles.get((size, row // per_tile, col // per_tile))
+            if tile is not None:
+                self._draw_cell(tile, size, row, col, col % per_tile * size, row % per_tile * size)
+
+    def _draw_cell(self, tile, size, row, col, x, y):
+        cell = pygame.Rect(x, y, size, size)
+        ship_color = self.ships.get((row, col))
+        if ship_color is not None:
+            tile.fill(ship_color, cell)
+        mark = self.marks.get((row, col))
+        if mark is not None:
+            color, shape = mark
+            if shape == "square":
+                tile.fill(color, cell)
+            else:
+                pygame.draw.circle(tile, color, cell.center, max(1, size // 3), 0 if shape == "dot" else 2)
+
+    def _build_tile(self, size, tile_row, tile_col):
+        per_tile = self.tile_cells(size)
+        first_row, first_col = tile_row * per_tile, tile_col * per_tile
+        tile_rows = min(per_tile, self.rows - first_row)
+        tile_cols = min(per_tile, self.cols - first_col)
+        tile = pygame.Surface((tile_cols * size, tile_rows * size), pygame.SRCALPHA)
+        if self.cell_color is not None:
+            tile.fill(self.cell_color)
+
+        # Cell outlines: both edges of every cell, or single lines every few cells when they are tiny
+        line_step = nice_step(-(-self.MIN_LINE_GAP // size))
+        width, height = tile.get_size()
+        if line_step == 1:
+            for i in range(tile_cols):
+                pygame.draw.line(tile, self.line_color, (i * size, 0), (i * size, height))
+                pygame.draw.line(tile, self.line_color, (i * size + size - 1, 0), (i * size + size - 1, height))
+            for i in range(tile_rows):
+                pygame.draw.line(tile, self.line_color, (0, i * size), (width, i * size))
+                pygame.draw.line(tile, self.line_color, (0, i * size + size - 1), (width, i * size + size - 1))
+        else:
+            for col in range(first_col, first_col + tile_cols):
+                if col % line_step == 0:
+                    pygame.draw.line(tile, self.line_color, ((col - first_col) * size, 0), ((col - first_col) * size, height))
+            for row in range(first_row, first_row + tile_rows):
+                if row % line_step == 0:
+                    pygame.draw.line(tile, self.line_color, (0, (row - first_row) * size), (width, (row - first_row) * size))
+
+        for (row, col) in self._cells_in(first_row, first_col, tile_rows, tile_cols):
+            self._draw_cell(tile, size, row, col, (col - first_col) * size, (row - first_row) * size)
+        return tile
+
+    def _cells_in(self, first_row, first_col, tile_rows, tile_cols):
+        """Painted or marked cells inside a block of the board."""
+        cells = set()
+        for painted in (self.ships, self.marks):
+            if len(painted) < tile_rows * tile_cols:
+                cells.update(cell for cell in painted
+                             if first_row <= cell[0] < first_row + tile_rows and first_col <= cell[1] < first_col + tile_cols)
+            else:
+                cells.update((row, col) for row in range(first_row, first_row + tile_rows)
+                             for col in range(first_col, first_col + tile_cols) if (row, col) in painted)
+        return cells
+
+    def _tile(self, size, tile_row, tile_col):
+        key = (size, tile_row, tile_col)
+        tile = self.tiles.get(key)
+        if tile is not None:
+            self.tiles.move_to_end(key)
+            return tile
+        tile = self._build_tile(size, tile_row, tile_col)
+        self.tiles[key] = tile
+        self.bytes_used += tile.get_width() * tile.get_height() * tile.get_bytesize()
+        while len(self.tiles) > 1 and self.bytes_used > self.max_bytes:
+            _, evicted = self.tiles.popitem(last=False)
+            self.bytes_used -= evicted.get_width() * evicted.get_height() * evicted.get_bytesize()
+        return tile
+
+    def draw(self, surface):
+        """Blits the tiles under the viewport and the labels of the rows and columns in view."""
+        size = self.cell_size
+        per_tile = self.tile_cells(size)
+        tile_pixels = per_tile * size
+        old_clip = surface.get_clip()
+        surface.set_clip(old_clip.clip(self.rect))
+        first_tile_row, first_tile_col = self.scroll_y // tile_pixels, self.scroll_x // tile_pixels
+        last_tile_row = min((self.scroll_y + self.rect.height - 1) // tile_pixels, (self.rows - 1) // per_tile)
+        last_tile_col = min((self.scroll_x + self.rect.width - 1) // tile_pixels, (self.cols - 1) // per_tile)
+        for tile_row in range(first_tile_row, last_tile_row + 1):
+            for tile_col in range(first_tile_col, last_tile_col + 1):
+                surface.blit(self._tile(size, tile_row, tile_col),
+                             (self.rect.x - self.scroll_x + tile_col * tile_pixels,
+                              self.rect.y - self.scroll_y + tile_row * tile_pixels))
+        surface.set_clip(old_clip)
+        self._draw_labels(surface)
+
+    def _draw_labels(self, surface):
+        size = self.cell_size
+        label_size = min(self.label_size, max(10, size))
+        first_row, last_row = self.scroll_y // size, min(self.rows, (self.scroll_y + self.rect.height - 1) // size + 1)
+        first_col, last_col = self.scroll_x // size, min(self.cols, (self.scroll_x + self.rect.width - 1) // size + 1)
+        widest = fonts.render_text(self.label_font, label_size, str(self.cols), self.label_color)
+        row_step = nice_step(-(-widest.get_height() // size))
+        col_step = nice_step(-(-(widest.get_width() + 4) // size))
+
+        old_clip = surface.get_clip()
+        surface.set_clip(old_clip.clip(pygame.Rect(self.rect.x - self.LABEL_MARGIN, self.rect.y,
+                                                   self.LABEL_MARGIN, self.rect.height)))
+        for row in range(first_row - first_row % row_step, last_row, row_step):
+            label = fonts.render_text(self.label_font, label_size, row_label(row), self.label_color)
+            rect = self.cell_rect(row, 0)
+            surface.blit(label, label.get_rect(midleft=(self.rect.x - self.LABEL_MARGIN, rect.centery)))
+
+        surface.set_clip(old_clip.clip(pygame.Rect(self.rect.x, self.rect.y - self.LABEL_MARGIN,
+                                                   self.rect.width, self.LABEL_MARGIN)))
+        # Numbered 1, 2, ... or, once they have to be spaced out, 5, 10, ...
+        start = col_step - 1 if col_step > 1 else 0
+        for col in range(max(start, first_col - (first_col - start) % col_step), last_col, col_step):
+            label = fonts.render_text(self.label_font, label_size, str(col + 1), self.label_color)
+            rect = self.cell_rect(0, col)
+            surface.blit(label, label.get_rect(center=(rect.centerx, self.rect.y - self.LABEL_MARGIN // 2)))
+        surface.set_clip(old_clip)
@@ -0,0 +1,206 @@
+"""Replay files: everything needed to play a match back shot by shot.
+
+A replay starts with MAGIC and a header, then holds one fixed-size record per
+shot until the end of the file:
+
+    uint16 rows, uint16 cols, uint64 seed, difficulty (uint8 length + UTF-8)
+    the player's fleet, then the computer's, each as
+        uint16 ship count, then per ship: name (uint8 length + UTF-8),
+        uint16 size, uint16 row, uint16 col, uint8 horizontal
+    per shot: uint8 shooter (SHOOTERS), uint16 row, uint16 col,
+        uint32 milliseconds since the match started
+
+Everything is little-endian. Text longer than 255 bytes is cut at the last
+whole character that fits. Results are not stored; they follow from the
+fleets. The seed is the one the match drew the computer's fleet and its AI's
+moves from. Nothing in here imports pygame; replay_viewer.py shows replays.
+"""
+import struct
+import time
+from bisect import bisect_right
+from collections import namedtuple
+
+import engine
+from bitboard import cell_bit, ship_mask
+
+MAGIC = b"BSRPL\x01"
+
+# Who fired a shot; the player fires at the computer's fleet and the other way round
+SHOOTERS = ("Player", "Computer")
+
+# Shots between two snapshots of a Timeline
+SNAPSHOT_EVERY = 64
+
+# Longest difficulty or ship name a uint8 length can hold
+MAX_TEXT_BYTES = 255
+
+_HEADER = struct.Struct("<HHQ")  # rows, cols, seed
+_COUNT = struct.Struct("<H")
+_SHIP = struct.Struct("<HHHB")  # size, row, col, horizontal
+_SHOT = struct.Struct("<BHHI")  # shooter, row, col, milliseconds
+
+Replay = namedtuple("Replay", "rows cols seed difficulty player_ships computer_ships shots")
+Shot = namedtuple("Shot", "shooter row col ms")
+
+
+def _pack_text(text):
+    data = text.encode()
+    if len(data) > MAX_TEXT_BYTES:
+        data = data[:MAX_TEXT_BYTES].decode(errors="ignore").encode()
+    return bytes([len(data)]) + data
+
+
+def _pack_fleet(ships):
+    data = _COUNT.pack(len(ships))
+    for ship in ships:
+        data += _pack_text(ship["name"]) + _SHIP.pack(ship["size"], ship["row"], ship["col"], ship["horizontal"])
+    return data
+
+
+class Recorder:
+    """Writes one match's replay as it is played; close() it when the match ends."""
+
+    def __init__(self, path, rows, cols, seed, difficulty, player_ships, computer_ships):
+        self.path = path
+        self.started = time.monotonic()
+        self.file = open(path, "xb")
+        self.file.write(MAGIC + _HEADER.pack(rows, cols, seed) + _pack_text(difficulty)
+                        + _pack_fleet(player_ships) + _pack_fleet(computer_ships))
+
+    @classmethod
+    def resume(cls, path, elapsed_ms):
+        """Reopens a replay to go on recording a match resumed from a save."""
+        recorder = cls.__new__(cls)
+        recorder.path = path
+        recorder.started = time.monotonic() - elapsed_ms / 1000
+        recorder.file = open(path, "ab")
+        return recorder
+
+    def elapsed_ms(self):
+        return int((time.monotonic() - self.started) * 1000)
+
+    def shot(self, shooter, row, col):
+        self.file.write(_SHOT.pack(SHOOTERS.index(shooter), row, col, self.elapsed_ms()))
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class _Reader:
+    def __init__(self, data):
+        self.data = data
+        self.offset = 0
+
+    def take(self, size):
+        chunk = self.data[self.offset:self.offset + size]
+        if len(chunk) < size:
+            raise ValueError("Replay header is truncated")
+        self.offset += size
+        return chunk
+
+    def unpack(self, layout):
+        return layout.unpack(self.take(layout.size))
+
+    def text(self):
+        return self.take(self.take(1)[0]).decode()
+
+    def fleet(self):
+        (count,) = self.unpack(_COUNT)
+        ships = []
+        for _ in range(count):
+            name = self.text()
+            size, row, col, horizontal = self.unpack(_SHIP)
+            ships.append(engine.make_ship(name, size, row, col, bool(horizontal)))
+        return ships
+
+
+def load(path):
+    """Reads a replay file into a Replay, dropping a shot cut off at the end."""
+    with open(path, "rb") as stream:
+        data = stream.read()
+    if not data.startswith(MAGIC):
+        raise ValueError("Not a replay file")
+    reader = _Reader(data)
+    reader.offset = len(MAGIC)
+    rows, cols, seed = reader.unpack(_HEADER)
+    difficulty = reader.text()
+    player_ships = reader.fleet()
+    computer_ships = reader.fleet()
+    body = data[reader.offset:]
+    shots = [Shot(*fields) for fields in _SHOT.iter_unpack(body[:len(body) - len(body) % _SHOT.size])]
+    return Replay(rows, cols, seed, difficulty, player_ships, computer_ships, shots)
+
+
+class Timeline:
+    """The state of both boards at any turn of a replay.
+
+    A board's state is its hit and miss masks. A snapshot of both is kept
+    every `every` shots, so state_at() starts from the nearest snapshot and
+    applies at most `every` - 1 shots, wherever in the match it is asked.
+    Board 0 is the player's (the computer shoots at it), board 1 the computer's.
+    """
+
+    def __init__(self, replay, every=SNAPSHOT_EVERY):
+        self.replay = replay
+        self.every = every
+        cols = replay.cols
+        self.fleets = (replay.player_ships, replay.computer_ships)
+        self.ship_masks = tuple([ship_mask(ship["row"], ship["col"], ship["size"], ship["horizontal"], cols)
+                                 for ship in ships] for ships in self.fleets)
+        self.occupied = tuple(sum(masks) for masks in self.ship_masks)
+        self.times = [shot.ms for shot in replay.shots]
+
+        state = [[0, 0], [0, 0]]
+        self.snapshots = [self._freeze(state)]
+        for turn, shot in enumerate(replay.shots, 1):
+            self._apply(state, shot)
+            if turn % every == 0:
+                self.snapshots.append(self._freeze(state))
+
+    def __len__(self):
+        return len(self.replay.shots)
+
+    @staticmethod
+    def _freeze(state):
+        return tuple(tuple(board) for board in state)
+
+    def target(self, shot):
+        """The board a shot lands on."""
+        return 1 if shot.shooter == 0 else 0
+
+    def _apply(self, state, shot):
+        board = self.target(shot)
+        bit = cell_bit(shot.row, shot.col, self.replay.cols)
+        state[board][0 if self.occupied[board] & bit else 1] |= bit
+
+    def state_at(self, turn):
+        """((hits, misses) of the player's board, (hits, misses) of the computer's) after `turn` shots."""
+        turn = max(0, min(turn, len(self)))
+        state = [list(board) for board in self.snapshots[turn // self.every]]
+        for shot in self.replay.shots[turn - turn % self.every:turn]:
+            self._apply(state, shot)
+        return self._freeze(state)
+
+    def result(self, turn):
+        """(result, sunk ship or None) of shot number `turn`, counting from 1."""
+        shot = self.replay.shots[turn - 1]
+        board = self.target(shot)
+        hits = self.state_at(turn)[board][0]
+        bit = cell_bit(shot.row, shot.col, self.replay.cols)
+        if not hits & bit:
+            return "miss", None
+        for ship, mask in zip(self.fleets[board], self.ship_masks[board]):
+            if mask & bit:
+                return "hit", ship if hits & mask == mask else None
+        return "hit", None
+
+    def sunk(self, board, hits):
+        """The ships of a board that these hits have sunk."""
+        return [ship for ship, mask in zip(self.fleets[board], self.ship_masks[board]) if hits & mask == mask]
+
+    def turn_at(self, ms):
+        """Number of shots fired by `ms` milliseconds into the match."""
+        return bisect_right(self.times, ms)
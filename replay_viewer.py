@@ -0,0 +1,225 @@
+"""Plays replay files back, or renders them to numbered PNG frames.
+
+    python replay_viewer.py Replay_2024-12-20_16-17-44.bsreplay --speed 10
+    python replay_viewer.py Replay_2024-12-20_16-17-44.bsreplay --speed 100 --frames out --fps 30
+
+Playback follows the times the shots were fired at, sped up 1x to 1000x.
+Space pauses, Left and Right step one shot, Up and Down change the speed,
+Home and End jump to either end and clicking the bar at the bottom seeks
+there; the boards zoom and pan like in the game. Seeking starts from the
+nearest replay.Timeline snapshot, so it is as quick at the last turn as at
+the first. With --frames no window is opened.
+"""
+import argparse
+import os
+
+import pygame
+
+import fonts
+import renderer
+import replay
+from bitboard import mask_cells
+from engine import row_label
+
+WIDTH = 800
+HEIGHT = 600
+SPEEDS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+MAX_CELL_SIZE = 33
+
+BLACK = (0, 0, 0)
+WHITE = (255, 255, 255)
+GREY = (128, 128, 128)
+RED = (255, 0, 0)
+PURPLE = (128, 0, 128)
+SHOT_COLORS = {"hit": RED, "miss": PURPLE}
+
+
+class ReplayScreen:
+    """Both boards of a replay at one turn, with the turn, the speed and a seek bar."""
+
+    def __init__(self, timeline, speed=1):
+        self.timeline = timeline
+        self.speed = speed
+        self.paused = False
+        self.turn = 0
+        self.clock_ms = 0.0  # match time being shown
+        rows, cols = timeline.replay.rows, timeline.replay.cols
+        box = pygame.Rect(0, 100, (WIDTH - 140) // 2, HEIGHT - 140)
+        levels = renderer.zoom_levels(rows, cols, box.width, box.height, MAX_CELL_SIZE)
+        self.views = (renderer.BoardView(rows, cols, box, levels), renderer.BoardView(rows, cols, box, levels))
+        self.views[0].rect.x = 50
+        self.views[1].rect.x = WIDTH - 50 - self.views[1].rect.width
+        self.bar = pygame.Rect(50, HEIGHT - 25, WIDTH - 100, 10)
+        self._rebuild()
+
+    def _rebuild(self):
+        """Redraws both views from the timeline's state at the current turn."""
+        cols = self.timeline.replay.cols
+        for view, ships, (hits, misses) in zip(self.views, self.timeline.fleets, self.timeline.state_at(self.turn)):
+            view.clear()
+            for ship in ships:
+                view.paint_ship(ship["cells"], GREY)
+            for cell in mask_cells(hits, cols):
+                view.stamp(*cell, SHOT_COLORS["hit"])
+            for cell in mask_cells(misses, cols):
+                view.stamp(*cell, SHOT_COLORS["miss"])
+
+    def show(self, turn):
+        """Moves to a turn: short steps forward stamp the new shots, anything else rebuilds."""
+        turn = max(0, min(turn, len(self.timeline)))
+        if self.turn < turn <= self.turn + self.timeline.every:
+            for number in range(self.turn + 1, turn + 1):
+                shot = self.timeline.replay.shots[number - 1]
+                result, _ = self.timeline.result(number)
+                self.views[self.timeline.target(shot)].stamp(shot.row, shot.col, SHOT_COLORS[result])
+            self.turn = turn
+        elif turn != self.turn:
+            self.turn = turn
+            self._rebuild()
+
+    def seek(self, turn):
+        """Jumps to a turn and carries on playing from the moment its shot was fired."""
+        turn = max(0, min(turn, len(self.timeline)))
+        self.clock_ms = self.timeline.times[turn - 1] if turn else 0.0
+        self.show(turn)
+
+    def advance(self, seconds):
+        """Plays `seconds` of wall time at the current speed; returns True if the turn changed."""
+        before = self.turn
+        self.clock_ms += seconds * 1000 * self.speed
+        self.show(self.timeline.turn_at(self.clock_ms))
+        return self.turn != before
+
+    @property
+    def finished(self):
+        return self.turn == len(self.timeline)
+
+    def change_speed(self, steps):
+        index = SPEEDS.index(self.speed) if self.speed in SPEEDS else 0
+        self.speed = SPEEDS[max(0, min(index + steps, len(SPEEDS) - 1))]
+
+    def handle_event(self, event):
+        """Applies a key, click or zoom/pan event; returns True if the screen changed."""
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_SPACE:
+                self.paused = not self.paused
+            elif event.key == pygame.K_RIGHT:
+                self.seek(self.turn + 1)
+            elif event.key == pygame.K_LEFT:
+                self.seek(self.turn - 1)
+            elif event.key == pygame.K_UP:
+                self.change_speed(1)
+            elif event.key == pygame.K_DOWN:
+                self.change_speed(-1)
+            elif event.key == pygame.K_HOME:
+                self.seek(0)
+            elif event.key == pygame.K_END:
+                self.seek(len(self.timeline))
+            else:
+                return False
+            return True
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and self.bar.inflate(0, 10).collidepoint(event.pos):
+            self.seek(round((event.pos[0] - self.bar.x) / self.bar.width * len(self.timeline)))
+            return True
+        return any(view.handle_event(event) for view in self.views)
+
+    def status(self):
+        """Top line: turn, speed and what the last shot did."""
+        text = f"Turn {self.turn}/{len(self.timeline)}  {self.speed}x{'  paused' if self.paused else ''}"
+        if self.turn:
+            shot = self.timeline.replay.shots[self.turn - 1]
+            result, sunk = self.timeline.result(self.turn)
+            text += f"  {replay.SHOOTERS[shot.shooter]}: {row_label(shot.row)}-{shot.col + 1} {result.capitalize()}"
+            if sunk:
+                text += f", {sunk['name']} sunk"
+        return text
+
+    def draw(self, surface):
+        surface.fill(BLACK)
+        status = fonts.render_text('Arial', 26, self.status(), WHITE)
+        surface.blit(status, (WIDTH // 2 - status.get_width() // 2, 10))
+        for view, title in zip(self.views, ("Player", "Computer")):
+            caption = fonts.render_text('Arial', 22, title, WHITE)
+            surface.blit(caption, (view.rect.x, 40))
+            view.draw(surface)
+        pygame.draw.rect(surface, GREY, self.bar)
+        if len(self.timeline):
+            done = self.bar.copy()
+            done.width = self.bar.width * self.turn // len(self.timeline)
+            pygame.draw.rect(surface, WHITE, done)
+
+
+def watch(screen):
+    """Shows a ReplayScreen in a window until it is closed."""
+    window = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Battleships replay")
+    frames = renderer.FrameLoop(window)
+    clock = pygame.time.Clock()
+    while True:
+        frames.render(lambda: screen.draw(window))
+        playing = not screen.paused and not screen.finished
+        for event in frames.wait_events(16 if playing else 0):
+            if event.type == pygame.QUIT:
+                return
+            if screen.handle_event(event):
+                frames.mark_all()
+        seconds = clock.tick() / 1000
+        if playing and not screen.paused and screen.advance(seconds):
+            frames.mark_all()
+
+
+def render_frames(screen, directory, fps, end):
+    """Saves one PNG per 1/fps seconds of playback until turn `end`; returns the frame count."""
+    os.makedirs(directory, exist_ok=True)
+    surface = pygame.Surface((WIDTH, HEIGHT))
+    count = 0
+    while True:
+        screen.draw(surface)
+        pygame.image.save(surface, os.path.join(directory, f"frame_{count:05d}.png"))
+        count += 1
+        if screen.turn >= end:
+            return count
+        screen.advance(1 / fps)
+
+
+def positive_int(text):
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, not {value}")
+    return value
+
+
+def non_negative_int(text):
+    value = int(text)
+    if value < 0:
+        raise argparse.ArgumentTypeError(f"must be 0 or more, not {value}")
+    return value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Plays a Battleships replay back.")
+    parser.add_argument("replay")
+    parser.add_argument("--speed", type=int, default=1, choices=SPEEDS, help="playback speed")
+    parser.add_argument("--start", type=non_negative_int, default=0, help="turn to start from")
+    parser.add_argument("--end", type=non_negative_int, help="turn to stop rendering frames at (default: the last)")
+    parser.add_argument("--frames", metavar="DIR", help="write PNG frames to DIR instead of opening a window")
+    parser.add_argument("--fps", type=positive_int, default=30, help="frames per second of playback for --frames")
+    args = parser.parse_args(argv)
+
+    timeline = replay.Timeline(replay.load(args.replay))
+    if args.frames:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.init()
+    screen = ReplayScreen(timeline, args.speed)
+    screen.seek(args.start)
+    if args.frames:
+        end = len(timeline) if args.end is None else min(args.end, len(timeline))
+        count = render_frames(screen, args.frames, args.fps, end)
+        print(f"Wrote {count} frames to {args.frames}")
+    else:
+        watch(screen)
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
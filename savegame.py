@@ -0,0 +1,150 @@
+"""Save games: the whole state of a singleplayer match in one small file.
+
+A save is a JSON object tagged with FORMAT and VERSION, in two parts:
+
+    "static": the player's name, the difficulty, the board size, the fleet,
+        the match seed, both fleets' positions and the replay file
+    "dynamic": hit and miss masks of both boards (hex), whose turn it is,
+        the AI's save_state(), the match RNG's state and the replay's clock
+
+Writes go to a temporary file that is then renamed over the save, so a crash
+mid-write leaves the previous save whole. Autosave encodes the static part
+once per match and only the dynamic part after each turn. Loading is a JSON
+parse and a few mask operations, well under a millisecond for a 10x10 match.
+"""
+import base64
+import json
+import os
+import random
+import struct
+from collections import namedtuple
+
+import ai
+import engine
+
+FORMAT = "battleships-save"
+VERSION = 1
+
+# The Mersenne Twister state: 624 words and a position
+_RNG_WORDS = struct.Struct("<625I")
+
+State = namedtuple("State", "player difficulty rows cols fleet seed player_ships computer_ships replay "
+                            "player_board computer_board player_turn ai rng replay_ms")
+
+
+def save_path(player_name):
+    return f"{player_name}.bssave"
+
+
+def capture(player, difficulty, seed, player_board, computer_board, player_turn, computer_ai, rng, fleet,
+            recorder=None):
+    """A State of a match in progress, to be encoded straight away: it shares the ship dicts and AI lists."""
+    return State(player, difficulty, player_board.rows, player_board.cols, list(fleet), seed,
+                 player_board.ships, computer_board.ships, recorder.path if recorder else None,
+                 (player_board.bits.hit_mask, player_board.bits.miss_mask),
+                 (computer_board.bits.hit_mask, computer_board.bits.miss_mask),
+                 player_turn, computer_ai.save_state(), rng.getstate(),
+                 recorder.elapsed_ms() if recorder else 0)
+
+
+def _ship(ship):
+    return [ship["name"], ship["size"], ship["row"], ship["col"], ship["horizontal"]]
+
+
+def _static(state):
+    return json.dumps({"player": state.player, "difficulty": state.difficulty, "rows": state.rows,
+                       "cols": state.cols, "fleet": state.fleet, "seed": state.seed,
+                       "player_ships": [_ship(ship) for ship in state.player_ships],
+                       "computer_ships": [_ship(ship) for ship in state.computer_ships],
+                       "replay": state.replay}, separators=(",", ":"))
+
+
+def _dynamic(state):
+    version, words, gauss = state.rng
+    return json.dumps({"player_board": [format(mask, "x") for mask in state.player_board],
+                       "computer_board": [format(mask, "x") for mask in state.computer_board],
+                       "player_turn": state.player_turn, "ai": state.ai,
+                       "rng": [version, base64.b64encode(_RNG_WORDS.pack(*words)).decode(), gauss],
+                       "replay_ms": state.replay_ms}, separators=(",", ":"))
+
+
+def encode(state, static=None):
+    """The save file text; pass the cached _static() of this match to skip re-encoding it."""
+    return (f'{{"format":"{FORMAT}","version":{VERSION},"static":{static or _static(state)},'
+            f'"dynamic":{_dynamic(state)}}}')
+
+
+def decode(text):
+    """The State in a save file's text; raises ValueError if it is not a save or is damaged."""
+    data = json.loads(text)
+    if not isinstance(data, dict) or data.get("format") != FORMAT:
+        raise ValueError("Not a Battleships save")
+    if data.get("version") != VERSION:
+        raise ValueError(f"Save format version {data.get('version')} is not supported (expected {VERSION})")
+    try:
+        return _decode_state(data["static"], data["dynamic"])
+    except (KeyError, TypeError, IndexError, AttributeError, struct.error) as error:
+        raise ValueError(f"The save is damaged ({type(error).__name__}: {error})") from None
+
+
+def _decode_state(static, dynamic):
+    version, words, gauss = dynamic["rng"]
+    return State(static["player"], static["difficulty"], static["rows"], static["cols"],
+                 [tuple(ship) for ship in static["fleet"]], static["seed"],
+                 [engine.make_ship(*ship) for ship in static["player_ships"]],
+                 [engine.make_ship(*ship) for ship in static["computer_ships"]], static["replay"],
+                 tuple(int(mask, 16) for mask in dynamic["player_board"]),
+                 tuple(int(mask, 16) for mask in dynamic["computer_board"]),
+                 dynamic["player_turn"], dynamic["ai"],
+                 (version, _RNG_WORDS.unpack(base64.b64decode(words)), gauss), dynamic["replay_ms"])
+
+
+def _write(path, text):
+    temporary = path + ".tmp"
+    with open(temporary, "w") as file:
+        file.write(text)
+    os.replace(temporary, path)
+
+
+def save(path, state):
+    _write(path, encode(state))
+
+
+def load(path):
+    """The State saved at path, or None if there is no save there."""
+    try:
+        with open(path) as file:
+            return decode(file.read())
+    except FileNotFoundError:
+        return None
+
+
+def resume(state):
+    """Rebuilds a saved match: (player_board, computer_board, computer_ai, rng)."""
+    player_board = engine.board_from_ships(state.player_ships, state.rows, state.cols)
+    player_board.restore_shots(*state.player_board)
+    computer_board = engine.board_from_ships(state.computer_ships, state.rows, state.cols)
+    computer_board.restore_shots(*state.computer_board)
+    rng = random.Random()
+    rng.setstate(state.rng)
+    computer_ai = ai.STRATEGIES[state.difficulty](state.rows, state.cols, state.fleet, rng=rng)
+    computer_ai.load_state(state.ai)
+    return player_board, computer_board, computer_ai, rng
+
+
+class Autosave:
+    """Rewrites one match's save after every turn, encoding its static part only once."""
+
+    def __init__(self, path):
+        self.path = path
+        self.static = None
+
+    def write(self, state):
+        if self.static is None:
+            self.static = _static(state)
+        _write(self.path, encode(state, self.static))
+
+    def discard(self):
+        """Removes the save once the match is over."""
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -1,10 +1,18 @@
+import argparse
 import pygame
 import sys
 import math
 import random
+import time
 from datetime import datetime
 import pytz
 
+import animation
+import engine
+import fonts
+import placement
+import renderer
+
 # Initialize Pygame
 pygame.init()
 
@@ -30,10 +38,21 @@ ISLAND_GREEN = (34, 139, 34)
 GRID_BG = (0, 45, 98)  # Darker blue for grid background
 WATER_BLUE = (65, 105, 225)  # Blue for water cells
 
-# Font settings
-title_font = pygame.font.Font(None, 74)
-menu_font = pygame.font.Font(None, 50)
-datetime_font = pygame.font.Font(None, 24)
+# Font sizes, rendered through the shared fonts.render_text cache
+TITLE_SIZE = 74
+MENU_SIZE = 50
+DATETIME_SIZE = 24
+
+# Space kept around a grid's cached layer for the border and the labels
+GRID_MARGIN = 40
+
+# Default cells per side of both grids, up to engine.MAX_BOARD; the cells shrink to keep a grid 400px wide
+GRID_SIZE = 10
+GRID_SPAN = 400
+
+# Default ships each side gets, as (name, size) in the order they are placed; --fleet replaces them
+FLEET = [("Air Carrier", 5), ("Battleship", 4), ("Destroyer", 4), ("Cruiser", 3), ("Submarine", 2)]
+SHIP_COLORS = [(100, 100, 100), (72, 72, 72), (128, 128, 128), (169, 169, 169), (192, 192, 192)]
 
 
 class Button:
@@ -50,7 +69,7 @@ class Button:
         pygame.draw.rect(surface, color, self.rect, border_radius=12)
         pygame.draw.rect(surface, WHITE, self.rect, 2, border_radius=12)
 
-        text_surface = menu_font.render(self.text, True, WHITE)
+        text_surface = fonts.render_text(None, MENU_SIZE, self.text, WHITE)
         text_rect = text_surface.get_rect(center=self.rect.center)
         surface.blit(text_surface, text_rect)
 
@@ -64,23 +83,33 @@ class Button:
         return False
 
 class Bird:
+    # Wings up and wings down, shared by every bird
+    strip = None
+
     def __init__(self, x, y):
         self.x = x
         self.y = y
         self.wing_up = True
         self.wing_timer = 0
         self.speed = random.uniform(2, 4)
+        if Bird.strip is None:
+            Bird.strip = animation.SpriteStrip(2, (-2, -7, 24, 19), Bird.draw_frame)
 
-    def draw(self, surface):
+    @staticmethod
+    def draw_frame(surface, x, y, frame):
         # Draw bird body
-        pygame.draw.ellipse(surface, WHITE, (self.x, self.y, 20, 10))
+        pygame.draw.ellipse(surface, WHITE, (x, y, 20, 10))
 
         # Draw wings
-        wing_height = -5 if self.wing_up else 5
-        pygame.draw.line(surface, WHITE, (self.x + 10, self.y + 5),
-                         (self.x + 15, self.y + wing_height), 2)
-        pygame.draw.line(surface, WHITE, (self.x + 10, self.y + 5),
-                         (self.x + 5, self.y + wing_height), 2)
+        wing_height = -5 if frame == 0 else 5
+        pygame.draw.line(surface, WHITE, (x + 10, y + 5), (x + 15, y + wing_height), 2)
+        pygame.draw.line(surface, WHITE, (x + 10, y + 5), (x + 5, y + wing_height), 2)
+
+    def draw(self, surface):
+        Bird.strip.blit(surface, self.x, self.y, 0 if self.wing_up else 1)
+
+    def rect(self):
+        return Bird.strip.rect(self.x, self.y)
 
     def update(self):
         self.x -= self.speed
@@ -94,23 +123,31 @@ class Bird:
             self.y = random.randint(50, 200)
 
 class Wave:
+    # Frames in one swell, about 0.05 radians each
+    FRAMES = 126
+    strip = None
+
     def __init__(self, x, y):
         self.x = x
         self.y = y
-        self.time = random.random() * math.pi * 2
+        self.frame = random.randrange(self.FRAMES)
+        if Wave.strip is None:
+            Wave.strip = animation.SpriteStrip(self.FRAMES, (-2, -12, 85, 25), Wave.draw_frame)
+
+    @classmethod
+    def draw_frame(cls, surface, x, y, frame):
+        time = frame * math.pi * 2 / cls.FRAMES
+        points = [(x + i * 20, y + math.sin(time + i * 0.5) * 10) for i in range(5)]
+        pygame.draw.lines(surface, WAVE_BLUE, False, points, 3)
 
     def draw(self, surface):
-        points = []
-        for i in range(5):
-            offset_x = i * 20
-            offset_y = math.sin(self.time + i * 0.5) * 10
-            points.append((self.x + offset_x, self.y + offset_y))
+        Wave.strip.blit(surface, self.x, self.y, self.frame)
 
-        if len(points) >= 2:
-            pygame.draw.lines(surface, WAVE_BLUE, False, points, 3)
+    def rect(self):
+        return Wave.strip.rect(self.x, self.y)
 
     def update(self):
-        self.time += 0.05
+        self.frame = (self.frame + 1) % self.FRAMES
 
 class WreckedShip:
     def __init__(self, x, y):
@@ -134,32 +171,26 @@ class WreckedShip:
             ((0, 20), (85, 20)),
             ((0, 30), (88, 30))
         ]
+        # The wreck never moves, so it is rotated and drawn once
+        points = self.rotate(self.ship_points + self.mast_points +
+                             [point for plank in self.plank_lines for point in plank], 0, 0)
+        left = math.floor(min(x for x, _ in points)) - 3
+        top = math.floor(min(y for _, y in points)) - 3
+        bounds = (left, top, math.ceil(max(x for x, _ in points)) + 4 - left,
+                  math.ceil(max(y for _, y in points)) + 4 - top)
+        self.sprite = animation.Sprite(bounds, self.draw_ship)
+
+    def rotate(self, points, x, y):
+        cos, sin = math.cos(math.radians(self.angle)), math.sin(math.radians(self.angle))
+        return [(px * cos - py * sin + x, px * sin + py * cos + y) for px, py in points]
 
     def draw(self, surface):
-        rotated_ship = []
-        rotated_mast = []
-        rotated_planks = []
-
-        # Rotate ship points
-        for point in self.ship_points:
-            x = point[0] * math.cos(math.radians(self.angle)) - point[1] * math.sin(math.radians(self.angle))
-            y = point[0] * math.sin(math.radians(self.angle)) + point[1] * math.cos(math.radians(self.angle))
-            rotated_ship.append((x + self.x, y + self.y))
-
-        # Rotate mast points
-        for point in self.mast_points:
-            x = point[0] * math.cos(math.radians(self.angle)) - point[1] * math.sin(math.radians(self.angle))
-            y = point[0] * math.sin(math.radians(self.angle)) + point[1] * math.cos(math.radians(self.angle))
-            rotated_mast.append((x + self.x, y + self.y))
-
-        # Rotate plank lines
-        for plank in self.plank_lines:
-            rotated_plank = []
-            for point in plank:
-                x = point[0] * math.cos(math.radians(self.angle)) - point[1] * math.sin(math.radians(self.angle))
-                y = point[0] * math.sin(math.radians(self.angle)) + point[1] * math.cos(math.radians(self.angle))
-                rotated_plank.append((x + self.x, y + self.y))
-            rotated_planks.append(rotated_plank)
+        self.sprite.blit(surface, self.x, self.y)
+
+    def draw_ship(self, surface, x, y):
+        rotated_ship = self.rotate(self.ship_points, x, y)
+        rotated_mast = self.rotate(self.mast_points, x, y)
+        rotated_planks = [self.rotate(plank, x, y) for plank in self.plank_lines]
 
         # Draw ship hull with wooden texture
         pygame.draw.polygon(surface, WOOD_BROWN, rotated_ship)
@@ -175,28 +206,38 @@ class WreckedShip:
         pygame.draw.lines(surface, DARK_WOOD, False, rotated_mast, 1)  # Outline
 
 class GearIcon:
+    # Directions of the 8 teeth, rounded so the upright ones are exactly upright
+    TEETH = [(round(math.cos(i * math.pi / 4), 12), round(math.sin(i * math.pi / 4), 12)) for i in range(8)]
+
     def __init__(self, x, y, size):
         self.x = x
         self.y = y
         self.size = size
         self.rect = pygame.Rect(x - size / 2, y - size / 2, size, size)
         self.is_hovered = False
+        # Drawn once in each colour, for plain and hovered
+        reach = size // 2 + 7
+        bounds = (-reach, -reach, reach * 2 + 1, reach * 2 + 1)
+        self.sprites = {color: animation.Sprite(bounds, lambda surface, x, y, color=color:
+                                                self.draw_gear(surface, x, y, color))
+                        for color in (WHITE, LIGHT_BLUE)}
 
     def draw(self, surface):
+        self.sprites[LIGHT_BLUE if self.is_hovered else WHITE].blit(surface, self.x, self.y)
+
+    def draw_gear(self, surface, x, y, color):
         # Draw outer circle
-        color = LIGHT_BLUE if self.is_hovered else WHITE
-        pygame.draw.circle(surface, color, (self.x, self.y), self.size / 2, 2)
+        pygame.draw.circle(surface, color, (x, y), self.size / 2, 2)
 
         # Draw inner circle
-        pygame.draw.circle(surface, color, (self.x, self.y), self.size / 4, 2)
+        pygame.draw.circle(surface, color, (x, y), self.size / 4, 2)
 
         # Draw teeth
-        for i in range(8):
-            angle = i * math.pi / 4
-            start_x = self.x + (self.size / 2 - 5) * math.cos(angle)
-            start_y = self.y + (self.size / 2 - 5) * math.sin(angle)
-            end_x = self.x + (self.size / 2 + 5) * math.cos(angle)
-            end_y = self.y + (self.size / 2 + 5) * math.sin(angle)
+        for cos, sin in self.TEETH:
+            start_x = x + (self.size / 2 - 5) * cos
+            start_y = y + (self.size / 2 - 5) * sin
+            end_x = x + (self.size / 2 + 5) * cos
+            end_y = y + (self.size / 2 + 5) * sin
             pygame.draw.line(surface, color, (start_x, start_y), (end_x, end_y), 2)
 
     def handle_event(self, event):
@@ -208,6 +249,53 @@ class GearIcon:
                 return True
         return False
 
+class StatusOverlay:
+    """Clock, user login and version badges in the menu's corners.
+
+    The time zone is resolved once and the clock badge is only rendered again
+    when the second it shows changes; the other two badges never change, so
+    they are drawn once.
+    """
+
+    def __init__(self, login, version):
+        self.timezone = pytz.timezone('Africa/Cairo')  # This gives GMT+2
+        self.font = fonts.get_font(None, DATETIME_SIZE)
+        self.second = None
+        self.clock_badge = None
+        self.clock_rect = pygame.Rect(5, 5, 0, 25)
+
+        login_surface = fonts.render_text(None, DATETIME_SIZE, f"Current User's Login: {login}", WHITE)
+        self.login_badge = self.badge(login_surface, login_surface.get_height() + 10)
+        self.version_surface = fonts.render_text(None, DATETIME_SIZE, version, GRAY)
+        self.version_rect = self.version_surface.get_rect(bottomright=(SCREEN_WIDTH - 10, SCREEN_HEIGHT - 10))
+
+    def badge(self, text_surface, height):
+        # Text on a navy box with a white outline
+        badge = pygame.Surface((text_surface.get_width() + 10, height)).convert()
+        badge.fill(NAVY_BLUE)
+        pygame.draw.rect(badge, WHITE, badge.get_rect(), 1)
+        badge.blit(text_surface, (5, 5))
+        return badge
+
+    def update(self):
+        """Renders the clock again if its second has passed; returns the area to redraw, or None."""
+        second = int(time.time())
+        if second == self.second:
+            return None
+        self.second = second
+        local_time = datetime.fromtimestamp(second, self.timezone)
+        # Every second's text is new, so it skips the shared text cache
+        text = self.font.render(f"Local Time (GMT+2): {local_time.strftime('%Y-%m-%d %H:%M:%S')}", True, WHITE)
+        previous = self.clock_rect
+        self.clock_badge = self.badge(text, 25)
+        self.clock_rect = self.clock_badge.get_rect(topleft=(5, 5))
+        return self.clock_rect.union(previous)
+
+    def draw(self, surface):
+        surface.blit(self.clock_badge, self.clock_rect)
+        surface.blit(self.login_badge, (5, 30))
+        surface.blit(self.version_surface, self.version_rect)
+
 class Island:
     def __init__(self, x, y):
         self.x = x
@@ -258,66 +346,165 @@ class Ship:
         self.is_vertical = False
         self.is_placed = False
         self.cells = []
+        self.damage = 0  # bit i set once cell i of the ship has been hit
         self.sprite = BattleshipSprite(size, name)
 
     def draw(self, surface, grid_x, grid_y, cell_size):
         if not self.is_placed:
             self.sprite.is_vertical = self.is_vertical
-            self.sprite.draw(surface, self.x, self.y, cell_size, self.color)
+            self.sprite.draw(surface, self.x, self.y, cell_size, self.color, self.damage)
         else:
             cell_x = grid_x + self.cells[0][0] * cell_size
             cell_y = grid_y + self.cells[0][1] * cell_size
             self.sprite.is_vertical = self.is_vertical
-            self.sprite.draw(surface, cell_x, cell_y, cell_size, self.color)
+            self.sprite.draw(surface, cell_x, cell_y, cell_size, self.color, self.damage)
+
 
 
+def build_ships(fleet):
+    """One Ship per (name, size), shaded in turn from SHIP_COLORS."""
+    return [Ship(name, size, SHIP_COLORS[i % len(SHIP_COLORS)]) for i, (name, size) in enumerate(fleet)]
+
 
 class Grid:
-    def __init__(self, x, y, cell_size=40):
+    def __init__(self, x, y, cell_size=None, grid_size=GRID_SIZE):
         self.x = x
         self.y = y
-        self.cell_size = cell_size
-        self.grid_size = 10
+        self.cell_size = cell_size or max(1, GRID_SPAN // grid_size)
+        self.grid_size = grid_size
         self.cells = [[None for _ in range(self.grid_size)] for _ in range(self.grid_size)]
         self.hits = [[None for _ in range(self.grid_size)] for _ in range(self.grid_size)]
-        self.letters = 'ABCDEFGHIJ'
+        self.letters = [engine.row_label(i) for i in range(self.grid_size)]
+        self.changes = 0  # bumped whenever ships are placed, so overviews know to redraw
+        self.shot_log = []  # (row, col, hit) in the order the shots landed
+        self.layers = renderer.LayerCache()
+        # Cells, labels and shot markers; zoomable in battle, shown whole while placing ships
+        span = self.cell_size * self.grid_size
+        self.view = renderer.BoardView(self.grid_size, self.grid_size, pygame.Rect(x, y, span, span),
+                                       renderer.zoom_levels(self.grid_size, self.grid_size, span, span, 40),
+                                       cell_color=WATER_BLUE, label_font=None, label_size=DATETIME_SIZE)
 
     def draw(self, surface):
+        # Background and border only change with the cell or grid size
+        layer = self.layers.get("frame", (self.cell_size, self.grid_size), self._build_layer)
+        surface.blit(layer, (self.x - GRID_MARGIN, self.y - GRID_MARGIN))
+        self.view.draw(surface)
+
+    def mark_shot(self, row, col, hit):
+        # Record the shot and stamp its marker once into the view's tiles
+        self.hits[row][col] = hit
+        self.shot_log.append((row, col, hit))
+        ship = self.cells[row][col]
+        if hit and ship is not None:
+            ship.damage |= 1 << ship.cells.index((col, row))
+        if hit:
+            self.view.stamp(row, col, (255, 0, 0), "dot")
+        else:
+            self.view.stamp(row, col, WHITE, "ring")
+
+    def _build_layer(self):
+        span = self.cell_size * self.grid_size
+        layer = pygame.Surface((span + GRID_MARGIN * 2, span + GRID_MARGIN * 2), pygame.SRCALPHA)
+        x = y = GRID_MARGIN  # grid origin inside the layer
+
         # Draw grid background with water effect
-        grid_rect = pygame.Rect(self.x - 20, self.y - 20,
-                                self.cell_size * self.grid_size + 40,
-                                self.cell_size * self.grid_size + 40)
+        grid_rect = pygame.Rect(x - 20, y - 20, span + 40, span + 40)
 
         # Draw outer border with gradient effect
-        pygame.draw.rect(surface, GRID_BG, grid_rect)
+        pygame.draw.rect(layer, GRID_BG, grid_rect)
         for i in range(5):
-            border_rect = pygame.Rect(self.x - i, self.y - i,
-                                      self.cell_size * self.grid_size + i * 2,
-                                      self.cell_size * self.grid_size + i * 2)
-            pygame.draw.rect(surface, WATER_BLUE, border_rect, 2)
-
-        # Draw cells
-        for row in range(self.grid_size):
-            for col in range(self.grid_size):
-                cell_x = self.x + col * self.cell_size
-                cell_y = self.y + row * self.cell_size
-                cell_rect = pygame.Rect(cell_x, cell_y, self.cell_size, self.cell_size)
-                pygame.draw.rect(surface, WATER_BLUE, cell_rect)
-                pygame.draw.rect(surface, WHITE, cell_rect, 1)
-
-        # Draw labels
-        for i in range(self.grid_size):
-            # Numbers
-            num_text = datetime_font.render(str(i + 1), True, WHITE)
-            num_rect = num_text.get_rect(center=(self.x + (i + 0.5) * self.cell_size,
-                                                 self.y - 20))
-            surface.blit(num_text, num_rect)
-
-            # Letters
-            letter_text = datetime_font.render(self.letters[i], True, WHITE)
-            letter_rect = letter_text.get_rect(center=(self.x - 20,
-                                                       self.y + (i + 0.5) * self.cell_size))
-            surface.blit(letter_text, letter_rect)
+            border_rect = pygame.Rect(x - i, y - i, span + i * 2, span + i * 2)
+            pygame.draw.rect(layer, WATER_BLUE, border_rect, 2)
+        return layer
+
+class SpriteAtlas:
+    """Ship art drawn once per (type, size, orientation, colour, damage) and packed into shared pages.
+
+    Entries are packed left to right in shelves on PAGE_SIZE pages, so drawing
+    a ship is one blit of an area of a page. The art has no soft edges, so the
+    pages use an RLE colour key instead of per-pixel alpha, which blits several
+    times faster. SDL has to decode and re-encode a whole RLE page to draw on
+    it, so new entries are drawn in place on a plain colour-keyed canvas, and
+    blitted from it, while a page is still filling; its RLE copy is only made
+    once the page is used again without growing, so a burst of new entries
+    costs one encoding. Everything is for one cell size: asking for another
+    drops the pages and they fill up again as ships are drawn.
+    """
+
+    PAGE_SIZE = 1024
+    TRANSPARENT = (255, 0, 255)
+
+    def __init__(self):
+        self.cell_size = None
+        self.pages = []
+        self.entries = {}  # key -> (page, area, padding); a page is [canvas, RLE copy or None]
+        self.shelf_x = self.shelf_y = self.shelf_height = 0
+
+    def padding(self, cell_size):
+        # Towers, periscopes and radar stick out up to half a cell, plus the 2px outlines
+        return int(cell_size * 0.5) + 3
+
+    def draw(self, surface, sprite, x, y, cell_size, color, damage=0):
+        if cell_size != self.cell_size:
+            self.cell_size = cell_size
+            self.pages = []
+            self.entries = {}
+            self.shelf_x = self.shelf_y = self.shelf_height = 0
+        key = (sprite.ship_type, sprite.size, sprite.is_vertical, tuple(color), damage)
+        entry = self.entries.get(key)
+        if entry is None:
+            entry = self.entries[key] = self._render(sprite, cell_size, color, damage)
+        elif entry[0][1] is None:
+            entry[0][1] = entry[0][0].copy()
+            entry[0][1].set_colorkey(self.TRANSPARENT, pygame.RLEACCEL)
+        page, area, pad = entry
+        surface.blit(page[1] if page[1] is not None else page[0], (x - pad, y - pad), area)
+
+    def _page(self, width, height):
+        canvas = pygame.Surface((width, height))
+        canvas.fill(self.TRANSPARENT)
+        canvas.set_colorkey(self.TRANSPARENT)
+        return [canvas, None]
+
+    def _slot(self, width, height):
+        """Finds room for a width x height entry, opening a new shelf or page when needed."""
+        if width > self.PAGE_SIZE or height > self.PAGE_SIZE:
+            return self._page(width, height), pygame.Rect(0, 0, width, height)
+        if self.pages and self.shelf_x + width > self.PAGE_SIZE:
+            self.shelf_x, self.shelf_y, self.shelf_height = 0, self.shelf_y + self.shelf_height, 0
+        if not self.pages or self.shelf_y + height > self.PAGE_SIZE:
+            self.pages.append(self._page(self.PAGE_SIZE, self.PAGE_SIZE))
+            self.shelf_x = self.shelf_y = self.shelf_height = 0
+        area = pygame.Rect(self.shelf_x, self.shelf_y, width, height)
+        self.shelf_x += width
+        self.shelf_height = max(self.shelf_height, height)
+        return self.pages[-1], area
+
+    def _render(self, sprite, cell_size, color, damage):
+        pad = self.padding(cell_size)
+        length, breadth = cell_size * sprite.size + pad * 2, cell_size + pad * 2
+        page, area = self._slot(*((breadth, length) if sprite.is_vertical else (length, breadth)))
+        canvas = page[0]
+        canvas.set_clip(area)
+        x, y = area.x + pad, area.y + pad
+        if sprite.is_vertical:
+            sprite._draw_vertical_ship(canvas, x, y, cell_size, color)
+        else:
+            sprite._draw_horizontal_ship(canvas, x, y, cell_size, color)
+        # Scorch marks on the hit cells
+        for i in range(sprite.size):
+            if damage >> i & 1:
+                center = (x + cell_size // 2, y + cell_size * i + cell_size // 2) if sprite.is_vertical \
+                    else (x + cell_size * i + cell_size // 2, y + cell_size // 2)
+                pygame.draw.circle(canvas, (40, 40, 40), center, max(2, cell_size // 3))
+                pygame.draw.circle(canvas, (255, 120, 0), center, max(1, cell_size // 6))
+        canvas.set_clip(None)
+        page[1] = None  # out of date until the page stops growing
+        return page, area, pad
+
+
+ship_atlas = SpriteAtlas()
+
 
 class BattleshipSprite:
     def __init__(self, size, ship_type):
@@ -325,11 +512,9 @@ class BattleshipSprite:
         self.ship_type = ship_type
         self.is_vertical = False
 
-    def draw(self, surface, x, y, cell_size, color):
-        if self.is_vertical:
-            self._draw_vertical_ship(surface, x, y, cell_size, color)
-        else:
-            self._draw_horizontal_ship(surface, x, y, cell_size, color)
+    def draw(self, surface, x, y, cell_size, color, damage=0):
+        # One blit from the shared atlas; the _draw_* methods only run the first time a look is needed
+        ship_atlas.draw(surface, self, x, y, cell_size, color, damage)
 
     def _draw_horizontal_ship(self, surface, x, y, cell_size, color):
         # Main hull
@@ -526,7 +711,7 @@ class StartButton:
         pygame.draw.rect(surface, WHITE, self.rect, 3, border_radius=15)
 
         # Draw text
-        text = menu_font.render("START", True, WHITE)
+        text = fonts.render_text(None, MENU_SIZE, "START", WHITE)
         text_rect = text.get_rect(center=self.rect.center)
         surface.blit(text, text_rect)
 
@@ -549,7 +734,7 @@ class StartButton:
 
 
 class Minimap:
-    def __init__(self, player_grid, x, y, radius=50):
+    def __init__(self, player_grid, x, y, radius=50, view=None, show_ships=True):
         self.player_grid = player_grid
         self.x = x
         self.y = y
@@ -558,6 +743,38 @@ class Minimap:
         self.expanded_size = 300
         self.transition_time = 0
         self.is_hovered = False
+        # With a view, the minimap is its overview: the area in sight is outlined and a click moves it
+        self.view = view
+        self.show_ships = show_ships
+        self.overview = None  # one pixel per cell
+        self.overview_changes = None
+        self.shots_drawn = 0
+        self.scaled = None
+
+    def _overview(self):
+        grid = self.player_grid
+        if grid.changes != self.overview_changes:
+            # Ships moved: redraw every cell
+            self.overview = pygame.Surface((grid.grid_size, grid.grid_size))
+            self.overview.fill(NAVY_BLUE)
+            if self.show_ships:
+                for i in range(grid.grid_size):
+                    for j in range(grid.grid_size):
+                        if grid.cells[i][j] is not None:
+                            self.overview.set_at((j, i), grid.cells[i][j].color)
+            self.overview_changes = grid.changes
+            self.shots_drawn = 0
+        if self.shots_drawn < len(grid.shot_log):
+            # Only the shots fired since the last frame
+            for row, col, hit in grid.shot_log[self.shots_drawn:]:
+                self.overview.set_at((col, row), (255, 0, 0) if hit else WHITE)
+            self.shots_drawn = len(grid.shot_log)
+            self.scaled = None
+        return self.overview
+
+    def _map_rect(self, current_size):
+        side = int(current_size * 2 - 20)
+        return pygame.Rect(int(self.x - current_size + 10), int(self.y - current_size + 10), side, side)
 
     def draw(self, surface):
         mouse_pos = pygame.mouse.get_pos()
@@ -575,71 +792,74 @@ class Minimap:
         pygame.draw.circle(surface, NAVY_BLUE, (self.x, self.y), current_size)
         pygame.draw.circle(surface, WHITE, (self.x, self.y), current_size, 2)
 
-        # Calculate grid cell size based on current display size
-        cell_size = (current_size * 2 - 20) / 10
-
-        # Draw miniature grid
-        for i in range(10):
-            for j in range(10):
-                cell_x = self.x - current_size + 10 + j * cell_size
-                cell_y = self.y - current_size + 10 + i * cell_size
-                cell_rect = pygame.Rect(cell_x, cell_y, cell_size, cell_size)
+        # Draw the miniature grid, scaled from the overview only when its size or content changes
+        map_rect = self._map_rect(current_size)
+        overview = self._overview()
+        if self.scaled is None or self.scaled.get_size() != map_rect.size:
+            self.scaled = pygame.transform.scale(overview, map_rect.size)
+        surface.blit(self.scaled, map_rect)
+
+        grid_size = self.player_grid.grid_size
+        cell_size = map_rect.width / grid_size
+        if cell_size >= 4:
+            for i in range(grid_size + 1):
+                pygame.draw.line(surface, WHITE, (map_rect.x + i * cell_size, map_rect.y),
+                                 (map_rect.x + i * cell_size, map_rect.bottom))
+                pygame.draw.line(surface, WHITE, (map_rect.x, map_rect.y + i * cell_size),
+                                 (map_rect.right, map_rect.y + i * cell_size))
+
+        if self.view:
+            fx, fy, fw, fh = self.view.visible_fraction()
+            if fw < 1 or fh < 1:
+                pygame.draw.rect(surface, (255, 255, 0),
+                                 (map_rect.x + fx * map_rect.width, map_rect.y + fy * map_rect.height,
+                                  max(2, fw * map_rect.width), max(2, fh * map_rect.height)), 1)
 
-                # Draw cell content
-                if self.player_grid.cells[i][j] is not None:
-                    pygame.draw.rect(surface, self.player_grid.cells[i][j].color, cell_rect)
-                pygame.draw.rect(surface, WHITE, cell_rect, 1)
+    def handle_event(self, event):
+        # Clicking the overview moves the view there
+        if self.view and event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            current_size = self.radius + (self.expanded_size - self.radius) * self.transition_time
+            map_rect = self._map_rect(current_size)
+            if map_rect.collidepoint(event.pos):
+                self.view.center_on((event.pos[0] - map_rect.x) / map_rect.width,
+                                    (event.pos[1] - map_rect.y) / map_rect.height)
+                return True
+        return False
 
 
 class ComputerGrid(Grid):
-    def __init__(self, x, y, cell_size=40):
-        super().__init__(x, y, cell_size)
+    def __init__(self, x, y, cell_size=None, grid_size=GRID_SIZE, fleet=FLEET):
+        super().__init__(x, y, cell_size, grid_size)
         self.hits = [[None for _ in range(self.grid_size)] for _ in range(self.grid_size)]
+        self.fleet = fleet
         self.place_computer_ships()
 
     def place_computer_ships(self):
-        ships = [
-            Ship("Air Carrier", 5, (100, 100, 100)),
-            Ship("Battleship", 4, (72, 72, 72)),
-            Ship("Destroyer", 4, (128, 128, 128)),
-            Ship("Cruiser", 3, (169, 169, 169)),
-            Ship("Submarine", 2, (192, 192, 192))
-        ]
+        ships = build_ships(self.fleet)
 
-        for ship in ships:
-            placed = False
-            while not placed:
-                # Random position and orientation
-                x = random.randint(0, self.grid_size - 1)
-                y = random.randint(0, self.grid_size - 1)
-                ship.is_vertical = random.choice([True, False])
-
-                # Check if placement is valid
-                can_place = True
-                ship_cells = []
-
-                for i in range(ship.size):
-                    new_x = x + (0 if ship.is_vertical else i)
-                    new_y = y + (i if ship.is_vertical else 0)
-
-                    if (new_x >= self.grid_size or new_y >= self.grid_size or
-                            self.cells[new_y][new_x] is not None):
-                        can_place = False
-                        break
-                    ship_cells.append((new_x, new_y))
-
-                if can_place:
-                    for cell_x, cell_y in ship_cells:
-                        self.cells[cell_y][cell_x] = ship
-                    ship.cells = ship_cells
-                    ship.is_placed = True
-                    placed = True
-
-
-def battle_screen(player_grid):
+        layout = placement.sample_fleet(self.grid_size, self.grid_size, [ship.size for ship in ships])
+        for ship, spot in zip(ships, layout):
+            ship.is_vertical = not spot.horizontal
+            ship_cells = []
+            for i in range(ship.size):
+                new_x = spot.col + (0 if ship.is_vertical else i)
+                new_y = spot.row + (i if ship.is_vertical else 0)
+                ship_cells.append((new_x, new_y))
+
+            for cell_x, cell_y in ship_cells:
+                self.cells[cell_y][cell_x] = ship
+            ship.cells = ship_cells
+            ship.is_placed = True
+        self.changes += 1
+
+
+def battle_screen(player_grid, fleet=FLEET):
     clock = pygame.time.Clock()
-    computer_grid = ComputerGrid(SCREEN_WIDTH // 2 - 200, SCREEN_HEIGHT // 2 - 200)
+    computer_grid = ComputerGrid(SCREEN_WIDTH // 2 - 200, SCREEN_HEIGHT // 2 - 200, grid_size=player_grid.grid_size,
+                                 fleet=fleet)
     minimap = Minimap(player_grid, 80, 80)
+    # Overview of the computer's waters: shows the shots and the part of the board in view
+    overview = Minimap(computer_grid, SCREEN_WIDTH - 80, 80, view=computer_grid.view, show_ships=False)
     player_turn = True
     game_over = False
 
@@ -649,17 +869,17 @@ def battle_screen(player_grid):
                 pygame.quit()
                 sys.exit()
 
-            if event.type == pygame.MOUSEBUTTONDOWN and player_turn:
-                mouse_x, mouse_y = pygame.mouse.get_pos()
-                grid_x = (mouse_x - computer_grid.x) // computer_grid.cell_size
-                grid_y = (mouse_y - computer_grid.y) // computer_grid.cell_size
+            # Mouse wheel zooms the computer's grid, a right or middle drag pans it
+            if overview.handle_event(event) or computer_grid.view.handle_event(event):
+                continue
 
-                if (0 <= grid_x < computer_grid.grid_size and
-                        0 <= grid_y < computer_grid.grid_size and
-                        computer_grid.hits[grid_y][grid_x] is None):
+            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and player_turn:
+                cell = computer_grid.view.cell_at(event.pos)
+                if cell and computer_grid.hits[cell[0]][cell[1]] is None:
                     # Mark hit or miss
+                    grid_y, grid_x = cell
                     hit = computer_grid.cells[grid_y][grid_x] is not None
-                    computer_grid.hits[grid_y][grid_x] = hit
+                    computer_grid.mark_shot(grid_y, grid_x, hit)
                     player_turn = False
 
         # Computer's turn
@@ -669,7 +889,7 @@ def battle_screen(player_grid):
                 x = random.randint(0, player_grid.grid_size - 1)
                 y = random.randint(0, player_grid.grid_size - 1)
                 if player_grid.hits[y][x] is None:
-                    player_grid.hits[y][x] = player_grid.cells[y][x] is not None
+                    player_grid.mark_shot(y, x, player_grid.cells[y][x] is not None)
                     player_turn = True
                     break
 
@@ -678,52 +898,36 @@ def battle_screen(player_grid):
 
         # Draw title
         title_text = "BATTLE PHASE"
-        title_surface = title_font.render(title_text, True, WHITE)
+        title_surface = fonts.render_text(None, TITLE_SIZE, title_text, WHITE)
         title_rect = title_surface.get_rect(center=(SCREEN_WIDTH // 2, 50))
         screen.blit(title_surface, title_rect)
 
         # Draw computer's grid
         computer_grid.draw(screen)
 
-        for y in range(computer_grid.grid_size):
-            for x in range(computer_grid.grid_size):
-                if computer_grid.hits[y][x] is not None:
-                    center_x = computer_grid.x + x * computer_grid.cell_size + computer_grid.cell_size // 2
-                    center_y = computer_grid.y + y * computer_grid.cell_size + computer_grid.cell_size // 2
-                    if computer_grid.hits[y][x]:  # Hit
-                        pygame.draw.circle(screen, (255, 0, 0), (center_x, center_y),
-                                           computer_grid.cell_size // 3)
-                    else:  # Miss
-                        pygame.draw.circle(screen, WHITE, (center_x, center_y),
-                                           computer_grid.cell_size // 3, 2)
-
-        # Draw minimap
+        # Draw minimap and the overview
         minimap.draw(screen)
+        overview.draw(screen)
 
         # Draw turn indicator
         turn_text = "Your Turn" if player_turn else "Computer's Turn"
-        turn_surface = menu_font.render(turn_text, True, WHITE)
+        turn_surface = fonts.render_text(None, MENU_SIZE, turn_text, WHITE)
         turn_rect = turn_surface.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 50))
         screen.blit(turn_surface, turn_rect)
 
         pygame.display.flip()
         clock.tick(60)
 
-def place_ships_screen():
+def place_ships_screen(grid_size=GRID_SIZE, fleet=FLEET):
     clock = pygame.time.Clock()
-    grid = Grid(SCREEN_WIDTH // 4, SCREEN_HEIGHT // 4)
+    grid = Grid(SCREEN_WIDTH // 4, SCREEN_HEIGHT // 4, grid_size=grid_size)
 
     # Create ships with different colors and proper names
-    ships = [
-        Ship("Air Carrier", 5, (100, 100, 100)),
-        Ship("Battleship", 4, (72, 72, 72)),
-        Ship("Destroyer", 4, (128, 128, 128)),
-        Ship("Cruiser", 3, (169, 169, 169)),
-        Ship("Submarine", 2, (192, 192, 192))
-    ]
+    ships = build_ships(fleet)
 
     current_ship = 0
     selected_ship = None
+    taken = 0  # bitmask of the cells the placed ships cover
 
     # Create start button
     start_button = StartButton(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 100)
@@ -748,7 +952,7 @@ def place_ships_screen():
                 # Handle start button
                 if start_button.handle_event(event):
                     if current_ship >= len(ships):  # Only transition if all ships are placed
-                        battle_screen(grid)
+                        battle_screen(grid, fleet)
                         return
                 if current_ship < len(ships):
                     mouse_x, mouse_y = pygame.mouse.get_pos()
@@ -762,34 +966,19 @@ def place_ships_screen():
                         grid_x = (mouse_x - grid.x) // grid.cell_size
                         grid_y = (mouse_y - grid.y) // grid.cell_size
 
-                        # Check if placement is valid
-                        can_place = True
-                        ship_cells = []
-
-                        for i in range(ship.size):
-                            if ship.is_vertical:
-                                if grid_y + i >= grid.grid_size:
-                                    can_place = False
-                                    break
-                                if grid.cells[grid_y + i][grid_x] is not None:
-                                    can_place = False
-                                    break
-                                ship_cells.append((grid_x, grid_y + i))
-                            else:
-                                if grid_x + i >= grid.grid_size:
-                                    can_place = False
-                                    break
-                                if grid.cells[grid_y][grid_x + i] is not None:
-                                    can_place = False
-                                    break
-                                ship_cells.append((grid_x + i, grid_y))
-
-                        if can_place:
+                        # Check if placement is valid: on the board and clear of the other ships
+                        spot = placement.placement_index(grid.grid_size, grid.grid_size, ship.size).at(
+                            grid_y, grid_x, not ship.is_vertical)
+
+                        if spot and not spot.mask & taken:
                             # Place the ship
+                            ship_cells = [divmod(index, grid.grid_size)[::-1] for index in spot.indices]
+                            taken |= spot.mask
                             for cell in ship_cells:
                                 grid.cells[cell[1]][cell[0]] = ship
                             ship.cells = ship_cells
                             ship.is_placed = True
+                            grid.changes += 1
                             current_ship += 1
 
                             if current_ship < len(ships):
@@ -819,7 +1008,7 @@ def place_ships_screen():
         ]
 
         for i, text in enumerate(instructions):
-            text_surface = datetime_font.render(text, True, WHITE)
+            text_surface = fonts.render_text(None, DATETIME_SIZE, text, WHITE)
             screen.blit(text_surface, (20, 20 + i * 30))
 
         # Draw grid
@@ -841,7 +1030,7 @@ def place_ships_screen():
         clock.tick(60)
 
 
-def main_menu():
+def main_menu(grid_size=GRID_SIZE, fleet=FLEET):
     clock = pygame.time.Clock()
 
     # Create buttons
@@ -864,45 +1053,26 @@ def main_menu():
     island = Island(SCREEN_WIDTH - 250, SCREEN_HEIGHT // 2 - 20)
     ship = WreckedShip(SCREEN_WIDTH - 200, SCREEN_HEIGHT // 2 + 30)
 
-    while True:
-        # Get UTC time and convert to GMT+2
-        utc_time = datetime.now(pytz.UTC)
-        gmt2_timezone = pytz.timezone('Africa/Cairo')  # This gives GMT+2
-        gmt2_time = utc_time.astimezone(gmt2_timezone)
-
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
+    # Sky, sea and island never change, so they are drawn once
+    background = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)).convert()
+    background.fill(SKY_BLUE)
+    pygame.draw.rect(background, SEA_BLUE, (0, SCREEN_HEIGHT // 2, SCREEN_WIDTH, SCREEN_HEIGHT // 2))
+    island.draw(background)
 
-            # Handle button events
-            for button in buttons:
-                if button.handle_event(event):
-                    if button.text == "Start Game":
-                        place_ships_screen()
-                    elif button.text == "Credits":
-                        print("Showing credits...")
-                    elif button.text == "Quit":
-                        pygame.quit()
-                        sys.exit()
-            # Handle gear icon events
-            if gear.handle_event(event):
-                print("Opening settings...")
+    # Clock, login and version. The badges are drawn whole, so a bird's redraw
+    # region cutting through an outline, which pygame gets wrong, can't spoil them.
+    status = StatusOverlay("youssefghgg", "v1.0.0")
 
-        # Update birds and waves
-        for bird in birds:
-            bird.update()
-        for wave in waves:
-            wave.update()
+    # Only the waves' band, the birds and the clock change from frame to frame
+    frames = renderer.FrameLoop(screen)
+    wave_band = waves[0].rect().unionall([wave.rect() for wave in waves[1:]])
 
+    def draw():
         # Draw everything in the correct order
-        # 1. Draw background (sky and sea)
-        screen.fill(SKY_BLUE)  # Fill the entire screen with sky color
-        pygame.draw.rect(surface=screen, color=SEA_BLUE,
-                         rect=(0, SCREEN_HEIGHT // 2, SCREEN_WIDTH, SCREEN_HEIGHT // 2))
+        # 1. Draw background (sky, sea and island)
+        screen.blit(background, (0, 0))
 
         # 2. Draw background elements
-        island.draw(screen)  # Draw island first
         for wave in waves:  # Draw waves
             wave.draw(screen)
         ship.draw(screen)  # Draw ship on top of waves
@@ -913,8 +1083,8 @@ def main_menu():
 
         # 4. Draw UI elements
         # Draw title with shadow effect
-        title_shadow = title_font.render("BATTLESHIP", True, (0, 0, 64))
-        title_text = title_font.render("BATTLESHIP", True, WHITE)
+        title_shadow = fonts.render_text(None, TITLE_SIZE, "BATTLESHIP", (0, 0, 64))
+        title_text = fonts.render_text(None, TITLE_SIZE, "BATTLESHIP", WHITE)
         shadow_rect = title_shadow.get_rect(center=(SCREEN_WIDTH // 2 + 2, 102))
         title_rect = title_text.get_rect(center=(SCREEN_WIDTH // 2, 100))
         screen.blit(title_shadow, shadow_rect)
@@ -927,35 +1097,65 @@ def main_menu():
         # Draw gear icon
         gear.draw(screen)
 
-        # Draw GMT+2 time
-        gmt2_text = f"Local Time (GMT+2): {gmt2_time.strftime('%Y-%m-%d %H:%M:%S')}"
-        gmt2_surface = datetime_font.render(gmt2_text, True, WHITE)
-        gmt2_rect = gmt2_surface.get_rect(topleft=(10, 10))
-
-        # Draw background for time
-        pygame.draw.rect(screen, NAVY_BLUE, (5, 5, gmt2_rect.width + 10, 25))
-        pygame.draw.rect(screen, WHITE, (5, 5, gmt2_rect.width + 10, 25), 1)
+        # Draw time, user login and version number
+        status.draw(screen)
 
-        # Draw time
-        screen.blit(gmt2_surface, gmt2_rect)
-
-        # Draw user login with background
-        login_text = f"Current User's Login: youssefghgg"
-        login_surface = datetime_font.render(login_text, True, WHITE)
-        login_rect = login_surface.get_rect(topleft=(10, 35))
-        pygame.draw.rect(screen, NAVY_BLUE, (5, 30, login_rect.width + 10, login_rect.height + 10))
-        pygame.draw.rect(screen, WHITE, (5, 30, login_rect.width + 10, login_rect.height + 10), 1)
-        screen.blit(login_surface, login_rect)
+    while True:
+        hovered = [button.is_hovered for button in buttons] + [gear.is_hovered]
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                sys.exit()
 
-        # Add version number
-        version_text = "v1.0.0"
-        version_surface = datetime_font.render(version_text, True, GRAY)
-        version_rect = version_surface.get_rect(bottomright=(SCREEN_WIDTH - 10, SCREEN_HEIGHT - 10))
-        screen.blit(version_surface, version_rect)
+            # Handle button events
+            for button in buttons:
+                if button.handle_event(event):
+                    if button.text == "Start Game":
+                        place_ships_screen(grid_size, fleet)
+                        frames.mark_all()
+                    elif button.text == "Credits":
+                        print("Showing credits...")
+                    elif button.text == "Quit":
+                        pygame.quit()
+                        sys.exit()
+            # Handle gear icon events
+            if gear.handle_event(event):
+                print("Opening settings...")
+        if [button.is_hovered for button in buttons] + [gear.is_hovered] != hovered:
+            frames.mark_all()
 
-        pygame.display.flip()
+        # Update birds and waves, redrawing where the birds were and where they are now
+        birds_area = birds[0].rect().unionall([bird.rect() for bird in birds[1:]])
+        for bird in birds:
+            bird.update()
+        for wave in waves:
+            wave.update()
+        birds_area.union_ip(birds[0].rect().unionall([bird.rect() for bird in birds[1:]]))
+
+        # The clock only needs redrawing when its second has passed
+        clock_area = status.update()
+        if clock_area:
+            frames.mark_dirty(clock_area)
+        frames.mark_dirty(wave_band, birds_area)
+        frames.render(draw)
         clock.tick(60)
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="The new-look Battleships menu, placement and battle screens.")
+    parser.add_argument("--board", default=f"{GRID_SIZE}x{GRID_SIZE}",
+                        help=f"square board size as SIZExSIZE, up to {engine.MAX_BOARD}x{engine.MAX_BOARD}")
+    parser.add_argument("--fleet", help='ships as [NAME:]SIZE[xCOUNT], comma-separated, e.g. "5,4x2,3x3,2x4"')
+    args = parser.parse_args(argv)
+    try:
+        rows, cols = engine.parse_board(args.board)
+        fleet = engine.parse_fleet(args.fleet) if args.fleet else FLEET
+        engine.check_setup(rows, cols, fleet)
+    except ValueError as error:
+        parser.error(str(error))
+    if rows != cols:
+        parser.error(f"the grids here are square, so --board must be SIZExSIZE, not {rows}x{cols}")
+    main_menu(rows, fleet)
+
 
 if __name__ == "__main__":
-    main_menu()
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,44 @@
+import random
+
+import pytest
+
+import ai
+import engine
+
+
+@pytest.mark.parametrize("strategy", sorted(ai.STRATEGIES))
+def test_every_strategy_sinks_a_fleet_without_repeating_a_shot(strategy):
+    rng = random.Random(9)
+    board = engine.board_from_ships(engine.random_fleet(rng=rng))
+    player = ai.STRATEGIES[strategy](rng=rng)
+    while not board.all_ships_sunk():
+        row, col = player.choose_target()
+        assert board.is_untouched(row, col)
+        player.observe(row, col, *board.fire(row, col))
+    assert board.shots_fired <= engine.ROWS * engine.COLS
+
+
+def test_monte_carlo_samples_never_leave_a_fully_hit_ship_afloat():
+    player = ai.MonteCarloAI(samples=500, time_budget=0, rng=random.Random(1))
+    player.observe(4, 4, "hit")
+    player.choose_target()
+    player.observe(4, 5, "hit")
+    player.choose_target()
+    assert player.layouts
+    for _, layout in player.layouts:
+        assert all(mask & ~player.hit_mask for size, mask in layout)
+
+
+def test_ai_state_survives_a_save():
+    rng = random.Random(5)
+    board = engine.board_from_ships(engine.random_fleet(rng=rng))
+    for strategy, kind in ai.STRATEGIES.items():
+        player = kind(rng=random.Random(1))
+        for _ in range(25):
+            row, col = player.choose_target()
+            player.observe(row, col, *board.fire(row, col))
+        copy = kind(rng=random.Random(2))
+        copy.load_state(player.save_state())
+        player.rng, copy.rng = random.Random(3), random.Random(3)
+        assert copy.choose_target() == player.choose_target(), strategy
+        board = engine.board_from_ships(engine.random_fleet(rng=rng))
@@ -0,0 +1,55 @@
+import argparse
+import datetime
+
+import pytest
+
+import archive
+import matchlog
+
+
+def write_log(path, matches):
+    log = matchlog.MatchLog(str(path))
+    for player, difficulty, winner, shots in matches:
+        log.start_match(player, difficulty, 10, 10)
+        for shot in range(shots):
+            log.write("Player" if shot % 2 else "Computer", shot // 10, shot % 10, "hit" if shot % 3 else "miss")
+        if winner:
+            log.end_match(winner)
+    log.close()
+
+
+def filters(**values):
+    fields = ("player", "difficulty", "outcome", "min_player_shots", "max_player_shots", "min_computer_shots",
+              "max_computer_shots", "since", "until", "limit")
+    return argparse.Namespace(**{field: values.get(field) for field in fields}, by=values.get("by", "player"))
+
+
+def test_ingest_indexes_each_match_once(tmp_path):
+    first = tmp_path / "Game_Log_2024-12-20_16-17-44.bslog"
+    second = tmp_path / "Game_Log_2024-12-21_10-00-00.bslog"
+    write_log(first, [("Ann", "hard", "Player", 40), ("Ann", "expert", "Computer", 60)])
+    write_log(second, [("Bob", "hard", None, 9)])
+    db = archive.connect(str(tmp_path / "matches.sqlite"))
+    assert archive.ingest(db, [str(first), str(second)]) == (2, 3)
+    assert archive.ingest(db, [str(first), str(second)]) == (0, 0)
+
+    ann = {row[4]: row for row in archive.query(db, filters(player="Ann"))}
+    assert (ann["hard"][5], ann["hard"][6] + ann["hard"][8]) == ("win", 40)
+    assert (ann["expert"][5], ann["expert"][6] + ann["expert"][8]) == ("loss", 60)
+    (bob,) = archive.query(db, filters(player="Bob"))
+    assert bob[5] == "abandoned" and bob[6] + bob[8] == 9
+    assert [row[0] for row in archive.query(db, filters(difficulty="hard", min_computer_shots=15))] == [str(first)]
+    assert sorted(row[:2] for row in archive.stats(db, filters(by="player"))) == [("Ann", 2), ("Bob", 1)]
+    db.close()
+
+
+@pytest.mark.parametrize("stamp, started", [("2024-12-20_16-17", datetime.datetime(2024, 12, 20, 16, 17)),
+                                            ("2024-12-20_16-17-44", datetime.datetime(2024, 12, 20, 16, 17, 44))])
+def test_old_text_logs_are_read(tmp_path, stamp, started):
+    path = tmp_path / f"Game_Log_{stamp}.txt"
+    lines = [f"Player performed Attack at position ({shot // 10}, {shot % 10}) with result: Hit\n"
+             for shot in range(archive.FLEET_CELLS)]
+    path.write_text("".join(lines) + "\n--- Full Movement Logs ---\n{'actor': 'Player'}\n")
+    (match,) = archive.matches(archive.log_records(str(path)), str(path))
+    assert (match["player_hits"], match["outcome"], match["player"]) == (archive.FLEET_CELLS, "win", None)
+    assert match["started"] == started.timestamp()
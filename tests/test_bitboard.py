@@ -0,0 +1,37 @@
+import pytest
+
+from bitboard import BitBoard, cell_bit, mask_cells, mask_indices, ship_mask
+
+
+def test_ship_mask_runs_along_a_row_or_a_column():
+    assert list(mask_cells(ship_mask(2, 3, 3, True, 10), 10)) == [(2, 3), (2, 4), (2, 5)]
+    assert list(mask_cells(ship_mask(2, 3, 3, False, 10), 10)) == [(2, 3), (3, 3), (4, 3)]
+
+
+def test_mask_indices_lowest_first():
+    assert list(mask_indices(cell_bit(9, 9, 10) | cell_bit(0, 1, 10) | 1)) == [0, 1, 99]
+    assert list(mask_indices(0)) == []
+
+
+def test_fire_reports_hits_misses_and_sinks():
+    board = BitBoard(10, 10)
+    first = board.add_ship(ship_mask(0, 0, 2, True, 10))
+    board.add_ship(ship_mask(5, 5, 3, False, 10))
+    assert board.fire(9) == (False, None)
+    assert board.fire(0) == (True, None)
+    assert board.fire(1) == (True, first)
+    assert board.is_sunk(first)
+    assert not board.all_ships_sunk()
+    for row in (5, 6, 7):
+        board.fire(row * 10 + 5)
+    assert board.all_ships_sunk()
+
+
+def test_overlaps_and_repeated_shots_are_refused():
+    board = BitBoard(10, 10)
+    board.add_ship(ship_mask(0, 0, 3, True, 10))
+    with pytest.raises(ValueError):
+        board.add_ship(ship_mask(0, 2, 2, False, 10))
+    board.fire(50)
+    with pytest.raises(ValueError):
+        board.fire(50)
@@ -0,0 +1,61 @@
+import random
+
+import pytest
+
+import engine
+
+
+def test_parse_board():
+    assert engine.parse_board("12X30") == (12, 30)
+    with pytest.raises(ValueError):
+        engine.parse_board("12 by 30")
+
+
+def test_parse_fleet_names_and_counts_ships():
+    assert engine.parse_fleet("Flagship:6,5,2x2") == [("Flagship", 6), ("Air Carrier", 5),
+                                                      ("Submarine 1", 2), ("Submarine 2", 2)]
+    for spec in ("big", "0", "4x0", "Name:"):
+        with pytest.raises(ValueError):
+            engine.parse_fleet(spec)
+
+
+def test_check_setup():
+    engine.check_setup(10, 10, engine.FLEET)
+    engine.check_setup(engine.MAX_BOARD, 1, [("Long", engine.MAX_BOARD)])
+    for rows, cols, fleet in ((0, 10, engine.FLEET), (10, engine.MAX_BOARD + 1, engine.FLEET),
+                              (10, 10, []), (4, 4, [("Big", 5)]), (2, 2, [("A", 2), ("B", 2), ("C", 2)])):
+        with pytest.raises(ValueError):
+            engine.check_setup(rows, cols, fleet)
+
+
+def test_row_labels_go_past_z():
+    assert [engine.row_label(row) for row in (0, 25, 26, 27, 51, 52)] == ["A", "Z", "AA", "AB", "AZ", "BA"]
+
+
+def test_a_fleet_is_sunk_by_shooting_every_cell():
+    board = engine.board_from_ships(engine.random_fleet(rng=random.Random(2)))
+    sunk = []
+    for row in range(engine.ROWS):
+        for col in range(engine.COLS):
+            result, ship = board.fire(row, col)
+            assert result == ("hit" if any((row, col) in s["cells"] for s in board.ships) else "miss")
+            if ship:
+                sunk.append(ship["name"])
+    assert sorted(sunk) == sorted(name for name, _ in engine.FLEET)
+    assert board.all_ships_sunk()
+    assert board.shots_fired == engine.ROWS * engine.COLS
+    with pytest.raises(ValueError):
+        board.fire(0, 0)
+
+
+def test_restore_shots_rebuilds_the_board():
+    ships = engine.random_fleet(rng=random.Random(4))
+    played = engine.board_from_ships([dict(ship) for ship in ships])
+    for row, col in ships[0]["cells"] + [(0, 0), (9, 9), (5, 5)]:
+        if played.is_untouched(row, col):
+            played.fire(row, col)
+    restored = engine.board_from_ships([dict(ship) for ship in ships])
+    restored.restore_shots(played.bits.hit_mask, played.bits.miss_mask)
+    assert restored.status == played.status
+    assert [ship["status"] for ship in restored.ships] == [ship["status"] for ship in played.ships]
+    assert restored.shots_fired == played.shots_fired
@@ -0,0 +1,54 @@
+import numpy as np
+
+import heatmap
+
+
+def empty(rows=10, cols=10):
+    return np.zeros((rows, cols), dtype=bool)
+
+
+def brute_force(misses, hits, sunk, sizes, hit_weight=50):
+    rows, cols = misses.shape
+    heat = np.zeros((rows, cols), dtype=np.int64)
+    for size in sizes:
+        for horizontal in (True, False) if size > 1 else (True,):
+            for row in range(rows - (0 if horizontal else size - 1)):
+                for col in range(cols - (size - 1 if horizontal else 0)):
+                    cells = [(row, col + i) if horizontal else (row + i, col) for i in range(size)]
+                    if any(misses[cell] or sunk[cell] for cell in cells):
+                        continue
+                    weight = 1 + hit_weight * sum(bool(hits[cell]) and not sunk[cell] for cell in cells)
+                    for cell in cells:
+                        heat[cell] += weight
+    heat[misses | hits] = 0
+    return heat
+
+
+def test_matches_a_brute_force_count():
+    rng = np.random.default_rng(3)
+    misses = rng.random((8, 9)) < 0.2
+    hits = (rng.random((8, 9)) < 0.1) & ~misses
+    sunk = empty(8, 9)
+    sunk[0, :2] = hits[0, :2] = True
+    misses[0, :2] = False
+    sizes = [2, 3, 3, 4, 5]
+    assert (heatmap.placement_heatmap(misses, hits, sunk, sizes) == brute_force(misses, hits, sunk, sizes)).all()
+
+
+def test_batches_match_single_boards():
+    rng = np.random.default_rng(5)
+    misses = rng.random((4, 10, 10)) < 0.25
+    hits = np.zeros_like(misses)
+    sunk = np.zeros_like(misses)
+    batch = heatmap.placement_heatmap(misses, hits, sunk, [2, 3, 5])
+    for board in range(4):
+        assert (batch[board] == heatmap.placement_heatmap(misses[board], hits[board], sunk[board], [2, 3, 5])).all()
+
+
+def test_best_cell_respects_the_allowed_mask():
+    heat = np.arange(100).reshape(10, 10)
+    assert heatmap.best_cell(heat, heatmap.parity_mask(10, 10)) == (9, 9)
+    allowed = empty()
+    allowed[3, 4] = True
+    assert heatmap.best_cell(heat, allowed) == (3, 4)
+    assert heatmap.best_cell(heat, empty()) is None
@@ -0,0 +1,87 @@
+import io
+import threading
+
+import pytest
+
+import matchlog
+
+
+def test_records_round_trip():
+    data = matchlog.encode_record("Player", 3, 4, "hit", "Cruiser", timestamp=12.5)
+    record = matchlog.decode_record(data[2:])
+    assert record == matchlog.Record(12.5, "Player", "Attack", 3, 4, "hit", "Cruiser")
+    start = matchlog.encode_record("Ann", 10, 12, None, "hard", timestamp=1.0, action="Start")
+    assert matchlog.decode_record(start[2:]) == matchlog.Record(1.0, "Ann", "Start", 10, 12, None, "hard")
+
+
+def test_long_names_are_cut_at_a_whole_character():
+    record = matchlog.decode_record(matchlog.encode_record("é" * 300, 0, 0, "miss", timestamp=0)[2:])
+    assert record.actor == "é" * (matchlog.MAX_NAME_BYTES // 2)
+
+
+def test_a_truncated_tail_is_skipped():
+    stream = io.BytesIO(matchlog.MAGIC + matchlog.encode_record("Player", 1, 1, "miss")
+                        + matchlog.encode_record("Computer", 2, 2, "hit")[:-3])
+    assert [record.actor for record in matchlog.iter_records(stream, chunk_size=5)] == ["Player"]
+
+
+def test_other_files_are_refused():
+    with pytest.raises(ValueError):
+        list(matchlog.iter_records(io.BytesIO(b"BSRPL\x01")))
+
+
+@pytest.mark.parametrize("when_full", matchlog.WHEN_FULL)
+def test_the_writer_keeps_every_record_in_order(tmp_path, when_full):
+    path = str(tmp_path / "game.bslog")
+    log = matchlog.MatchLog(path, flush_interval=0.01, max_queue=4, when_full=when_full, batch_bytes=64)
+    log.start_match("Ann", "expert", 10, 10)
+    for shot in range(500):
+        log.write("Player" if shot % 2 else "Computer", shot // 10 % 10, shot % 10, "miss")
+    log.end_match("Player")
+    log.close()
+    log.close()
+    records = matchlog.read_log(path)
+    assert len(records) + log.dropped == 502
+    if when_full != "drop":
+        assert [record.action for record in (records[0], records[-1])] == ["Start", "End"]
+        assert [(record.row, record.col) for record in records[1:-1]] == \
+               [(shot // 10 % 10, shot % 10) for shot in range(500)]
+
+
+class StalledFile:
+    """Holds every write back until `release` is set."""
+
+    def __init__(self, file):
+        self.file = file
+        self.release = threading.Event()
+
+    def write(self, data):
+        self.release.wait()
+        return self.file.write(data)
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def test_coalesced_records_stay_under_the_cap(tmp_path):
+    path = str(tmp_path / "game.bslog")
+    log = matchlog.MatchLog(path, max_queue=1, when_full="coalesce", batch_bytes=1, max_pending=200)
+    log.file = StalledFile(log.file)
+    threading.Timer(0.2, log.file.release.set).start()
+    held = 0
+    for shot in range(100):
+        log.write("Player", shot // 10, shot % 10, "miss")
+        held = max(held, len(log.pending))
+    log.close()
+    assert 0 < held <= 200
+    assert [(record.row, record.col) for record in matchlog.read_log(path)] == \
+           [(shot // 10, shot % 10) for shot in range(100)]
+
+
+def test_to_text_keeps_the_old_format():
+    records = [matchlog.Record(0, "Player", "Attack", 1, 2, "hit", None)]
+    assert matchlog.to_text(records).splitlines()[0] == \
+        "Player performed Attack at position (1, 2) with result: Hit"
@@ -0,0 +1,45 @@
+import random
+
+import pytest
+
+from bitboard import ship_mask
+from placement import placement_index, sample_fleet, sample_placement
+
+
+def test_index_holds_every_in_bounds_placement():
+    index = placement_index(10, 10, 3)
+    assert len(index.horizontal) == len(index.vertical) == 10 * 8
+    assert index.at(0, 7, True).mask == ship_mask(0, 7, 3, True, 10)
+    assert index.at(0, 8, True) is None
+    assert index.at(8, 0, False) is None
+    assert all(spot.mask >> 55 & 1 for spot in index.covering(5, 5))
+    assert len(index.covering(5, 5)) == 6
+
+
+def test_one_cell_ships_have_one_orientation():
+    index = placement_index(4, 4, 1)
+    assert index.vertical == ()
+    assert index.at(2, 2, False) is index.at(2, 2, True)
+
+
+def test_sample_placement_avoids_the_occupied_cells():
+    rng = random.Random(1)
+    occupied = (1 << 100) - 1 & ~ship_mask(4, 2, 5, True, 10)
+    for _ in range(20):
+        spot = sample_placement(10, 10, 5, occupied, rng)
+        assert (spot.row, spot.col, spot.horizontal) == (4, 2, True)
+    assert sample_placement(10, 10, 5, (1 << 100) - 1, rng) is None
+
+
+def test_sample_fleet_never_overlaps():
+    rng = random.Random(7)
+    for _ in range(50):
+        taken = 0
+        for spot in sample_fleet(10, 10, [5, 4, 4, 3, 2], rng):
+            assert not spot.mask & taken
+            taken |= spot.mask
+
+
+def test_sample_fleet_gives_up_on_an_impossible_board():
+    with pytest.raises(ValueError):
+        sample_fleet(3, 3, [3, 3, 3, 2], random.Random(0))
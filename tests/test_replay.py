@@ -0,0 +1,72 @@
+import random
+
+import pytest
+
+import engine
+import replay
+
+
+def record(path, seed=3, shots=150):
+    rng = random.Random(seed)
+    player_ships = engine.random_fleet(rng=rng)
+    computer_ships = engine.random_fleet(rng=rng)
+    boards = [engine.board_from_ships([dict(ship) for ship in ships]) for ships in (player_ships, computer_ships)]
+    recorder = replay.Recorder(str(path), 10, 10, seed, "hard", player_ships, computer_ships)
+    cells = [(row, col) for row in range(10) for col in range(10)]
+    order = {"Player": rng.sample(cells, 100), "Computer": rng.sample(cells, 100)}
+    results = []
+    for turn in range(shots):
+        shooter = replay.SHOOTERS[turn % 2]
+        row, col = order[shooter].pop()
+        recorder.shot(shooter, row, col)
+        results.append(boards[1 if shooter == "Player" else 0].fire(row, col))
+    recorder.close()
+    return boards, results
+
+
+def test_recorded_matches_load_back(tmp_path):
+    path = tmp_path / "match.bsreplay"
+    record(path)
+    loaded = replay.load(str(path))
+    assert (loaded.rows, loaded.cols, loaded.seed, loaded.difficulty) == (10, 10, 3, "hard")
+    assert len(loaded.shots) == 150
+    assert [ship["name"] for ship in loaded.player_ships] == [name for name, _ in engine.FLEET]
+
+
+def test_a_shot_cut_off_at_the_end_is_dropped(tmp_path):
+    path = tmp_path / "match.bsreplay"
+    record(path, shots=10)
+    with open(path, "ab") as file:
+        file.write(b"\x01\x02")
+    assert len(replay.load(str(path)).shots) == 10
+
+
+def test_long_ship_names_are_cut_at_a_whole_character(tmp_path):
+    path = tmp_path / "match.bsreplay"
+    ships = engine.random_fleet(fleet=[("é" * 200, 5), ("Patrol Boat", 2)], rng=random.Random(1))
+    replay.Recorder(str(path), 10, 10, 1, "hard", ships, ships).close()
+    loaded = replay.load(str(path))
+    assert [ship["name"] for ship in loaded.computer_ships] == ["é" * (replay.MAX_TEXT_BYTES // 2), "Patrol Boat"]
+
+
+def test_other_files_are_refused(tmp_path):
+    path = tmp_path / "not.bsreplay"
+    path.write_bytes(b"BSLOG\x01")
+    with pytest.raises(ValueError):
+        replay.load(str(path))
+
+
+def test_timeline_matches_the_boards_at_every_turn(tmp_path):
+    path = tmp_path / "match.bsreplay"
+    boards, results = record(path)
+    timeline = replay.Timeline(replay.load(str(path)), every=16)
+    final = timeline.state_at(len(timeline))
+    assert final == tuple((board.bits.hit_mask, board.bits.miss_mask) for board in boards)
+    for turn, (result, sunk_ship) in enumerate(results, 1):
+        timeline_result, timeline_sunk = timeline.result(turn)
+        assert timeline_result == result
+        assert (timeline_sunk or {}).get("name") == (sunk_ship or {}).get("name")
+    # Seeking backwards gives the same states as playing forwards
+    assert [timeline.state_at(turn) for turn in range(150, -1, -7)][::-1] == \
+           [replay.Timeline(timeline.replay, every=1000).state_at(turn) for turn in range(150, -1, -7)][::-1]
+    assert timeline.state_at(-5) == ((0, 0), (0, 0))
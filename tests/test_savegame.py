@@ -0,0 +1,67 @@
+import json
+import random
+
+import pytest
+
+import ai
+import engine
+import savegame
+
+
+def match_in_progress(difficulty="hard", seed=11):
+    rng = random.Random(seed)
+    player_board = engine.board_from_ships(engine.random_fleet(rng=rng))
+    computer_board = engine.board_from_ships(engine.random_fleet(rng=rng))
+    computer_ai = ai.STRATEGIES[difficulty](rng=rng)
+    for _ in range(30):
+        row, col = computer_ai.choose_target()
+        computer_ai.observe(row, col, *player_board.fire(row, col))
+    for row in range(3):
+        for col in range(10):
+            computer_board.fire(row, col)
+    state = savegame.capture("Ann", difficulty, seed, player_board, computer_board, True, computer_ai, rng,
+                             engine.FLEET)
+    return state, computer_ai, rng
+
+
+@pytest.mark.parametrize("difficulty", sorted(ai.STRATEGIES))
+def test_a_resumed_match_plays_on_as_the_saved_one_would(difficulty):
+    state, computer_ai, rng = match_in_progress(difficulty)
+    restored = savegame.decode(savegame.encode(state))
+    assert restored == savegame.decode(savegame.encode(restored))
+    player_board, computer_board, restored_ai, restored_rng = savegame.resume(restored)
+    assert player_board.bits.hit_mask == state.player_board[0]
+    assert computer_board.bits.miss_mask == state.computer_board[1]
+    assert restored_ai.choose_target() == computer_ai.choose_target()
+    assert restored_rng.random() == rng.random()
+
+
+def test_autosave_writes_a_loadable_file(tmp_path):
+    state, _, _ = match_in_progress()
+    path = str(tmp_path / savegame.save_path("Ann"))
+    autosave = savegame.Autosave(path)
+    autosave.write(state)
+    autosave.write(state._replace(player_turn=False))
+    assert savegame.load(path).player_turn is False
+    autosave.discard()
+    assert savegame.load(path) is None
+
+
+def test_other_formats_and_versions_are_refused():
+    text = savegame.encode(match_in_progress()[0])
+    for changed in ({"format": "something-else"}, {"version": savegame.VERSION + 1}):
+        with pytest.raises(ValueError):
+            savegame.decode(json.dumps({**json.loads(text), **changed}))
+
+
+def test_damaged_saves_raise_value_error():
+    data = json.loads(savegame.encode(match_in_progress()[0]))
+    del data["dynamic"]["rng"]
+    with pytest.raises(ValueError):
+        savegame.decode(json.dumps(data))
+    data = json.loads(savegame.encode(match_in_progress()[0]))
+    data["static"]["player_ships"] = 3
+    with pytest.raises(ValueError):
+        savegame.decode(json.dumps(data))
+    with pytest.raises(ValueError):
+        savegame.decode("[1, 2]")
@@ -0,0 +1,32 @@
+import pygame
+
+import BattleShipGame as game
+import engine
+
+
+def docked_on_grid(cells):
+    """The standard fleet laid out horizontally from column 0 of the given rows."""
+    ships = []
+    for (name, size), row in zip(engine.FLEET, cells):
+        ships.append({"name": name, "size": size, "horizontal": True, "hits": 0, "status": "alive",
+                      "rect": pygame.Rect(50, 100 + row * game.cells_size, size * game.cells_size, game.cells_size)})
+    return ships
+
+
+def test_a_ship_turned_off_the_grid_is_moved_back_onto_it():
+    ships = docked_on_grid([0, 2, 4, 6, 9])
+    assert game.fleet_placed(ships)
+    game.rotate_ship(ships[4])
+    assert not game.fleet_placed(ships)
+    assert game.settle_ship(ships[4], ships)
+    assert game.fleet_placed(ships)
+    engine.board_from_ships([game.attach_cells(ship, 50, 100) for ship in ships])
+
+
+def test_a_ship_turned_onto_another_is_moved_clear_of_it():
+    ships = docked_on_grid([0, 1, 4, 6, 8])
+    game.rotate_ship(ships[0])
+    assert game.grid_placement(ships[0]) is not None
+    assert not game.fleet_placed(ships)
+    assert game.settle_ship(ships[0], ships)
+    assert game.fleet_placed(ships)
@@ -0,0 +1,22 @@
+import random
+
+import battleships_sim as sim
+
+
+def test_both_strategies_shoot_at_the_same_fleet(monkeypatch):
+    fleets = []
+    monkeypatch.setattr(sim, "shots_to_sink", lambda strategy, ships, *rest: fleets.append(ships) or 50)
+    sim.play_game("easy", "hard", "random", 3, 0)
+    assert fleets[0] == fleets[1]
+
+
+def test_one_strategy_never_changes_the_others_game():
+    for game in range(5):
+        assert sim.play_game("easy", "hard", "random", 3, game)[1] == \
+               sim.play_game("expert", "hard", "random", 3, game)[1]
+
+
+def test_monte_carlo_results_do_not_depend_on_the_clock_or_the_workers():
+    assert sim.make_player("montecarlo", random.Random(0)).time_budget == 0
+    results = [sim.run("montecarlo", "hard", 4, seed=2, workers=workers, chunk_size=1) for workers in (1, 2)]
+    assert results[0] == results[1]